@@ -0,0 +1,124 @@
+import math
+import random
+import statistics
+from scipy.stats import t
+
+class AdaptiveScheduler:
+    """
+    Class to decide which task to run next, so that measurement time goes to the tasks whose results are
+    still uncertain.
+
+    Every task first runs a minimum number of times, in a shuffled order. After that the scheduler keeps a
+    confidence interval of the mean energy and time of each task, and picks the task whose interval is the
+    widest relative to its mean, as long as it is wider than the target width and the task has runs left in
+    its maximum budget. The schedule ends when every task has met the target or used its budget.
+    """
+
+    def __init__(self, task_names, min_runs=10, max_runs=30, target_width=0.05, confidence=0.95, seed=None):
+        """
+        Initializes the scheduler with the tasks and the stopping rule.
+
+        Parameters:
+        - task_names (list[str]): Names of the tasks to schedule.
+        - min_runs (int): Number of runs of each task before its interval is considered.
+        - max_runs (int): Largest number of runs of each task.
+        - target_width (float): Full width of the confidence interval relative to the mean, e.g. 0.05 for ±2.5%.
+        - confidence (float): Confidence level of the intervals.
+        - seed (int, optional): Seed of the shuffled order and of the choice between equally wide intervals.
+        """
+        if not 2 <= min_runs <= max_runs:
+            raise ValueError("The minimum number of runs must be at least 2 and at most the maximum.")
+        self.min_runs = min_runs
+        self.max_runs = max_runs
+        self.target_width = target_width
+        self.confidence = confidence
+        self.random = random.Random(seed)
+        self.runs = {name: 0 for name in task_names}
+        self.energies = {name: [] for name in task_names}
+        self.times = {name: [] for name in task_names}
+        # The minimum runs are interleaved like the fixed schedule
+        self.initial_runs = [name for name in task_names for _ in range(min_runs)]
+        self.random.shuffle(self.initial_runs)
+
+    def relative_width(self, values):
+        """
+        Computes the full width of the Student's t confidence interval of the mean, relative to the mean.
+
+        Parameters:
+        - values (list[float]): Measured values of one task.
+
+        Returns:
+        - float: The relative width, infinite for fewer than two values or a mean of zero.
+        """
+        if len(values) < 2:
+            return math.inf
+        mean = statistics.mean(values)
+        if mean == 0:
+            return math.inf
+        half_width = t.ppf((1 + self.confidence) / 2, len(values) - 1) * statistics.stdev(values) / math.sqrt(len(values))
+        return 2 * half_width / abs(mean)
+
+    def width(self, task_name):
+        """
+        Computes the widest relative confidence interval of a task, of its energy and of its time.
+
+        Parameters:
+        - task_name (str): Name of the task.
+
+        Returns:
+        - float: The relative width, see 'relative_width'.
+        """
+        return max(self.relative_width(self.energies[task_name]), self.relative_width(self.times[task_name]))
+
+    def record(self, task_name, time, energy):
+        """
+        Records a run of a task. A run without results, such as one that timed out, is recorded with
+        None for its time and energy: it uses the budget of the task but does not narrow its intervals.
+
+        Parameters:
+        - task_name (str): Name of the task.
+        - time (float): Time of the run in seconds, or None.
+        - energy (float): Energy of the run in Joules, or None.
+        """
+        self.runs[task_name] += 1
+        if time is not None and energy is not None:
+            # Loaded values can be NumPy scalars, which the statistics module does not accept
+            self.times[task_name].append(float(time))
+            self.energies[task_name].append(float(energy))
+
+    def restore(self, task_name, time, energy):
+        """
+        Records a run of a task that was measured before the scheduler was created, such as when resuming
+        an experiment. A restored run takes the place of one of the task's minimum runs that are still to come.
+
+        Parameters:
+        - task_name (str): Name of the task.
+        - time (float): Time of the run in seconds, or None.
+        - energy (float): Energy of the run in Joules, or None.
+        """
+        if task_name in self.initial_runs:
+            # Restored in the order they ran, which took the minimum runs from the end
+            del self.initial_runs[len(self.initial_runs) - 1 - self.initial_runs[::-1].index(task_name)]
+        self.record(task_name, time, energy)
+
+    def next_task(self):
+        """
+        Picks the task to run next.
+
+        Returns:
+        - str: Name of the task, or None when the schedule has ended.
+        """
+        if self.initial_runs:
+            return self.initial_runs.pop()
+        candidates = [(self.width(name), self.random.random(), name) for name, runs in self.runs.items()
+                      if runs < self.max_runs and self.width(name) > self.target_width]
+        return max(candidates)[2] if candidates else None
+
+    def summary(self):
+        """
+        Summarises the schedule per task.
+
+        Returns:
+        - dict[str, tuple]: Per task its number of runs and the relative width of its widest interval.
+        """
+        return {name: (runs, self.width(name)) for name, runs in self.runs.items()}
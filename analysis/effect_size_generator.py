@@ -2,6 +2,7 @@ import os
 import json
 import numpy as np
 from itertools import combinations
+from analysis.record_table import RecordTable
 from typing import List, Dict, Tuple
 from scipy.stats import ttest_ind, mannwhitneyu
 
@@ -11,32 +12,28 @@ class EffectSizeGenerator:
     grouped by regex complexity.
     """
     
-    def __init__(self, records: List, parametric: bool = True):
+    def __init__(self, records, parametric: bool = True):
         """
         Initializes the EffectSizeGenerator.
         
         Parameters:
-        - records (List): A list of EnergyRecord objects containing time-energy measurements.
+        - records (RecordTable or List): The EnergyRecord objects containing time-energy measurements.
         """
-        self.records = records
+        self.table = RecordTable.of(records)
         self.grouped_data = self._group_by_engine_and_complexity()
         self.parametric = parametric
 
-    def _group_by_engine_and_complexity(self) -> Dict[Tuple[str, str], Dict[str, List[float]]]:
+    def _group_by_engine_and_complexity(self) -> Dict[Tuple[str, str], Dict[str, np.ndarray]]:
         """
         Groups input records by engine and regex complexity.
         
         Returns:
-        - Dict[Tuple[str, str], Dict[str, List[float]]]: Grouped time and energy data.
+        - Dict[Tuple[str, str], Dict[str, np.ndarray]]: Grouped time and energy data.
         """
-        grouped = {}
-        for record in self.records:
-            key = (record.regex_complexity, record.engine)
-            if key not in grouped:
-                grouped[key] = {'time': [], 'energy': []}
-            grouped[key]['time'].append(record.time)
-            grouped[key]['energy'].append(record.energy)
-        return grouped
+        return {
+            key: {'time': self.table["time"][rows], 'energy': self.table["energy"][rows]}
+            for key, rows in self.table.group_by("regex_complexity", "engine")
+        }
     
     def _welch_t_test(self, values1: List[float], values2: List[float]) -> Tuple[float, float]:
             """
@@ -1,39 +1,73 @@
 import sys
 import os
+import numpy as np
 
 # Add the parent directory to the system path to allow module imports from the parent folder
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from analysis.results_loader import ResultsLoader
+from analysis.record_table import RecordTable
 from analysis.effect_size_generator import EffectSizeGenerator
 from analysis.plot_generator import PlotGenerator
 from analysis.statistics_generator import StatisticsGenerator
+from analysis.scaling_analysis import ScalingAnalysis
+from analysis.parallel_scaling_analysis import ParallelScalingAnalysis
 
 class EnergyAnalysis:
 
-    def __init__(self):
-        pass
+    def __init__(self, results_dir="results"):
+        self.results_dir = results_dir
 
     def run(self):
         # Load the results
-        loader = ResultsLoader()
-        energy_records = loader.load_results()
-        energy_records_with_outliers = energy_records.copy()
+        loader = ResultsLoader(self.results_dir)
+        # Every stage shares one columnar table of the records
+        energy_records = RecordTable.from_records(loader.load_results())
+
+        # Analyse each corpus separately, a size sweep gets one output directory per corpus
+        corpora = energy_records.unique("corpus")
+        filtered_tables = []
+        for corpus in corpora:
+            corpus_records = energy_records.filter(energy_records.equals("corpus", corpus))
+            output_dir = self.results_dir if len(corpora) == 1 else os.path.join(self.results_dir, corpus)
+            filtered_tables.append(self._analyse_corpus(corpus_records, output_dir))
+        filtered_records = RecordTable.concat(filtered_tables)
+
+        # Fit time and energy against corpus size when several sizes were measured
+        sizes = filtered_records["corpus_size_mb"]
+        if len(np.unique(sizes[~np.isnan(sizes)])) > 1:
+            scaling_dir = os.path.join(self.results_dir, "scaling")
+            ScalingAnalysis(filtered_records).generate(output_dir=scaling_dir)
+
+            plots_generator = PlotGenerator(filtered_records)
+            plots_generator.generate_scaling_plots(metric="energy", output_dir=scaling_dir)
+            plots_generator.generate_scaling_plots(metric="time", output_dir=scaling_dir)
+
+        # Compare the parallel engine across numbers of workers when it was measured
+        if any(ParallelScalingAnalysis.engine_pattern.match(engine) for engine in filtered_records.unique("engine")):
+            ParallelScalingAnalysis(filtered_records).generate(output_dir=os.path.join(self.results_dir, "parallel_scaling"))
+
+    def _analyse_corpus(self, energy_records, output_dir):
+        os.makedirs(output_dir, exist_ok=True)
+        # Runs that timed out only have partial measurements, they are counted in the stats but not plotted
+        energy_records_with_outliers = energy_records.filter(energy_records.equals("outcome", "ok"))
 
         # Compute stats
-        stats_generator = StatisticsGenerator(energy_records, outlier_method="iqr")
+        stats_generator = StatisticsGenerator(energy_records, results_dir=output_dir, outlier_method="iqr")
         filtered_records = stats_generator.generate()
 
         # Compute effect sizes
         effect_size_generator = EffectSizeGenerator(filtered_records, parametric=True)
-        effect_size_generator.generate()
+        effect_size_generator.generate(output_dir=os.path.join(output_dir, "effect_size"))
 
         # Generate plots with outliers
         plots_generator = PlotGenerator(energy_records_with_outliers)
-        plots_generator.generate_violin_plots(metric="energy", output_dir="results/plots_with_outliers")
-        plots_generator.generate_violin_plots(metric="time", output_dir="results/plots_with_outliers")
+        plots_generator.generate_violin_plots(metric="energy", output_dir=os.path.join(output_dir, "plots_with_outliers"))
+        plots_generator.generate_violin_plots(metric="time", output_dir=os.path.join(output_dir, "plots_with_outliers"))
 
         # Generate plots without outliers
         plots_generator = PlotGenerator(filtered_records)
-        plots_generator.generate_violin_plots(metric="energy")
-        plots_generator.generate_violin_plots(metric="time")
\ No newline at end of file
+        plots_generator.generate_violin_plots(metric="energy", output_dir=os.path.join(output_dir, "plots"))
+        plots_generator.generate_violin_plots(metric="time", output_dir=os.path.join(output_dir, "plots"))
+
+        return filtered_records
\ No newline at end of file
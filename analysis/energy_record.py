@@ -1,16 +1,33 @@
 class EnergyRecord:
-    def __init__(self, engine: str, regex_complexity: str, run: int, time: float, energy: float):
+    __slots__ = ("engine", "regex_complexity", "run", "time", "energy", "corpus", "corpus_size_mb", "outcome",
+                 "total_time", "total_energy", "process", "metrics")
+
+    def __init__(self, engine: str, regex_complexity: str, run: int, time: float, energy: float, corpus: str = "corpus", corpus_size_mb: float = None, outcome: str = "ok", total_time: float = None, total_energy: float = None, process: dict = None, metrics: dict = None):
         """
         Stores energy consumption data for a given regex engine and regex complexity.
 
         :param engine: Name of the regex engine/library used.
         :param regex_complexity: Description or level of regex complexity.
         :param run: Iteration of experiment.
-        :param time: Time in seconds (s) of the measurement.
-        :param energy: Measured energy consumption in Joules (J)
+        :param time: Time in seconds (s) of the matching window, from the engine's start signal until it is done.
+        :param energy: Measured energy consumption in Joules (J) during the matching window.
+        :param corpus: Name of the corpus the regex was matched against.
+        :param corpus_size_mb: Size of the corpus in MB, if known.
+        :param outcome: Outcome of the run, "ok", "timeout" when it exceeded its time or CPU budget, or "failed" when it crashed.
+        :param total_time: Time in seconds (s) of the whole measured process, including start-up. Defaults to 'time'.
+        :param total_energy: Energy consumption in Joules (J) of the whole measured process. Defaults to 'energy'.
+        :param process: Resource usage of the engine process (peak RSS, CPU time, context switches and page faults), if recorded.
+        :param metrics: Metrics of the run's time series over the matching window (energy per component, power, frequency, utilisation), if analysed.
         """
         self.engine = engine
         self.regex_complexity = regex_complexity
         self.run = run
         self.time = time
-        self.energy = energy
\ No newline at end of file
+        self.energy = energy
+        self.corpus = corpus
+        self.corpus_size_mb = corpus_size_mb
+        self.outcome = outcome
+        self.total_time = time if total_time is None else total_time
+        self.total_energy = energy if total_energy is None else total_energy
+        self.process = process
+        self.metrics = metrics
\ No newline at end of file
@@ -0,0 +1,94 @@
+import os
+import re
+import json
+import numpy as np
+from typing import Dict, Tuple
+from analysis.record_table import RecordTable
+
+class ParallelScalingAnalysis:
+    """
+    A class to compare runs of a parallel engine at different numbers of worker processes,
+    grouped by corpus and regex complexity. Engines are recognised by their "<engine>_w<workers>" name.
+    For every number of workers it reports mean time and energy, the speedup and the energy
+    relative to the fewest workers, and the number of workers at which energy is lowest.
+    """
+
+    engine_pattern = re.compile(r"^(?P<engine>.+)_w(?P<workers>\d+)$")
+
+    def __init__(self, records):
+        """
+        Initializes the ParallelScalingAnalysis.
+
+        Parameters:
+        - records (RecordTable or List): The EnergyRecord objects, records of other engines are ignored.
+        """
+        self.table = RecordTable.of(records)
+        self.grouped_data = self._group_by_engine_and_workers()
+
+    def _group_by_engine_and_workers(self) -> Dict[Tuple[str, str, str], Dict[int, Dict[str, np.ndarray]]]:
+        """
+        Groups input records of parallel engines by corpus, regex complexity and engine, then by workers.
+
+        Returns:
+        - Dict[Tuple[str, str, str], Dict[int, Dict[str, np.ndarray]]]: Grouped time and energy data.
+        """
+        grouped = {}
+        for (corpus, complexity, engine), rows in self.table.group_by("corpus", "regex_complexity", "engine"):
+            match = self.engine_pattern.match(engine)
+            if match is None:
+                continue
+            key = (corpus, complexity, match.group("engine"))
+            grouped.setdefault(key, {})[int(match.group("workers"))] = {'time': self.table["time"][rows], 'energy': self.table["energy"][rows]}
+        return grouped
+
+    def compute(self) -> Dict[Tuple[str, str, str], Dict]:
+        """
+        Computes speedup and energy per number of workers.
+
+        Returns:
+        - Dict[Tuple[str, str, str], Dict]: Results keyed by (corpus, regex complexity, engine).
+        """
+        results = {}
+        for key, data_by_workers in self.grouped_data.items():
+            workers = sorted(data_by_workers)
+            mean_time = {w: float(np.mean(data_by_workers[w]['time'])) for w in workers}
+            mean_energy = {w: float(np.mean(data_by_workers[w]['energy'])) for w in workers}
+            baseline = workers[0]
+
+            results[key] = {
+                "baseline_workers": baseline,
+                # The match count is the same for every number of workers, so the lowest energy is also the lowest energy per match
+                "min_energy_workers": min(workers, key=lambda w: mean_energy[w]),
+                "workers": {
+                    w: {
+                        "runs": len(data_by_workers[w]['time']),
+                        "mean_time": mean_time[w],
+                        "mean_energy": mean_energy[w],
+                        "speedup": mean_time[baseline] / mean_time[w] if mean_time[w] > 0 else np.nan,
+                        "relative_energy": mean_energy[w] / mean_energy[baseline] if mean_energy[baseline] > 0 else np.nan
+                    }
+                    for w in workers
+                }
+            }
+        return results
+
+    def generate(self, output_dir="results/parallel_scaling") -> None:
+        """
+        Computes the parallel scaling and saves it to a text file per corpus and regex complexity.
+
+        Parameters:
+        - output_dir (str): Directory to save the resulting txt files.
+        """
+        # Create the output directory if it does not exist
+        os.makedirs(output_dir, exist_ok=True)
+
+        outputs = {}
+        for (corpus, complexity, engine), result in sorted(self.compute().items()):
+            output = outputs.setdefault((corpus, complexity), [])
+            output.append(f"=== Parallel scaling: {engine} ===")
+            output.append(json.dumps(result, indent=2))
+            output.append("")
+
+        for (corpus, complexity), output in outputs.items():
+            with open(f"{output_dir}/{corpus}_{complexity}.txt", "w") as f:
+                f.write("\n".join(output))
@@ -1,8 +1,8 @@
 import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
-from typing import List
 import os
+from analysis.record_table import RecordTable
 
 class PlotGenerator:
     """
@@ -10,26 +10,22 @@ class PlotGenerator:
     Plots are saved to specified directory.
     """
 
-    def __init__(self, records: List):
+    def __init__(self, records):
         """
         Parameters:
-            - records (List[EnergyRecord]): A list of EnergyRecord objects with time-energy measurements.
+            - records (RecordTable or List[EnergyRecord]): The EnergyRecord objects with time-energy measurements.
         """
-        self.records = records
+        self.table = RecordTable.of(records)
         self.df = self._create_dataframe()
 
     def _create_dataframe(self) -> pd.DataFrame:
         """
-        Convert the list of record objects into a pandas DataFrame.
+        Convert the table of records into a pandas DataFrame.
         """
-        data = {
-            "engine": [r.engine for r in self.records],
-            "regex_complexity": [r.regex_complexity.capitalize() for r in self.records],
-            "run": [r.run for r in self.records],
-            "time": [r.time for r in self.records],
-            "energy": [r.energy for r in self.records],
-        }
-        return pd.DataFrame(data)
+        # Plain strings, seaborn would give every category of a categorical column a place on the axis
+        df = self.table.to_dataframe(categorical=False)
+        df["regex_complexity"] = df["regex_complexity"].str.capitalize()
+        return df[["engine", "regex_complexity", "run", "time", "energy", "corpus_size_mb"]]
 
     def generate_violin_plots(self,
                               metric: str,
@@ -118,3 +114,57 @@ class PlotGenerator:
             plt.close()
 
             print(f"Plot saved to {plot_filename}")
+
+    def generate_scaling_plots(self,
+                               metric: str,
+                               output_dir: str = "results/scaling"):
+        """
+        Generate line plots of the chosen metric against corpus size for each unique regex_complexity,
+        with one line per engine showing the mean and standard deviation at each corpus size.
+        Each plot is saved as a PNG.
+
+        Parameters:
+        - metric (str): Which metric to plot on the y-axis (must be "energy" or "time").
+        - output_dir (str): Directory to save the resulting PNG files.
+        """
+        # Validate the metric
+        if metric not in ["energy", "time"]:
+            raise ValueError(f"Invalid metric '{metric}'. Choose 'energy' or 'time'.")
+
+        # Create the output directory if it does not exist
+        os.makedirs(output_dir, exist_ok=True)
+
+        sized = self.df.dropna(subset=["corpus_size_mb"])
+
+        for complexity in sized["regex_complexity"].unique():
+            subset = sized[sized["regex_complexity"] == complexity]
+
+            plt.figure(figsize=(8, 6))
+            plt.title(f"{metric.capitalize()} Scaling for Regex Complexity: {complexity}")
+
+            sns.lineplot(
+                data=subset,
+                x="corpus_size_mb",
+                y=metric,
+                hue="engine",
+                marker="o",
+                errorbar="sd"
+            )
+
+            plt.xscale("log")
+            plt.yscale("log")
+            plt.xlabel("Corpus size (MB)")
+
+            if metric == "energy":
+                plt.ylabel("Energy (J)")
+            else:
+                plt.ylabel("Time (s)")
+
+            plt.tight_layout()
+
+            # Build filename and save the figure
+            plot_filename = os.path.join(output_dir, f"scaling_{metric}_{complexity}.png")
+            plt.savefig(plot_filename, dpi=300)
+            plt.close()
+
+            print(f"Plot saved to {plot_filename}")
@@ -0,0 +1,215 @@
+import numpy as np
+import pandas as pd
+from analysis.energy_record import EnergyRecord
+from typing import Dict, List, Tuple
+
+class RecordTable:
+    """
+    A class for a columnar table of energy records, shared by all analysis stages.
+    Every field is a NumPy array with one value per record. The engine, regex complexity, corpus and outcome
+    are stored as integer codes into a sorted array of their distinct values, so grouping and filtering on
+    them compares integers instead of strings. The resource usage and time series metrics of the records are
+    stored as one float column per key, NaN for records that did not record it.
+    """
+
+    categorical_columns = ["engine", "regex_complexity", "corpus", "outcome"]
+    numeric_columns = ["run", "time", "energy", "corpus_size_mb", "total_time", "total_energy"]
+
+    def __init__(self, codes: Dict[str, np.ndarray], categories: Dict[str, np.ndarray], values: Dict[str, np.ndarray],
+                 process: Dict[str, np.ndarray] = None, metrics: Dict[str, np.ndarray] = None):
+        """
+        Initializes the table from its columns, see 'from_records' to build it from records.
+
+        Parameters:
+        - codes (Dict[str, np.ndarray]): Codes of every categorical column, indices into its categories.
+        - categories (Dict[str, np.ndarray]): Sorted distinct values of every categorical column.
+        - values (Dict[str, np.ndarray]): Every numeric column, 'corpus_size_mb' is NaN where unknown.
+        - process (Dict[str, np.ndarray], optional): Resource usage of the engine processes by key.
+        - metrics (Dict[str, np.ndarray], optional): Time series metrics by name.
+        """
+        self.codes = codes
+        self.categories = categories
+        self.values = values
+        self.process = process or {}
+        self.metrics = metrics or {}
+
+    @classmethod
+    def from_records(cls, records: List[EnergyRecord]) -> "RecordTable":
+        """
+        Builds a table from a list of records.
+
+        Parameters:
+        - records (List[EnergyRecord]): The records, in the order of the rows of the table.
+
+        Returns:
+        - RecordTable: The table of the records.
+        """
+        codes, categories = {}, {}
+        for name in cls.categorical_columns:
+            column = [getattr(r, name) for r in records]
+            categories[name] = np.array(sorted(set(column)), dtype=object)
+            index = {value: code for code, value in enumerate(categories[name])}
+            codes[name] = np.fromiter((index[value] for value in column), dtype=np.int32, count=len(column))
+
+        values = {name: np.array([getattr(r, name) for r in records], dtype=float) for name in cls.numeric_columns}
+        values["run"] = values["run"].astype(np.int64)
+
+        def columns(attribute):
+            dicts = [getattr(r, attribute) or {} for r in records]
+            keys = sorted({key for d in dicts for key in d})
+            return {key: np.array([np.nan if d.get(key) is None else d[key] for d in dicts], dtype=float) for key in keys}
+
+        return cls(codes, categories, values, columns("process"), columns("metrics"))
+
+    @classmethod
+    def of(cls, records) -> "RecordTable":
+        """
+        Gets a table of records that are either a table already or a list of records.
+
+        Parameters:
+        - records (RecordTable or List[EnergyRecord]): The records.
+
+        Returns:
+        - RecordTable: The table itself, or the table built from the list.
+        """
+        return records if isinstance(records, cls) else cls.from_records(records)
+
+    @classmethod
+    def concat(cls, tables: List["RecordTable"]) -> "RecordTable":
+        """
+        Joins tables one after the other, merging the categories of their categorical columns.
+
+        Parameters:
+        - tables (List[RecordTable]): The tables to join.
+
+        Returns:
+        - RecordTable: The joined table.
+        """
+        if not tables:
+            return cls.from_records([])
+
+        codes, categories = {}, {}
+        for name in cls.categorical_columns:
+            categories[name] = np.unique(np.concatenate([t.categories[name] for t in tables]))
+            # Map the codes of each table onto the merged categories
+            codes[name] = np.concatenate([np.searchsorted(categories[name], t.categories[name]).astype(np.int32)[t.codes[name]]
+                                          for t in tables])
+
+        def joined(columns):
+            keys = sorted({key for t in tables for key in getattr(t, columns)})
+            return {key: np.concatenate([getattr(t, columns).get(key, np.full(len(t), np.nan)) for t in tables]) for key in keys}
+
+        values = {name: np.concatenate([t.values[name] for t in tables]) for name in cls.numeric_columns}
+        return cls(codes, categories, values, joined("process"), joined("metrics"))
+
+    def __len__(self) -> int:
+        return len(self.values["time"])
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        """
+        Gets a column by name, the values of a categorical column are decoded.
+        """
+        if name in self.codes:
+            return self.categories[name][self.codes[name]]
+        return self.values[name]
+
+    def unique(self, name: str) -> List:
+        """
+        Gets the distinct values of a column that occur in the table, sorted.
+        """
+        if name in self.codes:
+            return self.categories[name][np.unique(self.codes[name])].tolist()
+        return np.unique(self.values[name]).tolist()
+
+    def equals(self, name: str, value) -> np.ndarray:
+        """
+        Builds a mask of the rows whose categorical column has a value.
+
+        Parameters:
+        - name (str): Name of the categorical column.
+        - value: The value to compare with.
+
+        Returns:
+        - np.ndarray: Boolean mask, True for the rows with the value.
+        """
+        index = np.searchsorted(self.categories[name], value)
+        if index == len(self.categories[name]) or self.categories[name][index] != value:
+            return np.zeros(len(self), dtype=bool)
+        return self.codes[name] == index
+
+    def filter(self, mask: np.ndarray) -> "RecordTable":
+        """
+        Selects rows of the table.
+
+        Parameters:
+        - mask (np.ndarray): Boolean mask, or indices, of the rows to keep.
+
+        Returns:
+        - RecordTable: The selected rows, with the same categories.
+        """
+        return RecordTable({name: codes[mask] for name, codes in self.codes.items()}, self.categories,
+                           {name: values[mask] for name, values in self.values.items()},
+                           {key: values[mask] for key, values in self.process.items()},
+                           {name: values[mask] for name, values in self.metrics.items()})
+
+    def group_by(self, *names: str) -> List[Tuple[tuple, np.ndarray]]:
+        """
+        Groups the rows by the values of categorical columns.
+
+        Parameters:
+        - names (str): Names of the categorical columns to group by.
+
+        Returns:
+        - List[Tuple[tuple, np.ndarray]]: Per group the values of the columns and the indices of its rows, in the
+          order of the rows. Groups are ordered by their first row.
+        """
+        if len(self) == 0:
+            return []
+
+        # Combine the codes of all columns into one integer key per row
+        key = np.zeros(len(self), dtype=np.int64)
+        for name in names:
+            key = key * len(self.categories[name]) + self.codes[name]
+        _, first, inverse, counts = np.unique(key, return_index=True, return_inverse=True, return_counts=True)
+
+        rows = np.split(np.argsort(inverse, kind="stable"), np.cumsum(counts)[:-1])
+        return [(tuple(self.categories[name][self.codes[name][first[group]]] for name in names), rows[group])
+                for group in np.argsort(first)]
+
+    def to_records(self) -> List[EnergyRecord]:
+        """
+        Converts the table back into a list of records.
+
+        Returns:
+        - List[EnergyRecord]: A record per row.
+        """
+        def row_dict(columns, i):
+            d = {key: float(values[i]) for key, values in columns.items() if not np.isnan(values[i])}
+            return d or None
+
+        columns = {name: self[name] for name in self.categorical_columns}
+        return [EnergyRecord(columns["engine"][i], columns["regex_complexity"][i], int(self.values["run"][i]),
+                             float(self.values["time"][i]), float(self.values["energy"][i]), columns["corpus"][i],
+                             None if np.isnan(self.values["corpus_size_mb"][i]) else float(self.values["corpus_size_mb"][i]),
+                             columns["outcome"][i], float(self.values["total_time"][i]), float(self.values["total_energy"][i]),
+                             row_dict(self.process, i), row_dict(self.metrics, i))
+                for i in range(len(self))]
+
+    def to_dataframe(self, categorical: bool = True) -> pd.DataFrame:
+        """
+        Converts the table into a pandas DataFrame with a column per field, without the resource usage and metrics.
+
+        Parameters:
+        - categorical (bool): Keep the categorical columns as pandas categoricals, otherwise they hold strings.
+
+        Returns:
+        - pd.DataFrame: A row per record.
+        """
+        data = {}
+        for name in self.categorical_columns:
+            if categorical:
+                data[name] = pd.Categorical.from_codes(self.codes[name], categories=self.categories[name])
+            else:
+                data[name] = self[name]
+        data.update(self.values)
+        return pd.DataFrame(data)
@@ -1,6 +1,11 @@
 import os
+import re
+import json
+import numpy as np
 import pandas as pd
 from analysis.energy_record import EnergyRecord
+from analysis.results_store import ResultsStore
+from analysis.time_series_analysis import TimeSeriesAnalysis
 from typing import List
 
 class ResultsLoader:
@@ -8,58 +13,272 @@ class ResultsLoader:
     A class for loading and processing benchmark results from CSV files.
     This class extracts energy consumption results, computes execution time and energy
     based on the recorded energy measurements, and loads them into energy records.
+    Time and energy are computed over the matching window of each run, from the engine's start signal
+    until it is done, and over the whole measured process, which includes Python and engine start-up.
+    Records are kept in a ResultsStore in the results directory, so each run is only parsed once.
+    The full time series of the runs are analysed as well, see TimeSeriesAnalysis, and their metrics
+    are added to the records.
     """
-    def __init__(self, results_dir: str = "results"):
+
+    # Number of runs whose time series are stacked into one array at a time
+    chunk_size = 64
+
+    def __init__(self, results_dir: str = "results", use_store: bool = True, legacy_results: bool = None):
         """
         Initializes the ResultsLoader with a specified directory containing CSV results.
 
         Parameters:
         - results_dir (str): Path to the directory containing result CSV files.
+        - use_store (bool): Keep the records in 'results.sqlite' in the results directory, and only parse new or changed runs.
+        - legacy_results (bool, optional): Treat runs without a JSON result file as completed, as in results directories
+          from before result files were written. Otherwise such a run crashed and gets the outcome "failed". Defaults to
+          True only when no run in the results directory has a result file.
         """
         self.results_dir = results_dir
+        self.use_store = use_store
+        self.store_path = os.path.join(results_dir, "results.sqlite")
+        self.legacy_results = legacy_results
+
+    # Pattern of result file names, the corpus name may itself contain underscores (e.g. "corpus_16mb")
+    filename_pattern = re.compile(r"^engine_(?P<engine>.+?)_(?P<corpus>corpus[\w.]*?)_complexity_(?P<complexity>[^_]+)_run_(?P<run>\d+)\.csv$")
+    corpus_size_pattern = re.compile(r"_(?P<size>\d+(?:\.\d+)?)mb$")
 
     def parse_filename(self, filename: str):
         """
         Extracts metadata from the filename of a results CSV file.
         The filename is expected to follow the format:
-        "engine_<engine_type>_<engine_size>_complexity_<complexity_level>_run_<run_number>.csv"
+        "engine_<engine_type>_<corpus_name>_complexity_<complexity_level>_run_<run_number>.csv"
         
         Parameters:
         - filename (str): Name of the CSV file.
 
         Returns:
-        - tuple: (engine (str), regex_complexity (str), run (int))
+        - tuple: (engine (str), regex_complexity (str), run (int), corpus (str), corpus_size_mb (float or None))
+        """
+        match = self.filename_pattern.match(filename)
+        if match is None:
+            raise ValueError(f"Unexpected results file name: {filename}")
+
+        corpus = match.group("corpus")
+        size_match = self.corpus_size_pattern.search(corpus)
+        corpus_size_mb = float(size_match.group("size")) if size_match else None
+        return match.group("engine"), match.group("complexity"), int(match.group("run")), corpus, corpus_size_mb
+
+    def load_result_file(self, csv_path: str) -> dict:
+        """
+        Reads the JSON result file stored next to the CSV file of a run.
+
+        Parameters:
+        - csv_path (str): Path to the CSV file of the run.
+
+        Returns:
+        - dict: The structured results of the run, empty when it has no result file.
+        """
+        result_path = os.path.splitext(csv_path)[0] + ".json"
+        if not os.path.exists(result_path):
+            return {}
+        with open(result_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def is_legacy(self) -> bool:
+        """
+        Checks if runs without a JSON result file are completed runs of a legacy results directory, see '__init__'.
+        """
+        if self.legacy_results is None:
+            files = set(os.listdir(self.results_dir)) if os.path.isdir(self.results_dir) else set()
+            self.legacy_results = not any(file.endswith(".csv") and file[:-4] + ".json" in files for file in files)
+        return self.legacy_results
+
+    def window_energy(self, df: pd.DataFrame, start_ms: float, end_ms: float) -> tuple:
+        """
+        Computes the time and energy of a window of a measurement. The cumulative energy counter is
+        linearly interpolated at both ends of the window, which is clipped to the measurement.
+
+        Parameters:
+        - df (pd.DataFrame): Samples of the measurement, with the time in milliseconds since the epoch.
+        - start_ms (float): Start of the window in milliseconds since the epoch.
+        - end_ms (float): End of the window in milliseconds since the epoch.
+
+        Returns:
+        - tuple: (time in seconds (float), energy in Joules (float))
+        """
+        times = df['Time'].to_numpy(dtype=float)
+        energies = df['PACKAGE_ENERGY (J)'].to_numpy(dtype=float)
+        start_ms, end_ms = np.clip([start_ms, end_ms], times[0], times[-1])
+        energy_start, energy_end = np.interp([start_ms, end_ms], times, energies)
+        return (end_ms - start_ms) / 1000, energy_end - energy_start
+
+    def split_batch(self, record: EnergyRecord, result: dict) -> List[EnergyRecord]:
+        """
+        Splits the record of a batched run into one record per pattern, labelled with the regex complexity
+        of the pattern, and one "overhead" record for the runtime start-up and corpus load shared by the batch.
+        The time of a pattern is the sum of its compile and match phases over all iterations, and the energy
+        of the matching window is divided in proportion to time, assuming a constant power draw during it.
+        The overhead is the rest of the whole measured process. The resource usage of the engine process
+        is shared by the whole batch, so it is not split.
+
+        Parameters:
+        - record (EnergyRecord): Record of the whole batched run.
+        - result (dict): Structured results of the run, with a label per pattern.
+
+        Returns:
+        - List[EnergyRecord]: The records of the patterns followed by the overhead record.
+        """
+        pattern_times = {}
+        for pattern_result in result["results"]:
+            label = pattern_result["label"].removeprefix("complexity_")
+            pattern_times[label] = sum(i["compile_ns"] + i["match_ns"] for i in pattern_result["iterations"]) / 1e9
+
+        # The engine's clock and the energy samples can disagree slightly, never attribute more than the window
+        window_time = max(record.time, sum(pattern_times.values()))
+        power = record.energy / window_time if window_time > 0 else 0.0
+
+        records = []
+        for label, pattern_time in pattern_times.items():
+            records.append(EnergyRecord(record.engine, label, record.run, pattern_time, pattern_time * power,
+                                        record.corpus, record.corpus_size_mb, record.outcome))
+        overhead_time = max(0.0, record.total_time - sum(pattern_times.values()))
+        overhead_energy = max(0.0, record.total_energy - sum(r.energy for r in records))
+        records.append(EnergyRecord(record.engine, "overhead", record.run, overhead_time, overhead_energy,
+                                    record.corpus, record.corpus_size_mb, record.outcome))
+        return records
+
+    def matching_window(self, result: dict) -> tuple:
+        """
+        Gets the matching window of a run from the signal times in its result file. A run that timed out
+        has no done signal, its window ends with the measurement. Runs without signal times, or that failed
+        before the engine started, are measured over the whole process.
+
+        Parameters:
+        - result (dict): Structured results of the run.
+
+        Returns:
+        - tuple: (start (float), end (float)) in milliseconds since the epoch, infinite where open.
+        """
+        signals = result.get("signals", {})
+        if "start_ns" not in signals:
+            return -np.inf, np.inf
+        return signals["start_ns"] / 1e6, signals["done_ns"] / 1e6 if "done_ns" in signals else np.inf
+
+    def load_record(self, file_path: str, df: pd.DataFrame = None, result: dict = None) -> EnergyRecord:
+        """
+        Loads the record of one run from its CSV file and the JSON result file next to it.
+        Time and energy are computed over the matching window, see 'matching_window', and over the whole
+        process as the totals. A run without a result file crashed before it could write one, and gets the
+        outcome "failed", unless the results directory is a legacy one, see '__init__'.
+
+        Parameters:
+        - file_path (str): Path to the CSV file of the run.
+        - df (pd.DataFrame, optional): Samples of the run when they have already been read.
+        - result (dict, optional): Structured results of the run when its result file has already been read.
+
+        Returns:
+        - EnergyRecord: The record of the run, batched runs are not split.
         """
-        parts = filename.replace(".csv", "").split("_")
-        engine = f"{parts[1]}"
-        regex_complexity = f"{parts[4]}"
-        run = int(parts[6]) 
-        return engine, regex_complexity, run
+        engine, regex_complexity, run, corpus, corpus_size_mb = self.parse_filename(os.path.basename(file_path))
+
+        # Load the columns that are used into a DataFrame
+        if df is None:
+            df = pd.read_csv(file_path, usecols=['Time', 'PACKAGE_ENERGY (J)'])
+
+        # Compute execution time and energy consumption of the whole process
+        time_start, time_end = df.iloc[0]['Time'], df.iloc[-1]['Time']
+        energy_start, energy_end = df.iloc[0]['PACKAGE_ENERGY (J)'], df.iloc[-1]['PACKAGE_ENERGY (J)']
+
+        total_time = (time_end - time_start) / 1000
+        total_energy = energy_end - energy_start
+
+        # Compute them over the matching window
+        if result is None:
+            result = self.load_result_file(file_path)
+        window_start, window_end = self.matching_window(result)
+        if np.isfinite(window_start):
+            time_diff, energy_diff = self.window_energy(df, window_start, window_end)
+        else:
+            time_diff, energy_diff = total_time, total_energy
+
+        outcome = result.get("outcome", "ok") if result or self.is_legacy() else "failed"
+        return EnergyRecord(engine, regex_complexity, run, time_diff, energy_diff, corpus, corpus_size_mb, outcome,
+                            total_time, total_energy, result.get("process") or None)
 
     def load_results(self) -> List[EnergyRecord]:
         """
-        Loads all benchmark results from CSV files in the results directory to Energy Records.
+        Loads all benchmark results from CSV files in the results directory to Energy Records, see 'load_record'.
+        Runs that timed out are loaded too, with their partial time and energy and the outcome "timeout",
+        and so are runs that failed, with the outcome "failed".
+        Completed batched runs are split per pattern, see 'split_batch'.
         
         Returns:
         - List[EnergyRecord]: A list of EnergyRecord instances containing the parsed results.
         """
+        if self.use_store:
+            runs = self._load_from_store()
+        else:
+            runs = self._load_runs([os.path.join(self.results_dir, file) for file in sorted(os.listdir(self.results_dir)) if file.endswith(".csv")])
+
         records = []
-        for file in os.listdir(self.results_dir):
-            if file.endswith(".csv"):
-                engine, regex_complexity, run = self.parse_filename(file)
-                file_path = os.path.join(self.results_dir, file)
+        for record, result in runs:
+            if record.regex_complexity == "batch" and record.outcome == "ok":
+                records.extend(self.split_batch(record, result))
+            else:
+                records.append(record)
+
+        return records
 
-                # Load CSV file into DataFrame
-                df = pd.read_csv(file_path)
+    def _load_runs(self, file_paths: List[str]) -> List[tuple]:
+        """
+        Loads the records of runs, with the metrics of their full time series, see TimeSeriesAnalysis.
+        Each CSV and JSON result file is read once. The time series are analysed in chunks of 'chunk_size' runs,
+        which bounds the memory of the stacked array.
 
-                # Compute execution time and energy consumption
-                time_start, time_end = df.iloc[0]['Time'], df.iloc[-1]['Time']
-                energy_start, energy_end = df.iloc[0]['PACKAGE_ENERGY (J)'], df.iloc[-1]['PACKAGE_ENERGY (J)']
+        Parameters:
+        - file_paths (List[str]): Paths to the CSV files of the runs.
 
-                time_diff = (time_end - time_start) / 1000
-                energy_diff = energy_end - energy_start
+        Returns:
+        - List[tuple]: (EnergyRecord, structured results (dict)) per run.
+        """
+        runs = []
+        analysis = TimeSeriesAnalysis()
+        for chunk_start in range(0, len(file_paths), self.chunk_size):
+            chunk = []
+            for file_path in file_paths[chunk_start:chunk_start + self.chunk_size]:
+                df = analysis.read_series(file_path)
+                result = self.load_result_file(file_path)
+                chunk.append((df, self.load_record(file_path, df, result), result))
+            metrics = analysis.compute([(df, *self.matching_window(result)) for df, _, result in chunk])
+            for (_, record, result), run_metrics in zip(chunk, metrics):
+                record.metrics = run_metrics
+                runs.append((record, result))
+        return runs
 
-                record = EnergyRecord(engine, regex_complexity, run, time_diff, energy_diff)
-                records.append(record)
+    def _load_from_store(self) -> List[tuple]:
+        """
+        Brings the store up to date with the results directory and loads the runs from it. Runs whose CSV or
+        JSON result file is new or changed since it was stored are parsed, and runs whose CSV file was removed
+        are removed from the store.
 
-        return records
+        Returns:
+        - List[tuple]: (EnergyRecord, structured results (dict or None, only for batched runs)) per run.
+        """
+        store = ResultsStore(self.store_path)
+        try:
+            stored = store.versions()
+            present = set()
+            changed = {}
+            for entry in os.scandir(self.results_dir):
+                if not entry.name.endswith(".csv"):
+                    continue
+                present.add(entry.name)
+                result_path = os.path.splitext(entry.path)[0] + ".json"
+                # A missing result file is stored as None in a legacy directory and as -1 otherwise, so runs are
+                # parsed again with the right outcome when the directory stops being a legacy one
+                version = (entry.stat().st_mtime_ns, os.stat(result_path).st_mtime_ns if os.path.exists(result_path) else None if self.is_legacy() else -1)
+                if stored.get(entry.name) != version:
+                    changed[entry.path] = version
+            for file_path, (record, result) in zip(changed, self._load_runs(list(changed))):
+                store.put(os.path.basename(file_path), *changed[file_path], record, result if record.regex_complexity == "batch" else None)
+            store.remove([file for file in stored if file not in present])
+            store.commit()
+            return store.records()
+        finally:
+            store.close()
@@ -0,0 +1,102 @@
+import json
+import sqlite3
+from analysis.energy_record import EnergyRecord
+from typing import List, Optional
+
+class ResultsStore:
+    """
+    A class for a consolidated store of the records of all runs, in a SQLite database next to the results.
+    Each run is stored once, keyed by the name of its CSV file and the modification times of its CSV and
+    JSON result files, so only new or changed runs need to be parsed again. The metrics of the time series
+    of each run are stored with its record, and the structured results of batched runs are stored too,
+    since they are needed to split them per pattern.
+    """
+
+    # Increased when the table changes, an older store is rebuilt
+    schema_version = 2
+
+    columns = ["file", "csv_mtime_ns", "json_mtime_ns", "engine", "regex_complexity", "run", "corpus", "corpus_size_mb",
+               "outcome", "time", "energy", "total_time", "total_energy", "process", "metrics", "result"]
+
+    def __init__(self, path: str):
+        """
+        Opens the store, creating it when it does not exist.
+
+        Parameters:
+        - path (str): Path of the SQLite database file.
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        if self.connection.execute("PRAGMA user_version").fetchone()[0] != self.schema_version:
+            self.connection.execute("DROP TABLE IF EXISTS runs")
+            self.connection.execute(f"PRAGMA user_version = {self.schema_version}")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS runs (
+                file TEXT PRIMARY KEY, csv_mtime_ns INTEGER, json_mtime_ns INTEGER,
+                engine TEXT, regex_complexity TEXT, run INTEGER, corpus TEXT, corpus_size_mb REAL,
+                outcome TEXT, time REAL, energy REAL, total_time REAL, total_energy REAL,
+                process TEXT, metrics TEXT, result TEXT
+            )""")
+        self.connection.commit()
+
+    def close(self) -> None:
+        """
+        Closes the database connection.
+        """
+        self.connection.close()
+
+    def versions(self) -> dict:
+        """
+        Gets the modification times of the files of every stored run.
+
+        Returns:
+        - dict: (CSV mtime in ns (int), JSON mtime in ns (int or None)) by CSV file name.
+        """
+        return {file: (csv_mtime, json_mtime) for file, csv_mtime, json_mtime in
+                self.connection.execute("SELECT file, csv_mtime_ns, json_mtime_ns FROM runs")}
+
+    def put(self, file: str, csv_mtime_ns: int, json_mtime_ns: Optional[int], record: EnergyRecord, result: Optional[dict] = None) -> None:
+        """
+        Stores or replaces the record of a run. Call 'commit' to save it.
+
+        Parameters:
+        - file (str): Name of the CSV file of the run.
+        - csv_mtime_ns (int): Modification time of the CSV file.
+        - json_mtime_ns (int, optional): Modification time of the JSON result file, None or -1 when there is none.
+        - record (EnergyRecord): Record of the run.
+        - result (dict, optional): Structured results of the run, stored for batched runs.
+        """
+        self.connection.execute(f"INSERT OR REPLACE INTO runs VALUES ({', '.join('?' * len(self.columns))})", (
+            file, csv_mtime_ns, json_mtime_ns, record.engine, record.regex_complexity, record.run, record.corpus,
+            record.corpus_size_mb, record.outcome, float(record.time), float(record.energy), float(record.total_time),
+            float(record.total_energy), json.dumps(record.process) if record.process else None,
+            json.dumps(record.metrics) if record.metrics else None, json.dumps(result) if result is not None else None
+        ))
+
+    def remove(self, files: List[str]) -> None:
+        """
+        Removes the runs of files that no longer exist. Call 'commit' to save it.
+
+        Parameters:
+        - files (List[str]): Names of the CSV files of the runs.
+        """
+        self.connection.executemany("DELETE FROM runs WHERE file = ?", [(file,) for file in files])
+
+    def commit(self) -> None:
+        """
+        Saves the changes to the store.
+        """
+        self.connection.commit()
+
+    def records(self) -> List[tuple]:
+        """
+        Gets the record of every stored run, ordered by file name.
+
+        Returns:
+        - List[tuple]: (EnergyRecord, structured results (dict or None)) per run.
+        """
+        rows = self.connection.execute(
+            "SELECT engine, regex_complexity, run, time, energy, corpus, corpus_size_mb, outcome, total_time, total_energy, process, metrics, result "
+            "FROM runs ORDER BY file")
+        return [(EnergyRecord(*row[:10], *(json.loads(value) if value else None for value in row[10:12])), json.loads(row[12]) if row[12] else None)
+                for row in rows]
@@ -0,0 +1,98 @@
+import os
+import json
+import numpy as np
+from typing import List, Dict, Optional, Tuple
+from scipy.stats import linregress
+from analysis.record_table import RecordTable
+
+class ScalingAnalysis:
+    """
+    A class to fit time and energy against corpus size per regex engine and regex complexity,
+    splitting each engine's cost into a fixed startup cost (intercept) and a marginal cost per MB (slope).
+    """
+
+    def __init__(self, records):
+        """
+        Initializes the ScalingAnalysis.
+
+        Parameters:
+        - records (RecordTable or List): The EnergyRecord objects from corpora of different sizes.
+        """
+        table = RecordTable.of(records)
+        self.table = table.filter(~np.isnan(table["corpus_size_mb"]))
+        self.grouped_data = self._group_by_complexity_and_engine()
+
+    def _group_by_complexity_and_engine(self) -> Dict[Tuple[str, str], Dict[str, List[float]]]:
+        """
+        Groups input records by regex complexity and engine.
+
+        Returns:
+        - Dict[Tuple[str, str], Dict[str, List[float]]]: Grouped corpus size, time and energy data.
+        """
+        return {
+            key: {column: self.table[name][rows].tolist() for column, name in [('size_mb', "corpus_size_mb"), ('time', "time"), ('energy', "energy")]}
+            for key, rows in self.table.group_by("regex_complexity", "engine")
+        }
+
+    def _fit(self, sizes: List[float], values: List[float]) -> Optional[Dict]:
+        """
+        Fits a linear model 'value = fixed_cost + marginal_cost_per_mb * size' with least squares.
+
+        Parameters:
+        - sizes (List[float]): Corpus sizes in MB.
+        - values (List[float]): Measured time or energy for each corpus size.
+
+        Returns:
+        - Dict: Fixed cost, marginal cost per MB, their standard errors and the R^2 of the fit, or None with fewer than two distinct sizes.
+        """
+        if len(set(sizes)) < 2:
+            return None
+
+        fit = linregress(np.array(sizes), np.array(values))
+        return {
+            "fixed_cost": fit.intercept,
+            "fixed_cost_stderr": fit.intercept_stderr,
+            "marginal_cost_per_mb": fit.slope,
+            "marginal_cost_per_mb_stderr": fit.stderr,
+            "r_squared": fit.rvalue ** 2,
+            "sizes_mb": sorted(set(sizes))
+        }
+
+    def fit(self) -> Dict[Tuple[str, str], Dict]:
+        """
+        Fits time and energy against corpus size for every regex complexity and engine.
+
+        Returns:
+        - Dict[Tuple[str, str], Dict]: Fits for time (s) and energy (J), keyed by (regex complexity, engine).
+        """
+        return {
+            key: {
+                "time": self._fit(data['size_mb'], data['time']),
+                "energy": self._fit(data['size_mb'], data['energy'])
+            }
+            for key, data in self.grouped_data.items()
+        }
+
+    def generate(self, output_dir="results/scaling") -> None:
+        """
+        Fits the scaling curves and saves them to a text file per regex complexity.
+
+        Parameters:
+        - output_dir (str): Directory to save the resulting txt files.
+        """
+        # Create the output directory if it does not exist
+        os.makedirs(output_dir, exist_ok=True)
+
+        complexity_groups = {}
+        for (complexity, engine), fits in self.fit().items():
+            complexity_groups.setdefault(complexity, {})[engine] = fits
+
+        for complexity, fits_by_engine in complexity_groups.items():
+            output = []
+            for engine, fits in sorted(fits_by_engine.items()):
+                output.append(f"=== Scaling: {engine} ===")
+                output.append(json.dumps(fits, indent=2))
+                output.append("")
+
+            with open(f"{output_dir}/{complexity}.txt", "w") as f:
+                f.write("\n".join(output))
@@ -1,31 +1,38 @@
 import os
 import json
 import statistics
-from analysis.energy_record import EnergyRecord
+import numpy as np
+from analysis.record_table import RecordTable
 from typing import List, Dict, Tuple
 from scipy.stats import shapiro
 
 class StatisticsGenerator:
     """
-    A class to aggregate and compute statistics for a list of EnergyRecord objects from multiple runs
+    A class to aggregate and compute statistics for a table of EnergyRecord objects from multiple runs
     that groups by engine and regex_complexity and computes statistics (mean, median, std, min, max, 
     25p, 75p, Shapiro-Wilk p-value) for both time and energy, and outliers.
+    Runs that timed out or failed are counted per group as separate outcomes and excluded from the statistics.
+    Where the runs recorded the resource usage of their engine process, its statistics are added too,
+    and so are the statistics of the metrics of their time series, such as the energy per component.
     Saves results to 'stats.txt' file in the specified results directory.
     """
 
-    def __init__(self, records: List[EnergyRecord], results_dir: str = "results", outlier_method: str = "zscore"):
+    def __init__(self, records, results_dir: str = "results", outlier_method: str = "zscore"):
         """
         Parameters:
-        - records (List[EnergyRecord]): A list of EnergyRecord objects with time-energy measurements.
+        - records (RecordTable or List[EnergyRecord]): The records with time-energy measurements.
         - results_dir (str): Directory to save statistics file.
         """
-        self.records = records
+        self.table = RecordTable.of(records)
         self.results_dir = results_dir
         self.outlier_method = outlier_method
 
-    def generate(self) -> None:
+    def generate(self) -> RecordTable:
         """
         Orchestrates the statistics generation and saving to file.
+
+        Returns:
+        - RecordTable: The completed records that are not outliers.
         """
         # Generate file path to save stats
         results_file_path = os.path.join(self.results_dir, "stats.txt")
@@ -33,16 +40,25 @@ class StatisticsGenerator:
         # Group records by engine and regex_complexity
         grouped_records = self._group_records_by_engine_and_complexity()
 
-        valid_records = []
+        table = self.table
+        completed = table.equals("outcome", "ok")
+        valid = np.zeros(len(table), dtype=bool)
 
         # Generate and write stats
         with open(results_file_path, "w", encoding="utf-8") as file:
-            for (engine, complexity), recs in grouped_records.items():
+            for (engine, complexity), rows in grouped_records:
                 file.write(f"=== Engine: {engine} | Complexity: {complexity} ===\n")
 
+                # Count outcomes, only completed runs are part of the statistics
+                outcomes = {"ok": 0, "timeout": 0, "failed": 0}
+                codes, counts = np.unique(table.codes["outcome"][rows], return_counts=True)
+                for code, count in zip(codes, counts):
+                    outcomes[str(table.categories["outcome"][code])] = int(count)
+                rows = rows[completed[rows]]
+
                 # Extract time and energy lists
-                times = [r.time for r in recs]
-                energies = [r.energy for r in recs]
+                times = table.values["time"][rows].tolist()
+                energies = table.values["energy"][rows].tolist()
 
                 if self.outlier_method == "zscore":
                     times_filtered, times_outliers = self.__remove_outliers_zscore(times)
@@ -55,11 +71,20 @@ class StatisticsGenerator:
                 time_stats = self._compute_stats(times_filtered)
                 energy_stats = self._compute_stats(energies_filtered)
 
-                # Build final results structure
+                # Build final results structure, the totals cover the whole measured process including start-up
                 final_results = {
                     "time": time_stats,
-                    "energy": energy_stats
+                    "energy": energy_stats,
+                    "total_time": self._compute_stats(table.values["total_time"][rows].tolist()),
+                    "total_energy": self._compute_stats(table.values["total_energy"][rows].tolist()),
+                    "outcomes": outcomes
                 }
+                process_stats = self._compute_process_stats(rows)
+                if process_stats:
+                    final_results["process"] = process_stats
+                metrics = {name: values[rows][~np.isnan(values[rows])] for name, values in sorted(table.metrics.items())}
+                if any(len(values) for values in metrics.values()):
+                    final_results["metrics"] = {name: self._compute_stats(values.tolist()) for name, values in metrics.items() if len(values)}
 
                 # Write to file
                 file.write(json.dumps(final_results, indent=2))
@@ -67,35 +92,77 @@ class StatisticsGenerator:
                 file.write(f"Outliers for time: {times_outliers}\n")
                 file.write(f"Outliers for energy: {energies_outliers}\n\n")
 
-                # Add valid records
-                valid_records.extend([r for r in recs if r.time in times_filtered and r.energy in energies_filtered])
+                # Mark valid records
+                valid[rows] = np.isin(table.values["time"][rows], times_filtered) & np.isin(table.values["energy"][rows], energies_filtered)
+
+        return table.filter(valid)
+
+    def _compute_process_stats(self, rows: np.ndarray) -> Dict[str, Dict[str, float]]:
+        """
+        Computes stats of the resource usage of the engine processes, for the records that recorded it:
+        peak RSS in MB, user and system CPU time in seconds, CPU utilisation (CPU time per second of the
+        whole process), energy per CPU second, context switches and page faults.
 
-        return valid_records
+        Parameters:
+        - rows (np.ndarray): Indices of the completed records of one group.
+
+        Returns:
+        - Dict[str, Dict[str, float]]: Stats per reported resource, empty when no record has its resource usage.
+        """
+        process = self.table.process
+        if not process:
+            return {}
+        rows = rows[np.any([~np.isnan(values[rows]) for values in process.values()], axis=0)]
+        if not len(rows):
+            return {}
+
+        def values(key, scale=1.0):
+            if key not in process:
+                return []
+            column = process[key][rows] / scale
+            return column[~np.isnan(column)].tolist()
+
+        nan = np.full(len(self.table), np.nan)
+        cpu_times = (process.get("user_cpu_ns", nan)[rows] + process.get("system_cpu_ns", nan)[rows]) / 1e9
+        total_times = self.table.values["total_time"][rows]
+        total_energies = self.table.values["total_energy"][rows]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            utilisation = (cpu_times / total_times)[(total_times > 0) & ~np.isnan(cpu_times)]
+            energy_per_cpu_second = (total_energies / cpu_times)[cpu_times > 0]
+        resources = {
+            "peak_rss_mb": values("peak_rss_bytes", 1024 * 1024),
+            "user_time": values("user_cpu_ns", 1e9),
+            "system_time": values("system_cpu_ns", 1e9),
+            "cpu_utilisation": utilisation.tolist(),
+            "energy_per_cpu_second": energy_per_cpu_second.tolist(),
+            "voluntary_context_switches": values("voluntary_context_switches"),
+            "involuntary_context_switches": values("involuntary_context_switches"),
+            "minor_page_faults": values("minor_page_faults"),
+            "major_page_faults": values("major_page_faults")
+        }
+        # Resources no record of the group reported are left out
+        return {name: self._compute_stats(resource_values) for name, resource_values in resources.items() if resource_values}
 
-    def _group_records_by_engine_and_complexity(self) -> Dict[Tuple[str, str], list]:
+    def _group_records_by_engine_and_complexity(self) -> List[Tuple[Tuple[str, str], np.ndarray]]:
         """
         Groups input records by engine and regex_complexity.
 
         Returns:
-        - Dict[Tuple[str, str], list]: Dictionary of input records grouped by engine and regex complexity.
+        - List[Tuple[Tuple[str, str], np.ndarray]]: Indices of the input records per engine and regex complexity.
         """
-        grouped = {}
-        for record in self.records:
-            key = (record.engine, record.regex_complexity)
-            grouped.setdefault(key, []).append(record)
-        return grouped        
+        return self.table.group_by("engine", "regex_complexity")
 
-    def _compute_stats(self, values: List[float]) -> Tuple[Dict[str, float], int]:
+    def _compute_stats(self, values: List[float]) -> Dict[str, float]:
         """
-        Computes stats and outlier counts for a given list of values.
+        Computes stats for a given list of values.
 
         Parameters:
         - values (List[float]): A list of numerical values (time or energy).
         Returns:
-        - Tuple[Dict[str, float], int]: Tuple with dictionary containing computed stats and count of outliers
+        - Dict[str, float]: Dictionary containing computed stats, all None when there are no values
         """
         if not values:
-            return ({
+            return {
                 "shapiro-pvalue": None,
                 "mean": None,
                 "median": None,
@@ -104,7 +171,7 @@ class StatisticsGenerator:
                 "max": None,
                 "25p": None,
                 "75p": None
-            }, 0)
+            }
 
         # Compute stats
         mean_val = statistics.mean(values)
@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+from typing import List, Tuple
+
+class TimeSeriesAnalysis:
+    """
+    A class for computing metrics of the full time series of many runs in one vectorised pass.
+    The samples of all runs are stacked into one NumPy array, and every metric is reduced per run over the
+    run's matching window: the energy of each component ("PACKAGE_ENERGY (J)", "DRAM_ENERGY (J)",
+    "PP0_ENERGY (J)", ...), the average and peak package power, the average CPU frequency and the average
+    CPU utilisation. Like 'ResultsLoader.window_energy', the window is clipped to the run's samples and the
+    cumulative energy counters are linearly interpolated at both of its ends, so the package energy matches
+    the energy of the run's record. The peak power and the averages use the samples that bracket the window,
+    so a window shorter than the sampling interval still gets the values of the interval it falls in.
+    """
+
+    energy_suffix = "_ENERGY (J)"
+    frequency_prefix = "CPU_FREQUENCY_"
+    usage_prefix = "CPU_USAGE_"
+
+    @classmethod
+    def is_used_column(cls, column: str) -> bool:
+        """
+        Checks if a CSV column is used by the analysis.
+        """
+        return column == "Time" or column.endswith(cls.energy_suffix) or column.startswith((cls.frequency_prefix, cls.usage_prefix))
+
+    @classmethod
+    def read_series(cls, csv_path: str) -> pd.DataFrame:
+        """
+        Reads the columns of a run's CSV file that are used by the analysis.
+
+        Parameters:
+        - csv_path (str): Path to the CSV file of the run.
+
+        Returns:
+        - pd.DataFrame: The time series of the run.
+        """
+        return pd.read_csv(csv_path, usecols=cls.is_used_column)
+
+    @staticmethod
+    def metric_name(column: str) -> str:
+        """
+        Gets the metric name of an energy column, e.g. "dram_energy" for "DRAM_ENERGY (J)".
+        """
+        return column.removesuffix(" (J)").lower()
+
+    def compute(self, runs: List[Tuple[pd.DataFrame, float, float]]) -> List[dict]:
+        """
+        Computes the metrics of many runs at once.
+
+        Parameters:
+        - runs (List[Tuple[pd.DataFrame, float, float]]): Per run its time series, see 'read_series', and the start
+          and end of its matching window in milliseconds since the epoch (infinite for the whole run).
+
+        Returns:
+        - List[dict]: Per run its metrics by name, energies in J, powers in W, the frequency in MHz and the
+          utilisation in %. Metrics the run has no samples for are left out.
+        """
+        if not runs:
+            return []
+
+        # Stack all samples into one array with the union of the columns, missing columns are NaN
+        columns = sorted({column for df, _, _ in runs for column in df.columns} - {"Time"})
+        columns = ["Time"] + columns
+        data = np.concatenate([df.reindex(columns=columns).to_numpy(dtype=float) for df, _, _ in runs])
+        lengths = np.array([len(df) for df, _, _ in runs])
+        run = np.repeat(np.arange(len(runs)), lengths)
+        time = data[:, 0]
+
+        # Window of each run clipped to its samples
+        offsets = np.r_[0, np.cumsum(lengths)[:-1]]
+        last_sample = offsets + lengths - 1
+        starts = np.clip([start for _, start, _ in runs], time[offsets], time[last_sample])
+        ends = np.clip([end for _, _, end in runs], time[offsets], time[last_sample])
+        durations = (ends - starts) / 1000
+
+        # Last sample at or before the start and first sample at or after the end of each window
+        before = offsets + np.maximum(np.bincount(run, weights=time <= starts[run], minlength=len(runs)).astype(int) - 1, 0)
+        after = offsets + np.minimum(np.bincount(run, weights=time < ends[run], minlength=len(runs)).astype(int), lengths - 1)
+        index = np.arange(len(time))
+        in_window = (index >= before[run]) & (index <= after[run])
+
+        metrics = {}
+        energy_columns = [i for i, column in enumerate(columns) if column.endswith(self.energy_suffix)]
+        if energy_columns:
+            energies = data[:, energy_columns]
+            start_energies = self._interpolate(energies, time, before, np.minimum(before + 1, last_sample), starts)
+            end_energies = self._interpolate(energies, time, np.maximum(after - 1, offsets), after, ends)
+            for j, i in enumerate(energy_columns):
+                metrics[self.metric_name(columns[i])] = end_energies[:, j] - start_energies[:, j]
+
+        if "PACKAGE_ENERGY (J)" in columns:
+            package = columns.index("PACKAGE_ENERGY (J)")
+            with np.errstate(divide="ignore", invalid="ignore"):
+                metrics["average_power"] = np.where(durations > 0, metrics["package_energy"] / durations, np.nan)
+                # Power between consecutive samples of the same window
+                intervals = np.diff(time) / 1000
+                powers = np.diff(data[:, package]) / intervals
+            consecutive = (run[1:] == run[:-1]) & in_window[1:] & in_window[:-1] & (intervals > 0) & ~np.isnan(powers)
+            peak = np.full(len(runs), -np.inf)
+            np.maximum.at(peak, run[1:][consecutive], powers[consecutive])
+            metrics["peak_power"] = np.where(np.isinf(peak), np.nan, peak)
+
+        for prefix, name in [(self.frequency_prefix, "average_frequency"), (self.usage_prefix, "cpu_utilisation")]:
+            indices = [i for i, column in enumerate(columns) if column.startswith(prefix)]
+            if indices:
+                metrics[name] = self._window_mean(data[:, indices], run, in_window, len(runs))
+
+        return [{name: float(values[i]) for name, values in metrics.items() if not np.isnan(values[i])} for i in range(len(runs))]
+
+    @staticmethod
+    def _interpolate(values: np.ndarray, time: np.ndarray, lower: np.ndarray, upper: np.ndarray, at: np.ndarray) -> np.ndarray:
+        """
+        Linearly interpolates the values of every run at a time between two of its samples.
+
+        Parameters:
+        - values (np.ndarray): The values of all samples, one column per quantity.
+        - time (np.ndarray): The time of all samples.
+        - lower (np.ndarray): Per run the index of the sample at or before its time.
+        - upper (np.ndarray): Per run the index of the sample at or after its time.
+        - at (np.ndarray): Per run the time to interpolate at.
+
+        Returns:
+        - np.ndarray: The interpolated values, one row per run.
+        """
+        spans = time[upper] - time[lower]
+        weights = np.divide(at - time[lower], spans, out=np.zeros(len(at)), where=spans > 0)
+        return values[lower] + weights[:, None] * (values[upper] - values[lower])
+
+    @staticmethod
+    def _window_mean(values: np.ndarray, run: np.ndarray, in_window: np.ndarray, runs: int) -> np.ndarray:
+        """
+        Computes the mean over the cores of each sample, and then over the samples in the window of each run.
+
+        Returns:
+        - np.ndarray: The mean per run, NaN for runs without values.
+        """
+        known = ~np.isnan(values)
+        cores = known.sum(axis=1)
+        sample_means = np.divide(np.where(known, values, 0).sum(axis=1), cores, out=np.full(len(values), np.nan), where=cores > 0)
+        valid = in_window & ~np.isnan(sample_means)
+        totals = np.bincount(run[valid], weights=sample_means[valid], minlength=runs)
+        counts = np.bincount(run[valid], minlength=runs)
+        return np.divide(totals, counts, out=np.full(runs, np.nan), where=counts > 0)
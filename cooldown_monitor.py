@@ -0,0 +1,177 @@
+import collections
+import glob
+import os
+import statistics
+import time
+import numpy as np
+from rapl_executor import RaplExecutor
+
+class CooldownMonitor:
+    """
+    Class to rest between runs until the machine is back at its idle state, instead of for a fixed time.
+
+    The monitor samples the package power from the RAPL counters and, where thermal zones are available,
+    the CPU temperature. Before the experiment it records an idle baseline. Between runs it waits until the
+    mean of a rolling window of samples has settled within a tolerance of that baseline, or until the fixed
+    rest duration has passed, whichever comes first. Where the RAPL counters cannot be read, such as on
+    Windows, the monitor is not available and the experiment rests for the fixed duration.
+    """
+
+    def __init__(self, powercap_root="/sys/class/powercap", thermal_root="/sys/class/thermal", interval=0.5, window=10, power_tolerance=0.05, temperature_tolerance=2.0):
+        """
+        Initializes the monitor with its sources and the settling criterion.
+
+        Parameters:
+        - powercap_root (str): Directory of the powercap framework, see RaplExecutor.
+        - thermal_root (str): Directory of the thermal zones, temperatures are left out when it has none.
+        - interval (float): Seconds between two samples.
+        - window (int): Number of samples of the rolling window.
+        - power_tolerance (float): Fraction the mean power of the window may be above the idle baseline.
+        - temperature_tolerance (float): Degrees Celsius the mean temperature of the window may be above the idle baseline.
+        """
+        self.powercap_root = powercap_root
+        self.thermal_root = thermal_root
+        self.interval = interval
+        self.window = window
+        self.power_tolerance = power_tolerance
+        self.temperature_tolerance = temperature_tolerance
+        self.baseline_power = None
+        self.baseline_temperature = None
+
+    def available(self):
+        """
+        Check if the package power can be read.
+
+        Returns:
+        - bool: True when the RAPL package counters exist and are readable.
+        """
+        try:
+            domains = RaplExecutor(powercap_root=self.powercap_root).find_domains()["PACKAGE_ENERGY (J)"]
+            for domain in domains:
+                with open(domain.energy_path, "r") as f:
+                    f.read()
+        except (RuntimeError, OSError):
+            return False
+        return True
+
+    def find_temperature_files(self):
+        """
+        Finds the temperature files of the CPU packages, or of all thermal zones when none is a CPU package.
+
+        Returns:
+        - list[str]: Paths of the 'temp' files, which hold the temperature in millidegrees Celsius.
+        """
+        packages, zones = [], []
+        for zone in sorted(glob.glob(os.path.join(self.thermal_root, "thermal_zone*"))):
+            try:
+                with open(os.path.join(zone, "type"), "r") as f:
+                    zone_type = f.read().strip()
+            except OSError:
+                continue
+            path = os.path.join(zone, "temp")
+            zones.append(path)
+            if zone_type == "x86_pkg_temp":
+                packages.append(path)
+        return packages or zones
+
+    def _read_temperature(self, paths):
+        """
+        Read the highest temperature in degrees Celsius, or None without thermal zones.
+        """
+        temperatures = []
+        for path in paths:
+            try:
+                with open(path, "r") as f:
+                    temperatures.append(int(f.read()) / 1000)
+            except (OSError, ValueError):
+                continue
+        return max(temperatures) if temperatures else None
+
+    def samples(self):
+        """
+        Sample the package power and temperature every interval, without end.
+
+        Yields:
+        - tuple: (package power in Watts (float), temperature in degrees Celsius (float or None))
+        """
+        domains = RaplExecutor(powercap_root=self.powercap_root).find_domains()["PACKAGE_ENERGY (J)"]
+        temperature_files = self.find_temperature_files()
+
+        def read_energy():
+            readings = []
+            for domain in domains:
+                with open(domain.energy_path, "r") as f:
+                    readings.append(int(f.read()))
+            return time.monotonic(), readings
+
+        previous_time, previous = read_energy()
+        while True:
+            time.sleep(self.interval)
+            now, current = read_energy()
+            joules = sum(domain.joules(np.array([before, after]))[-1] for domain, before, after in zip(domains, previous, current))
+            yield joules / (now - previous_time), self._read_temperature(temperature_files)
+            previous_time, previous = now, current
+
+    def record_baseline(self, duration=30):
+        """
+        Record the idle power and temperature of the machine, as the mean over a duration.
+
+        Parameters:
+        - duration (float): Seconds to sample the idle machine for.
+        """
+        powers, temperatures = [], []
+        for power, temperature in self.samples():
+            powers.append(power)
+            if temperature is not None:
+                temperatures.append(temperature)
+            if len(powers) * self.interval >= duration:
+                break
+        self.baseline_power = statistics.mean(powers)
+        self.baseline_temperature = statistics.mean(temperatures) if temperatures else None
+        temperature = f", {self.baseline_temperature:.1f} °C" if self.baseline_temperature is not None else ""
+        print(f"Idle baseline: {self.baseline_power:.2f} W{temperature}.")
+
+    def settled(self, powers, temperatures):
+        """
+        Check if a full window of samples has settled within the tolerances of the idle baseline.
+
+        Parameters:
+        - powers (collections.deque): Package power of the window in Watts.
+        - temperatures (collections.deque): Temperatures of the window in degrees Celsius, None where unknown.
+
+        Returns:
+        - bool: True when the window is full and its mean power, and temperature where known, are close to the baseline.
+        """
+        if len(powers) < self.window:
+            return False
+        if statistics.mean(powers) > self.baseline_power * (1 + self.power_tolerance):
+            return False
+        known = [t for t in temperatures if t is not None]
+        if self.baseline_temperature is not None and known:
+            return statistics.mean(known) <= self.baseline_temperature + self.temperature_tolerance
+        return True
+
+    def wait(self, max_duration):
+        """
+        Rest until the machine has settled at its idle baseline, see 'settled', or for at most a duration.
+
+        Parameters:
+        - max_duration (float): Longest rest in seconds.
+
+        Returns:
+        - tuple: (seconds rested (float), whether the machine settled (bool))
+        """
+        if max_duration <= 0:
+            return 0.0, False
+        start = time.monotonic()
+        powers = collections.deque(maxlen=self.window)
+        temperatures = collections.deque(maxlen=self.window)
+        for power, temperature in self.samples():
+            powers.append(power)
+            temperatures.append(temperature)
+            elapsed = time.monotonic() - start
+            if self.settled(powers, temperatures):
+                return elapsed, True
+            if elapsed + self.interval > max_duration:
+                time.sleep(max(0.0, max_duration - elapsed))
+                return max_duration, False
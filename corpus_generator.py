@@ -1,5 +1,7 @@
+import argparse
 import requests
 import os
+import time
 
 class CorpusGenerator:
     """
@@ -8,32 +10,37 @@ class CorpusGenerator:
     Attributes:
         urls (dictionary): Dictionary of URLs with the size as key and the URL as value.
         output_dir (str): Directory where the .txt files will be saved.
+        target_size (int): Size in bytes each generated corpus file should reach.
+        block_size (int): Size in bytes of the blocks written to disk at a time.
     """
 
-    def __init__(self, output_dir='data'):
+    def __init__(self, output_dir='data', target_size=100 * 1024 * 1024, block_size=4 * 1024 * 1024):
         """
         Initialises the CorpusGenerator.
 
         Args:
             output_dir (str): Directory where the .txt file will be saved.
+            target_size (int): Size in bytes each generated corpus file should reach.
+            block_size (int): Size in bytes of the blocks written to disk at a time.
         """
         self.urls = {
             # Include the raw URL of the Python file to fetch
             'corpus.txt' : 'https://raw.githubusercontent.com/numpy/numpy/refs/heads/main/numpy/_core/tests/test_multiarray.py'
         }
         self.output_dir = output_dir
+        self.target_size = target_size
+        self.block_size = block_size
         # Create the directory if it does not exist
         os.makedirs(output_dir, exist_ok=True)
 
     def generate_corpus_files(self):
         """
-        Fetches the code from each URL and saves it as a .txt file.
+        Fetches the code from each URL and streams it, amplified, to a .txt file.
         """
         for file_name in self.urls.keys():
             code = self.fetch_url(self.urls[file_name])
-            amplified_code = self.amplify_code(code)
-            if amplified_code:
-                self.save_to_file(file_name, amplified_code)
+            if code:
+                self.stream_to_file(file_name, code)
 
     def fetch_url(self, url):
         """
@@ -55,36 +62,139 @@ class CorpusGenerator:
         except Exception as e:
             print(f"Error fetching {url}: {e}")
             return None
-        
-    def amplify_code(self, code):
+
+    def stream_to_file(self, file_name, code, target_size=None):
         """
-        Amplifies the code by repeating it multiple times until the file reaches a size of 100MB.
+        Amplifies the code by writing whole copies of it to a file in the output directory
+        until the file reaches the target size. The copies are grouped into blocks of roughly
+        'block_size' bytes, so memory use stays constant regardless of the target size.
 
         Args:
+            file_name (str): The name of the file.
             code (str): The code to amplify.
+            target_size (int, optional): Size in bytes the file should reach. Defaults to 'self.target_size'.
 
         Returns:
-            str: The amplified code.
+            dict: The file path, number of bytes written, elapsed seconds and throughput in MB/s.
         """
-        target_size = 100 * 1024 * 1024
-        amplified_code = code
-        while len(amplified_code) < target_size:
-            amplified_code += code
-        return amplified_code
+        target_size = self.target_size if target_size is None else target_size
+        chunk = code.encode('utf-8')
+        if not chunk:
+            raise ValueError("Cannot amplify empty code.")
+
+        # Number of whole copies needed to reach the target size, and copies per block
+        copies = max(1, -(-target_size // len(chunk)))
+        copies_per_block = max(1, self.block_size // len(chunk))
+        block = chunk * min(copies, copies_per_block)
+
+        file_path = os.path.join(self.output_dir, file_name)
+        start_time = time.perf_counter()
+        with open(file_path, 'wb') as f:
+            full_blocks, remainder = divmod(copies, copies_per_block)
+            for _ in range(full_blocks):
+                f.write(block)
+            if remainder:
+                f.write(chunk * remainder)
+        elapsed = time.perf_counter() - start_time
+
+        return self._report(file_path, copies * len(chunk), elapsed)
 
-    def save_to_file(self, file_name, content):
+    def slice_corpus(self, source_path, file_name, target_size):
         """
-        Saves the content to a file in the output directory.
+        Creates a corpus of at most 'target_size' bytes from an existing corpus file. The source
+        is copied block by block, wrapping around when it is smaller than the target, and the
+        result is cut at the last line boundary so that no line is truncated.
+
+        Raises:
+            ValueError: When the source is empty, or the target is smaller than its first line.
 
         Args:
+            source_path (str): Path of the corpus file to slice.
             file_name (str): The name of the file.
-            content (str): The content to save.
+            target_size (int): Maximum size in bytes of the sliced corpus.
+
+        Returns:
+            dict: The file path, number of bytes written, elapsed seconds and throughput in MB/s.
         """
+        if os.path.getsize(source_path) == 0:
+            raise ValueError(f"Cannot slice empty corpus '{source_path}'.")
+
         file_path = os.path.join(self.output_dir, file_name)
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
-        print(f"Saved {file_path}")
+        written = 0
+        # Offset just after the last complete line written so far
+        line_end = 0
+        start_time = time.perf_counter()
+        with open(source_path, 'rb') as src, open(file_path, 'wb') as dst:
+            while written < target_size:
+                block = src.read(min(self.block_size, target_size - written))
+                if not block:
+                    # Wrap around, making sure the last line of the source stays a separate line
+                    src.seek(0)
+                    if line_end == written:
+                        continue
+                    block = b'\n'
+                if written + len(block) >= target_size:
+                    # Cut the final block at its last line boundary
+                    cut = block.rfind(b'\n') + 1
+                    if cut:
+                        dst.write(block[:cut])
+                        written += cut
+                    elif line_end:
+                        dst.truncate(line_end)
+                        written = line_end
+                    else:
+                        # Not even the first line fits, it cannot be written without truncating it
+                        dst.close()
+                        os.remove(file_path)
+                        raise ValueError(f"Target size {target_size} is smaller than the first line of '{source_path}'.")
+                    break
+                dst.write(block)
+                written += len(block)
+                if block.rfind(b'\n') >= 0:
+                    line_end = written - len(block) + block.rfind(b'\n') + 1
+        elapsed = time.perf_counter() - start_time
+
+        return self._report(file_path, written, elapsed)
+
+    @staticmethod
+    def _report(file_path, bytes_written, elapsed, content=None):
+        """
+        Prints and returns the write throughput of a generated file.
+
+        Args:
+            file_path (str): Path of the generated file.
+            bytes_written (int): Number of bytes written to the file.
+            elapsed (float): Seconds spent writing the file.
+            content (str, optional): Kind of content written, included in the message.
+
+        Returns:
+            dict: The file path, number of bytes written, elapsed seconds and throughput in MB/s.
+        """
+        size_mb = bytes_written / (1024 * 1024)
+        throughput = size_mb / elapsed if elapsed > 0 else float('inf')
+        of_content = f" of '{content}'" if content else ""
+        print(f"Saved {file_path} ({size_mb:.1f} MB{of_content} in {elapsed:.2f}s, {throughput:.1f} MB/s)")
+        return {
+            'path': file_path,
+            'bytes': bytes_written,
+            'seconds': elapsed,
+            'throughput_mb_s': throughput
+        }
 
 if __name__ == '__main__':
-    corpus_generator = CorpusGenerator()
-    corpus_generator.generate_corpus_files()
\ No newline at end of file
+    # Imported here, the synthetic generator reports its throughput through this module
+    from synthetic_corpus_generator import SyntheticCorpusGenerator, DOMAINS
+
+    parser = argparse.ArgumentParser(description="Generate the corpus files used by the experiment.")
+    parser.add_argument("--size-mb", type=int, default=100, help="Target size of each corpus file in MB.")
+    parser.add_argument("--synthetic", choices=DOMAINS, help="Generate an offline, seeded synthetic corpus of this domain instead of downloading one.")
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the synthetic corpus.")
+    parser.add_argument("--workers", type=int, default=None, help="Number of processes generating the synthetic corpus.")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        synthetic_generator = SyntheticCorpusGenerator(seed=args.seed, workers=args.workers)
+        synthetic_generator.generate('corpus.txt', args.size_mb * 1024 * 1024, domain=args.synthetic)
+    else:
+        corpus_generator = CorpusGenerator(target_size=args.size_mb * 1024 * 1024)
+        corpus_generator.generate_corpus_files()
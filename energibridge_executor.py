@@ -1,10 +1,11 @@
 import os
-import subprocess
 from dotenv import load_dotenv
+from measurement_backend import MeasurementBackend
 
-class EnergibridgeExecutor:
+class EnergibridgeExecutor(MeasurementBackend):
     """
     A class to handle the execution of EnergiBridge commands for energy measurements.
+    EnergiBridge reads the RAPL counters through a kernel driver that is installed as a Windows service.
     """
     def __init__(self):
         """
@@ -19,25 +20,6 @@ class EnergibridgeExecutor:
         load_dotenv()
         self.driver_path = os.getenv("ENERGIBRIDGE_DRIVER_PATH")
     
-    def _run_command(self, command):
-        """
-        Executes a command in the system shell.
-        
-        Parameters:
-        - command (str): The command to execute.
-        
-        Returns:
-        - str: Output of the command execution.
-        """
-        try:
-            result = subprocess.run(command, shell=True, check=True, capture_output=True, text=True)
-            print(result.stdout.strip())
-            print(result.stderr.strip())
-            return result.stdout.strip()
-        except subprocess.CalledProcessError as e:
-            print(f"Error executing command: {command}\n{e.stderr}")
-            return None
-
     def start_service(self):
         """
         Starts the EnergiBridge service by creating and starting the RAPL driver.
@@ -54,27 +36,19 @@ class EnergibridgeExecutor:
         self._run_command(f'sc.exe stop {self.rapl_service}')
         self._run_command(f'sc.exe delete {self.rapl_service}')
 
-    def prepare_task(self, corpus, engine, pattern):
-        """
-        Prepares the regex matching task by running a setup command.
-        
-        Parameters:
-        - corpus (str): Path to the text corpus file.
-        - engine (str): Regex engine to use for matching.
-        - pattern (str): Regex pattern to be matched.
-        """
-        self._run_command(f'python regex_matching.py --corpus "{corpus}" --engine "{engine}" --pattern "{pattern}" --setup')
-
-    def run_measurement(self, corpus, engine, pattern, output_file="results/results.csv"):
+    def run_measurement(self, corpus, engine, pattern, output_file="results/results.csv", **options):
         """
         Runs EnergiBridge measurement and stores the results in the specified output file.
+        The structured results of the engine, with its phase timings, are stored next to it as a JSON file.
         
         Parameters:
         - corpus (str): Path to the text corpus file.
         - engine (str): Regex engine to use for matching.
         - pattern (str): Regex pattern to be matched.
         - output_file (str, optional): Path where measurement results will be stored. Default is "results/results.csv".
+        - options: Extra options of the task, such as 'workers', 'iterations', 'warmup', the run budgets and 'pattern_catalogue'.
         """
         print(f"Running measurement...")
-        self._run_command(f'{self.energibridge_exe} -o {output_file} --summary python regex_matching.py --corpus "{corpus}" --engine "{engine}" --pattern "{pattern}" --match')
+        result_file = os.path.splitext(output_file)[0] + ".json"
+        self._run_command(f'{self.energibridge_exe} -o {output_file} --summary {self._regex_matching_command(corpus, engine, pattern, "match", result_file=result_file, **options)}')
         print("Measurement complete.")
@@ -1,27 +1,64 @@
 import os
+import json
 import time
 import random
 from energibridge_executor import EnergibridgeExecutor
+from rapl_executor import RaplExecutor
+from cooldown_monitor import CooldownMonitor
+from adaptive_scheduler import AdaptiveScheduler
+from analysis.results_loader import ResultsLoader
+from experiment_journal import ExperimentJournal
+from corpus_generator import CorpusGenerator
+from synthetic_corpus_generator import SyntheticCorpusGenerator
 
 # Define the engines, file sizes, and regex patterns to be used in the experiment
 engines = ["engine_dotnet", "engine_java", "engine_js", "engine_cpp"]
 file_sizes = ["corpus"]
+sweep_sizes_mb = [1, 4, 16, 64, 256, 1024]
 regex_complexities = {"complexity_low": r"def", "complexity_medium": r"\bclass\s+\w+", "complexity_high": r"(?<=def\s)\w+(?=\()"}
 
+# Energy measurement backends by name
+measurement_backends = {"energibridge": EnergibridgeExecutor, "rapl": RaplExecutor}
+
 class EnergyExperiment:
     """
     A class for running controlled performance measurement experiments on a system.
     The experiment includes a warm-up phase, task execution, and rest periods between runs.
     """
 
-    def __init__(self, num_runs=30, warmup_duration=300, rest_duration=60, engines=engines, file_sizes=file_sizes, regex_complexities=regex_complexities):
+    def __init__(self, num_runs=30, warmup_duration=300, rest_duration=60, engines=engines, file_sizes=file_sizes, regex_complexities=regex_complexities, sweep_sizes_mb=None, source_corpus="data/corpus.txt", worker_counts=None, iterations=1, warmup_iterations=0, time_budget=600, cpu_budget=None, batch_patterns=False, match_mode="count", backend="energibridge", sample_rate=1000, adaptive_rest=True, adaptive_runs=False, min_runs=10, target_ci_width=0.05, resume=False, journal_path="results/journal.jsonl"):
         """
         Initializes the experiment with the necessary parameters.
 
         Parameters:
-        - num_runs (int): Number of times each task should be executed.
+        - num_runs (int): Number of times each task should be executed, or the largest number with 'adaptive_runs'.
         - warmup_duration (int): Warm-up period (in seconds) before measurements.
         - rest_duration (int): Rest period (in seconds) between runs.
+        - sweep_sizes_mb (list[int], optional): Corpus sizes (in MB) to sweep over. When set, a corpus
+          of each size is sliced from 'source_corpus' and replaces 'file_sizes'.
+        - source_corpus (str): Corpus the size sweep slices from. A synthetic corpus is generated when it does not exist.
+        - worker_counts (list[int], optional): Numbers of worker processes to run the parallel Python engine with.
+          Each number becomes a separate engine, named "engine_python_parallel_w<workers>".
+        - iterations (int): Number of measured iterations of the pattern within each engine process.
+        - warmup_iterations (int): Number of warm-up iterations within each engine process, before the measured ones.
+          Per-iteration timings are stored next to each measurement.
+        - time_budget (float, optional): Wall-clock seconds each run may take. A run that exceeds it is stopped and recorded as a timeout.
+        - cpu_budget (float, optional): CPU seconds each run may use. A run that exceeds it is stopped and recorded as a timeout.
+        - batch_patterns (bool): Run all regex complexities as one batched task per engine and corpus, named
+          "..._complexity_batch", instead of one task per complexity. The runtime start-up and corpus load are
+          then paid once per run and reported separately from the patterns.
+        - match_mode (str): "count" to count matches one at a time, "collect" to build the runtime's collection
+          of all matches, which also measures its allocations. The peak memory of each run is stored with its results.
+        - backend (str): Energy measurement backend, "energibridge" on Windows or "rapl" to read the Linux powercap counters.
+        - sample_rate (float): Samples per second the "rapl" backend takes of the energy counters, CPU frequencies and memory.
+        - adaptive_rest (bool): Rest between runs until the package power and temperature are back at their idle baseline,
+          with 'rest_duration' as the longest rest, see CooldownMonitor. Falls back to the fixed rest where the RAPL counters cannot be read.
+        - adaptive_runs (bool): Run each task between 'min_runs' and 'num_runs' times, giving the runs to the tasks whose
+          confidence intervals of energy and time are widest, until all are narrower than 'target_ci_width', see AdaptiveScheduler.
+        - min_runs (int): Number of runs of each task before its confidence intervals are considered, with 'adaptive_runs'.
+        - target_ci_width (float): Target width of the 95% confidence intervals relative to their mean, with 'adaptive_runs'.
+        - resume (bool): Resume the experiment of the journal, skipping its completed runs and re-running interrupted ones.
+        - journal_path (str): Path of the journal of the seeded plan and the state of each run, see ExperimentJournal.
         """
         self.num_runs = num_runs
         self.warmup_duration = warmup_duration
@@ -29,8 +66,30 @@ class EnergyExperiment:
         self.engines = engines
         self.file_sizes = file_sizes
         self.regex_complexities = regex_complexities
+        self.sweep_sizes_mb = sweep_sizes_mb
+        self.source_corpus = source_corpus
+        self.worker_counts = worker_counts or []
+        self.iterations = iterations
+        self.warmup_iterations = warmup_iterations
+        self.time_budget = time_budget
+        self.cpu_budget = cpu_budget
+        self.batch_patterns = batch_patterns
+        self.match_mode = match_mode
+        self.adaptive_rest = adaptive_rest
+        self.adaptive_runs = adaptive_runs
+        self.min_runs = min_runs
+        self.target_ci_width = target_ci_width
+        self.resume = resume
+        self.journal = ExperimentJournal(journal_path)
 
-        self.energibridge = EnergibridgeExecutor()
+        if backend not in measurement_backends:
+            raise ValueError(f"Unknown measurement backend: {backend}")
+        if backend == "rapl":
+            # The ring buffer holds a whole run, which the time budget bounds
+            buffer_seconds = (time_budget or 900) + 60
+            self.measurement_backend = RaplExecutor(interval_ms=1000 / sample_rate, buffer_seconds=buffer_seconds)
+        else:
+            self.measurement_backend = measurement_backends[backend]()
 
         # Dictionary of tasks for experiment
         self.tasks = {}
@@ -44,58 +103,286 @@ class EnergyExperiment:
         if not os.path.exists("tasks"):
             os.makedirs("tasks")
 
+        # Engine variants as (task engine name, engine, task options)
+        engine_variants = [(engine, engine, {}) for engine in self.engines]
+        engine_variants += [(f"engine_python_parallel_w{workers}", "engine_python_parallel", {"workers": workers}) for workers in self.worker_counts]
+
+        # Iterations within the engine process and the run budgets apply to every engine
+        run_options = {}
+        if self.iterations != 1 or self.warmup_iterations:
+            run_options = {"iterations": self.iterations, "warmup": self.warmup_iterations}
+        if self.time_budget is not None:
+            run_options["time_budget"] = self.time_budget
+        if self.cpu_budget is not None:
+            run_options["cpu_budget"] = self.cpu_budget
+        if self.match_mode != "count":
+            run_options["match_mode"] = self.match_mode
+
+        # Batched tasks match every regex complexity in one engine process, from a shared pattern catalogue
+        if self.batch_patterns:
+            pattern_catalogue = os.path.join("tasks", "pattern_catalogue.json")
+            with open(pattern_catalogue, "w", encoding="utf-8") as f:
+                json.dump(self.regex_complexities, f, indent=2)
+            for task_engine, engine, options in engine_variants:
+                for file_size in self.file_sizes:
+                    task_name = f"{task_engine}_{file_size}_complexity_batch"
+                    self.tasks[task_name] = (f"data/{file_size}.txt", engine, None, {**options, **run_options, "pattern_catalogue": pattern_catalogue})
+            return
+
         # Create tasks for each combination of engine, file size, and regex complexity
-        for engine in self.engines:
+        for task_engine, engine, options in engine_variants:
             for file_size in self.file_sizes:
                 for regex_complexity, pattern in self.regex_complexities.items():
-                    task_name = f"{engine}_{file_size}_{regex_complexity}"
+                    task_name = f"{task_engine}_{file_size}_{regex_complexity}"
 
                     # Store task in list
-                    self.tasks[task_name] = (f"data/{file_size}.txt", engine, rf"{pattern}")
+                    self.tasks[task_name] = (f"data/{file_size}.txt", engine, rf"{pattern}", {**options, **run_options})
+
+    def prepare_size_sweep(self):
+        """
+        Creates a corpus for each size of the sweep, named 'data/corpus_<size>mb.txt', and uses them as
+        the file sizes of the experiment. Corpora are sliced from the source corpus, or generated
+        synthetically when it does not exist. Existing corpora newer than their source are reused.
+        """
+        corpus_generator = CorpusGenerator()
+        synthetic_generator = SyntheticCorpusGenerator()
+        source_exists = os.path.exists(self.source_corpus)
+
+        self.file_sizes = []
+        for size_mb in self.sweep_sizes_mb:
+            file_size = f"corpus_{size_mb}mb"
+            file_path = f"data/{file_size}.txt"
+            self.file_sizes.append(file_size)
+
+            if os.path.exists(file_path) and (not source_exists or os.path.getmtime(file_path) >= os.path.getmtime(self.source_corpus)):
+                continue
+
+            if source_exists:
+                corpus_generator.slice_corpus(self.source_corpus, f"{file_size}.txt", size_mb * 1024 * 1024)
+            else:
+                synthetic_generator.generate(f"{file_size}.txt", size_mb * 1024 * 1024, domain="python")
 
     def run_experiment(self):
         """
         Orchestrates and runs the experiment sequence:
         1. Warns the user and prepares the environment.
         2. Warms up the CPU by running Fibonacci calculations.
-        3. Runs each task multiple times in a shuffled order with rest intervals.
+        3. Runs each task multiple times in a shuffled order with rest intervals, or as many times as its
+           confidence intervals need with 'adaptive_runs'.
+        The seeded order and the state of every run are kept in a journal, so the experiment can be resumed.
         """
+        if self.sweep_sizes_mb:
+            self.prepare_size_sweep()
+
         self.generate_tasks()
 
         if not self.tasks:
             raise ValueError("No tasks have been set.")
 
+        seed, completed = self._load_or_start_plan()
+
         self._warn_and_prepare()
+        cooldown = self._prepare_cooldown()
         self._warmup_fibonacci()
 
-        self.energibridge.start_service()
+        self.measurement_backend.start_service()
 
-        # Create a list of (task_name, task, run_index) tuples for shuffling
-        task_run_list = [(name, task, i + 1) for name, task in self.tasks.items() for i in range(self.num_runs)]
-        random.shuffle(task_run_list)  # Shuffle task execution order
+        if self.adaptive_runs:
+            self._run_adaptive(cooldown, seed, completed)
+        else:
+            # The shuffled order of (task_name, run_index) tuples is part of the plan
+            task_run_list = [tuple(run) for run in self.journal.plan()["runs"]]
+            first_run = True
+            for run_index, (task_name, run_id) in enumerate(task_run_list, 1):
+                if (task_name, run_id) in completed:
+                    continue
+                # Rest between runs
+                if not first_run:
+                    self._rest(cooldown)
+                first_run = False
+                self._run_journaled(run_index, task_name, run_id)
 
-        for run_index, (task_name, (corpus, engine, pattern), run_id) in enumerate(task_run_list, 1):
-            print(f"----- Run {run_index} (Task: {task_name}, Instance: {run_id}) -----")
+        self.measurement_backend.stop_service()
+        print("Experiment complete.")
 
-            # If the results folder does not exist, create it
-            if not os.path.exists("results"):
-                os.makedirs("results")
+    def _run_task(self, run_index, task_name, run_id):
+        """
+        Prepares a task and measures one run of it.
 
-            output_file = f"results/{task_name}_run_{run_id}.csv"
+        Parameters:
+        - run_index (int): Number of the run in the experiment.
+        - task_name (str): Name of the task.
+        - run_id (int): Number of the run of the task.
 
-            # Prepare regex matching task
-            self.energibridge.prepare_task(corpus=corpus, engine=engine, pattern=pattern)
+        Returns:
+        - str: Path of the CSV file with the measurement.
+        """
+        corpus, engine, pattern, options = self.tasks[task_name]
+        print(f"----- Run {run_index} (Task: {task_name}, Instance: {run_id}) -----")
 
-            # Run energy measurement with task
-            self.energibridge.run_measurement(corpus=corpus, engine=engine, pattern=pattern, output_file=output_file)
+        # If the results folder does not exist, create it
+        if not os.path.exists("results"):
+            os.makedirs("results")
 
-            # Rest between runs except for the last iteration
-            if run_index < len(task_run_list):
-                print(f"Resting for {self.rest_duration} seconds before the next run...")
-                time.sleep(self.rest_duration)
+        output_file = self._output_file(task_name, run_id)
 
-        self.energibridge.stop_service()
-        print("Experiment complete.")
+        # Prepare regex matching task
+        self.measurement_backend.prepare_task(corpus=corpus, engine=engine, pattern=pattern, **options)
+
+        # Run energy measurement with task
+        self.measurement_backend.run_measurement(corpus=corpus, engine=engine, pattern=pattern, output_file=output_file, **options)
+        return output_file
+
+    def _output_file(self, task_name, run_id):
+        """
+        Gets the path of the CSV file of a run.
+        """
+        return f"results/{task_name}_run_{run_id}.csv"
+
+    def _run_journaled(self, run_index, task_name, run_id):
+        """
+        Runs a task like '_run_task', with a "start" entry in the journal before the run and a "done" entry after it.
+
+        Returns:
+        - str: Path of the CSV file with the measurement.
+        """
+        self.journal.append("start", task=task_name, run=run_id)
+        output_file = self._run_task(run_index, task_name, run_id)
+        self.journal.append("done", task=task_name, run=run_id, outcome=ResultsLoader().load_result_file(output_file).get("outcome"))
+        return output_file
+
+    def _load_or_start_plan(self):
+        """
+        Loads the plan of the journal to resume, or starts a new journal with a seeded plan.
+
+        Returns:
+        - tuple: (seed of the shuffled order (int), records of the completed runs by (task name, run number) (dict))
+
+        Raises:
+        - ValueError: When the tasks or the schedule differ from the plan of the journal to resume.
+        """
+        plan = self.journal.plan() if self.resume else None
+        if self.resume and plan is None:
+            print(f"No journal found at {self.journal.path}, starting a new experiment.")
+
+        if plan is None:
+            seed = random.randrange(2 ** 32)
+            runs = None
+            if not self.adaptive_runs:
+                runs = [(name, i + 1) for name in self.tasks for i in range(self.num_runs)]
+                random.Random(seed).shuffle(runs)  # Shuffle task execution order
+            self.journal.start_plan(seed, list(self.tasks), runs)
+            return seed, {}
+
+        if sorted(plan["tasks"]) != sorted(self.tasks) or (plan["runs"] is None) != self.adaptive_runs:
+            raise ValueError("The tasks or schedule of the experiment differ from the plan in the journal, it cannot be resumed.")
+        completed = self._completed_runs()
+        print(f"Resuming the experiment with seed {plan['seed']}, {len(completed)} runs are complete.")
+        return plan["seed"], completed
+
+    def _completed_runs(self):
+        """
+        Finds the runs in the journal that are done and have valid result files. The result files of
+        interrupted runs, and of runs whose results are invalid, are removed so they can be run again.
+
+        Returns:
+        - dict[tuple[str, int], EnergyRecord]: The records of the completed runs by (task name, run number), in the order they ran.
+        """
+        completed = {}
+        for (task_name, run_id), entry in self.journal.run_states().items():
+            output_file = self._output_file(task_name, run_id)
+            record = self._load_valid_record(output_file) if entry["event"] == "done" else None
+            if record is None:
+                print(f"Re-queuing partial run {run_id} of {task_name}.")
+                for path in [output_file, os.path.splitext(output_file)[0] + ".json", os.path.splitext(output_file)[0] + ".samples.npz"]:
+                    if os.path.exists(path):
+                        os.remove(path)
+            else:
+                completed[(task_name, run_id)] = record
+        return completed
+
+    def _load_valid_record(self, output_file):
+        """
+        Loads the record of a run, see 'ResultsLoader.load_record'.
+
+        Returns:
+        - EnergyRecord: The record, or None when the CSV file or the JSON result file is missing or cannot be read.
+        """
+        if not os.path.exists(output_file) or not os.path.exists(os.path.splitext(output_file)[0] + ".json"):
+            return None
+        try:
+            return ResultsLoader().load_record(output_file)
+        except (OSError, ValueError, KeyError, IndexError):
+            return None
+
+    def _rest(self, cooldown):
+        """
+        Rests before the next run, until idle when adaptive, see CooldownMonitor, or for the fixed duration.
+
+        Parameters:
+        - cooldown (CooldownMonitor): The monitor to rest with, or None to rest for the fixed duration.
+        """
+        if cooldown is None:
+            print(f"Resting for {self.rest_duration} seconds before the next run...")
+            time.sleep(self.rest_duration)
+        else:
+            print(f"Resting until idle, for at most {self.rest_duration} seconds, before the next run...")
+            rested, settled = cooldown.wait(self.rest_duration)
+            print(f"Rested for {rested:.1f} seconds ({'settled at idle' if settled else 'longest rest reached'}).")
+
+    def _run_adaptive(self, cooldown, seed, completed):
+        """
+        Runs the tasks in the order of an AdaptiveScheduler, which is told the matching time and energy
+        of each run as soon as it has been measured.
+
+        Parameters:
+        - cooldown (CooldownMonitor): The monitor to rest with, or None to rest for the fixed duration.
+        - seed (int): Seed of the scheduler's shuffled order.
+        - completed (dict): Records of the runs completed before resuming, see '_completed_runs'.
+        """
+        scheduler = AdaptiveScheduler(list(self.tasks), min_runs=min(self.min_runs, self.num_runs), max_runs=self.num_runs,
+                                      target_width=self.target_ci_width, seed=seed)
+        # A run that failed or timed out uses the budget of its task without narrowing its intervals
+        for (task_name, _), record in completed.items():
+            ok = record.outcome == "ok"
+            scheduler.restore(task_name, record.time if ok else None, record.energy if ok else None)
+
+        run_index = len(completed)
+        while (task_name := scheduler.next_task()) is not None:
+            run_index += 1
+            if run_index > len(completed) + 1:
+                self._rest(cooldown)
+            # Run numbers of interrupted runs are used again
+            run_id = next(i for i in range(1, self.num_runs + 1) if (task_name, i) not in completed)
+            output_file = self._run_journaled(run_index, task_name, run_id)
+
+            record = self._load_valid_record(output_file)
+            completed[(task_name, run_id)] = record
+            if record is not None and record.outcome == "ok":
+                scheduler.record(task_name, record.time, record.energy)
+            else:
+                scheduler.record(task_name, None, None)
+
+        print(f"Adaptive schedule complete after {run_index} runs:")
+        for task_name, (runs, width) in scheduler.summary().items():
+            print(f"- {task_name}: {runs} runs, 95% confidence interval width {width:.1%}")
+
+    def _prepare_cooldown(self):
+        """
+        Records the idle baseline of the adaptive rest, before the warm-up heats the CPU.
+
+        Returns:
+        - CooldownMonitor: The monitor to rest with, or None to rest for the fixed duration.
+        """
+        if not self.adaptive_rest:
+            return None
+        cooldown = CooldownMonitor()
+        if not cooldown.available():
+            print(f"Package power cannot be read, resting for a fixed {self.rest_duration} seconds between runs.")
+            return None
+        print("Recording the idle baseline for the adaptive rest...")
+        cooldown.record_baseline()
+        return cooldown
 
     def _warn_and_prepare(self):
         """Provides instructions to the user to optimize system conditions before running the experiment."""
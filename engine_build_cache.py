@@ -0,0 +1,104 @@
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import time
+
+class EngineBuildCache:
+    """
+    Class to cache the build artifacts of the generated regex engines on disk.
+
+    Each build is stored in '<cache_dir>/<engine>/<key>', where the key is a hash of the engine source
+    and its compile command. An engine is only compiled again when its source or compiler flags change,
+    and the cache persists across experiment sessions.
+    """
+
+    manifest_name = "build.json"
+
+    def __init__(self, cache_dir=".engine_cache"):
+        """
+        Initialize the cache with the directory to store builds in.
+
+        Parameters:
+        - cache_dir (str): Directory to store the builds in.
+        """
+        self.cache_dir = cache_dir
+
+    def build_key(self, source_path, command):
+        """
+        Compute the cache key of a build.
+
+        Parameters:
+        - source_path (str): Path to the engine source file.
+        - command (list[str]): Compile command, with '{source}' and '{output_dir}' placeholders.
+
+        Returns:
+        - str: Hash of the source and the compile command.
+        """
+        digest = hashlib.sha256()
+        with open(source_path, "rb") as f:
+            digest.update(f.read())
+        digest.update(b"\0")
+        digest.update(json.dumps(command).encode("utf-8"))
+        return digest.hexdigest()[:16]
+
+    def build(self, engine, source_path, command):
+        """
+        Get the build directory of an engine, compiling it only when no build with the same key exists.
+        The source file is copied into the build directory, so engines that need no compilation can run from it too.
+
+        Parameters:
+        - engine (str): Name of the regex engine.
+        - source_path (str): Path to the engine source file.
+        - command (list[str]): Compile command, with '{source}' and '{output_dir}' placeholders. Empty when no compilation is needed.
+
+        Returns:
+        - str: Absolute path of the build directory.
+        """
+        key = self.build_key(source_path, command)
+        build_dir = os.path.abspath(os.path.join(self.cache_dir, engine, key))
+        if os.path.exists(os.path.join(build_dir, self.manifest_name)):
+            print(f"Using cached build of {engine} ({key}).")
+            return build_dir
+
+        print(f"Building {engine} ({key})...")
+
+        # Build in a temporary directory that is renamed once complete, so a failed build leaves no entry
+        temp_dir = f"{build_dir}.tmp{os.getpid()}"
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        os.makedirs(temp_dir)
+        source = os.path.join(temp_dir, os.path.basename(source_path))
+        shutil.copyfile(source_path, source)
+
+        start_time = time.perf_counter()
+        if command:
+            resolved_command = [arg.replace("{source}", source).replace("{output_dir}", temp_dir) for arg in command]
+            result = subprocess.run(resolved_command, capture_output=True, text=True)
+            if result.returncode != 0:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+                raise RuntimeError(f"{engine} compilation failed:\n{result.stderr}")
+
+        with open(os.path.join(temp_dir, self.manifest_name), "w") as f:
+            json.dump({
+                "engine": engine,
+                "key": key,
+                "command": command,
+                "build_seconds": time.perf_counter() - start_time,
+                "built_at": time.time()
+            }, f, indent=2)
+
+        try:
+            os.replace(temp_dir, build_dir)
+        except OSError:
+            # Another process completed the same build first
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            if not os.path.exists(os.path.join(build_dir, self.manifest_name)):
+                raise
+        return build_dir
+
+    def clear(self):
+        """
+        Delete all cached builds.
+        """
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
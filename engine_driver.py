@@ -0,0 +1,414 @@
+import argparse
+import asyncio
+import math
+import os
+import signal
+import subprocess
+import time
+from process_usage import ProcessUsage
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, where CPU budgets are not enforced
+    resource = None
+
+class EngineTimeoutError(TimeoutError):
+    """
+    Raised when a generated regex engine misses a deadline. The engine's process group has been killed.
+    """
+
+    def __init__(self, message, output_lines, results=None):
+        """
+        Parameters:
+        - message (str): Description of the missed deadline.
+        - output_lines (list[str]): Lines the engine printed for the job before it was killed.
+        - results (list[dict], optional): Structured results an in-process engine reported before it was
+          interrupted, which have no output lines.
+        """
+        super().__init__(message)
+        self.output_lines = output_lines
+        self.results = results
+
+class EngineProcess:
+    """
+    An engine process started by the EngineDriver, together with the task that drains its stderr and the
+    latest sample of its resource usage.
+    """
+
+    def __init__(self, process, stderr_task):
+        """
+        Parameters:
+        - process (asyncio.subprocess.Process): The engine process.
+        - stderr_task (asyncio.Task): Task reading the engine's stderr until it closes.
+        """
+        self.process = process
+        self.stderr_task = stderr_task
+        # Latest usage read from /proc, see 'EngineDriver._sample_usage', and the task sampling it
+        self.usage = {}
+        self.usage_task = None
+
+    async def stderr(self):
+        """
+        Get what the engine wrote to stderr, once it has closed it.
+        """
+        return (await self.stderr_task).decode(errors="replace")
+
+class EngineDriver:
+    """
+    Class to drive generated regex engine processes with asyncio.
+
+    The driver starts an engine in its own process group, waits for "ready", sends a job and collects the
+    lines it prints until "done". An engine in worker mode can be kept alive for many jobs with 'start',
+    'send_job' and 'stop'. Stdout and stderr are read without blocking, so a stalled engine or a full
+    stderr pipe cannot hang the driver. Each pattern iteration and the job as a whole can be given a deadline;
+    an engine that misses one is killed together with any processes it started. On POSIX systems an engine
+    can also be given a CPU time budget, which the kernel enforces with a resource limit.
+    The resource usage of the engine process is taken from the kernel when the process is reaped, see ProcessUsage.
+    """
+
+    # Seconds between two samples of the engine's resource usage from '/proc'
+    usage_interval = 0.1
+
+    def __init__(self, pattern_timeout=None, job_timeout=None, ready_timeout=60, cpu_timeout=None):
+        """
+        Initialize the driver with its deadlines, in seconds. None disables a deadline.
+
+        Parameters:
+        - pattern_timeout (float, optional): Longest time between two lines of output during a job, which bounds
+          one iteration of one pattern. The first pattern's window also includes the corpus load report.
+        - job_timeout (float, optional): Longest time from sending the job until "done".
+        - ready_timeout (float, optional): Longest time from starting the engine until "ready".
+        - cpu_timeout (float, optional): CPU time budget of the engine process, including its start-up.
+          Ignored where resource limits are not available.
+        """
+        self.pattern_timeout = pattern_timeout
+        self.job_timeout = job_timeout
+        self.ready_timeout = ready_timeout
+        self.cpu_timeout = cpu_timeout
+
+    def _limit_cpu(self):
+        """
+        Set the CPU time limit in the engine process before it starts. The kernel sends SIGXCPU at the
+        soft limit and kills the process at the hard limit, one second later.
+        """
+        seconds = math.ceil(self.cpu_timeout)
+        resource.setrlimit(resource.RLIMIT_CPU, (seconds, seconds + 1))
+
+    def _exceeded_cpu(self, engine):
+        """
+        Check if an engine process that exited was stopped by its CPU time limit. SIGXCPU is only sent by the
+        limit, but SIGKILL can also come from the OOM killer or another process. It is only put down to the
+        limit when the last usage sample shows the engine past the soft limit, which it passes a second before
+        the kernel kills it at the hard limit.
+        """
+        if self.cpu_timeout is None or resource is None:
+            return False
+        if engine.process.returncode == -signal.SIGXCPU:
+            return True
+        cpu_ns = engine.usage.get("user_cpu_ns", 0) + engine.usage.get("system_cpu_ns", 0)
+        return engine.process.returncode == -signal.SIGKILL and cpu_ns >= math.ceil(self.cpu_timeout) * 1e9
+
+    async def _start(self, command):
+        """
+        Start an engine process as the leader of a new process group.
+
+        Parameters:
+        - command (list[str]): The command and its arguments.
+
+        Returns:
+        - asyncio.subprocess.Process: The started process.
+        """
+        if os.name == "nt":
+            group_options = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+        else:
+            group_options = {"start_new_session": True}
+            if self.cpu_timeout is not None and resource is not None:
+                group_options["preexec_fn"] = self._limit_cpu
+        return await asyncio.create_subprocess_exec(
+            *command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            **group_options
+        )
+
+    @staticmethod
+    def kill(process):
+        """
+        Kill an engine process and every process in its group.
+
+        Parameters:
+        - process (asyncio.subprocess.Process): Process started by the driver.
+        """
+        if process.returncode is not None:
+            return
+        if os.name == "nt":
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)], capture_output=True)
+            return
+        try:
+            # The process leads its own session, so its process group id is its pid
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    async def _readline(self, process, deadline):
+        """
+        Read one line from the engine's stdout before a deadline.
+
+        Parameters:
+        - process (asyncio.subprocess.Process): The engine process.
+        - deadline (float, optional): Event loop time to read the line by, or None to wait indefinitely.
+
+        Returns:
+        - str: The line, or an empty string when the engine closed its stdout.
+        """
+        timeout = None if deadline is None else max(0.0, deadline - asyncio.get_running_loop().time())
+        line = await asyncio.wait_for(process.stdout.readline(), timeout)
+        return line.decode("utf-8", errors="replace")
+
+    @staticmethod
+    def _deadline(loop, timeout, *deadlines):
+        """
+        Get the earliest of a timeout from now and other deadlines, ignoring the ones that are None.
+        """
+        candidates = [deadline for deadline in deadlines if deadline is not None]
+        if timeout is not None:
+            candidates.append(loop.time() + timeout)
+        return min(candidates) if candidates else None
+
+    async def _sample_usage(self, process, usage):
+        """
+        Sample the resource usage of an engine process into a dictionary until cancelled. The kernel's accounting
+        replaces it once the engine is reaped, except for a peak resident memory the kernel cannot attribute to it.
+        """
+        while True:
+            sample = ProcessUsage.read_proc(process.pid)
+            if sample is None:
+                return
+            usage.update(sample)
+            await asyncio.sleep(self.usage_interval)
+
+    async def start(self, command, signal_times=None, sample_usage=False):
+        """
+        Start an engine process and wait until it signals "ready". Its resource usage is sampled from /proc
+        while it runs when asked for, and with a CPU budget, to tell a CPU overrun from another kill.
+
+        Parameters:
+        - command (list[str]): Command that starts the engine.
+        - signal_times (dict, optional): Filled with the wall-clock time of the "ready" signal, see 'run'.
+        - sample_usage (bool): Sample the resource usage of the engine into its 'usage'.
+
+        Returns:
+        - EngineProcess: The ready engine, to send jobs to with 'send_job' and to stop with 'stop'.
+
+        Raises:
+        - EngineTimeoutError: When the engine missed its ready deadline or exceeded its CPU budget.
+        - RuntimeError: When the engine failed to start.
+        """
+        loop = asyncio.get_running_loop()
+        process = await self._start(command)
+        # Drain stderr concurrently, so an engine writing a lot to it never blocks
+        engine = EngineProcess(process, asyncio.create_task(process.stderr.read()))
+        if os.name != "nt" and (sample_usage or self.cpu_timeout is not None):
+            engine.usage_task = asyncio.create_task(self._sample_usage(process, engine.usage))
+        try:
+            line = await self._readline(process, self._deadline(loop, self.ready_timeout))
+            if line.strip() != "ready":
+                if not line:
+                    await self._raise_if_cpu_exceeded(engine, "start", [])
+                self.kill(process)
+                raise RuntimeError(f"Engine failed to start:\n{await engine.stderr()}")
+        except EngineTimeoutError:
+            await self.stop(engine, timeout=0)
+            raise
+        except asyncio.TimeoutError:
+            await self.stop(engine, timeout=0)
+            raise EngineTimeoutError("Engine missed its start deadline after 0 lines of output.", []) from None
+        except BaseException:
+            await self.stop(engine, timeout=0)
+            raise
+        if signal_times is not None:
+            signal_times["ready_ns"] = time.time_ns()
+        return engine
+
+    async def send_job(self, engine, job="start", signal_times=None):
+        """
+        Send one job to a ready engine and collect the lines it prints until "done". An engine that misses
+        a deadline is killed.
+
+        Parameters:
+        - engine (EngineProcess): Engine started with 'start'.
+        - job (str): Job line to send, "start" runs the engine's own patterns.
+        - signal_times (dict, optional): Filled with the wall-clock times at which the job was sent and the engine
+          signalled "done", see 'run'.
+
+        Returns:
+        - list[str]: Lines the engine printed between the job and "done".
+
+        Raises:
+        - EngineTimeoutError: When a deadline was missed.
+        - RuntimeError: When the engine exited before "done".
+        """
+        loop = asyncio.get_running_loop()
+        process = engine.process
+        output_lines = []
+        try:
+            process.stdin.write(f"{job}\n".encode("utf-8"))
+            await process.stdin.drain()
+            if signal_times is not None:
+                signal_times["start_ns"] = time.time_ns()
+            job_deadline = self._deadline(loop, self.job_timeout)
+
+            # Read output until done
+            while True:
+                line = await self._readline(process, self._deadline(loop, self.pattern_timeout, job_deadline))
+                if not line:
+                    await self._raise_if_cpu_exceeded(engine, "job", output_lines)
+                    self.kill(process)
+                    raise RuntimeError(f"Engine exited before it was done:\n{await engine.stderr()}")
+                line = line.strip()
+                if line == "done":
+                    if signal_times is not None:
+                        signal_times["done_ns"] = time.time_ns()
+                    return output_lines
+                output_lines.append(line)
+        except EngineTimeoutError:
+            raise
+        except asyncio.TimeoutError:
+            self.kill(process)
+            raise EngineTimeoutError(f"Engine missed its job deadline after {len(output_lines)} lines of output.", output_lines) from None
+        except (BrokenPipeError, ConnectionResetError):
+            # The engine closed its stdin, so it has exited or is about to
+            self.kill(process)
+            raise RuntimeError(f"Engine exited before it received its job:\n{await engine.stderr()}") from None
+
+    async def stop(self, engine, exit_line=None, timeout=10):
+        """
+        Stop an engine: send it a line asking it to exit, if given, close its stdin and give it some time to
+        exit by itself, then kill its process group and wait for it.
+
+        Parameters:
+        - engine (EngineProcess): Engine started with 'start'.
+        - exit_line (str, optional): Line that asks the engine to exit, such as "exit" for a worker.
+        - timeout (float): Seconds the engine may take to exit by itself, 0 kills it right away.
+        """
+        process = engine.process
+        try:
+            if process.returncode is None and timeout > 0:
+                if exit_line is not None:
+                    process.stdin.write(f"{exit_line}\n".encode("utf-8"))
+                    await process.stdin.drain()
+                process.stdin.close()
+                await asyncio.wait_for(process.wait(), timeout)
+        except (OSError, asyncio.TimeoutError):
+            pass
+        finally:
+            self.kill(process)
+            await process.wait()
+            await engine.stderr_task
+            if engine.usage_task is not None:
+                engine.usage_task.cancel()
+
+    async def run(self, command, job="start", signal_times=None, usage=None):
+        """
+        Run one job on a new engine process.
+
+        Parameters:
+        - command (list[str]): Command that starts the engine.
+        - job (str): Job line to send, "start" runs the engine's own patterns.
+        - signal_times (dict, optional): Filled with the wall-clock times, in nanoseconds since the epoch, at which
+          the engine signalled "ready" ("ready_ns"), the job was sent ("start_ns") and the engine signalled "done"
+          ("done_ns"). Times of signals that did not happen are left out.
+        - usage (dict, optional): Filled with the resource usage of the engine process until it was reaped, also when
+          it was killed, see ProcessUsage. Left empty where resource usage is not available. The usage is that of all
+          children reaped during the run, so it is only the engine's when no other engine runs at the same time.
+
+        Returns:
+        - list[str]: Lines the engine printed between the job and "done".
+
+        Raises:
+        - EngineTimeoutError: When a deadline was missed.
+        - RuntimeError: When the engine failed to start or exited before "done".
+        """
+        usage_start = ProcessUsage.children_snapshot() if usage is not None else []
+        # The peak resident memory is also sampled, for when the kernel's peak belongs to an earlier child
+        engine = await self.start(command, signal_times, sample_usage=usage is not None)
+        try:
+            output_lines = await self.send_job(engine, job, signal_times)
+            await self.stop(engine)
+        except BaseException:
+            await self.stop(engine, timeout=0)
+            raise
+        finally:
+            if usage is not None:
+                usage.update(engine.usage)
+            # The engine has been reaped by now, so its final usage is part of the kernel's accounting of children
+            if usage_start:
+                usage.update(ProcessUsage.reaped_since(usage_start))
+        return output_lines
+
+    async def _raise_if_cpu_exceeded(self, engine, stage, output_lines):
+        """
+        Raise an EngineTimeoutError when an engine that closed its stdout was stopped by its CPU time limit.
+        """
+        try:
+            # An engine that closed its stdout but keeps running was not stopped by the limit
+            await asyncio.wait_for(engine.process.wait(), 5)
+        except asyncio.TimeoutError:
+            return
+        if self._exceeded_cpu(engine):
+            raise EngineTimeoutError(f"Engine exceeded its CPU budget of {self.cpu_timeout}s during {stage} after {len(output_lines)} lines of output.", output_lines)
+
+    async def run_many(self, commands, job="start"):
+        """
+        Run one job on each of several engine processes at the same time. Processes compete for the CPU,
+        so this is only suitable for time-only benchmarks, not for energy measurements.
+
+        Parameters:
+        - commands (list[list[str]]): Commands that start the engines.
+        - job (str): Job line to send to every engine.
+
+        Returns:
+        - list: Per command its output lines, or the exception it raised.
+        """
+        return await asyncio.gather(*(self.run(command, job) for command in commands), return_exceptions=True)
+
+    def run_sync(self, command, job="start", signal_times=None, usage=None):
+        """
+        Run one job on a new engine process from synchronous code, see 'run'.
+        """
+        return asyncio.run(self.run(command, job, signal_times, usage))
+
+    def run_many_sync(self, commands, job="start"):
+        """
+        Run one job on each of several engine processes from synchronous code, see 'run_many'.
+        """
+        return asyncio.run(self.run_many(commands, job))
+
+if __name__ == "__main__":
+    from run_regex_engines import RegexEnginesExecutor
+
+    parser = argparse.ArgumentParser(description="Time generated regex engines running side by side (no energy measurement).")
+    parser.add_argument("--corpus", required=True, help="Path to the corpus file.")
+    parser.add_argument("--pattern", required=True, help="Regex pattern to be used for matching.")
+    parser.add_argument("--engines", nargs="+", required=True, help="Names of the generated regex engines.")
+    parser.add_argument("--copies", type=int, default=1, help="Number of processes to run per engine.")
+    parser.add_argument("--job-timeout", type=float, default=None, help="Seconds each engine may take for its job.")
+    args = parser.parse_args()
+
+    executors = [RegexEnginesExecutor(regex_engine=engine, corpus=args.corpus, pattern=args.pattern) for engine in args.engines]
+    for executor in executors:
+        executor.setUp()
+
+    commands = [executor.engine_command() for executor in executors for _ in range(args.copies)]
+    names = [executor.regex_engine for executor in executors for _ in range(args.copies)]
+    outputs = EngineDriver(job_timeout=args.job_timeout).run_many_sync(commands)
+    for name, output in zip(names, outputs):
+        if isinstance(output, Exception):
+            print(f"{name}: {type(output).__name__}: {output}")
+            continue
+        for result in RegexEnginesExecutor.parse_engine_output(output):
+            load = f"{result['load_ns'] / 1e6:.2f} ms" if result["load_ns"] is not None else "shared"
+            print(f"{name}: {result['matches']} matches, load {load}, "
+                  f"compile {result['compile_ns'] / 1e6:.2f} ms, match {result['match_ns'] / 1e6:.2f} ms")
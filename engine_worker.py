@@ -0,0 +1,156 @@
+import argparse
+import asyncio
+import statistics
+import time
+from run_regex_engines import RegexEnginesExecutor
+
+class EngineWorker:
+    """
+    Class to keep a generated regex engine process alive and serve many jobs with it.
+
+    The worker is started with '--worker', loads its runtime and corpus once and signals "ready".
+    Every job is then sent over the same stdin protocol as a single run, as "start<TAB>corpus<TAB>pattern",
+    and answered with the match output followed by "done". The corpus is only reloaded when a job
+    names a different corpus. The process is driven by the EngineDriver with the executor's deadlines, so a
+    worker that hangs or dies is killed together with its process group instead of blocking. The CPU budget
+    covers the whole life of the worker.
+    """
+
+    def __init__(self, regex_engine_executor):
+        """
+        Initialize the worker with a regex engines executor that has been set up.
+
+        Parameters:
+        - regex_engine_executor (RegexEnginesExecutor): Executor whose engine and deadlines the worker uses.
+        """
+        self.regex_engine_executor = regex_engine_executor
+        self.driver = regex_engine_executor.engine_driver()
+        self.loop = None
+        self.engine = None
+        self.startup_time = None
+
+    def start(self):
+        """
+        Start the engine process and wait until it is ready.
+
+        Returns:
+        - float: Seconds from launching the process until it signalled ready.
+
+        Raises:
+        - EngineTimeoutError: When the engine missed its ready deadline.
+        - RuntimeError: When the engine failed to start.
+        """
+        self.loop = asyncio.new_event_loop()
+        start_time = time.perf_counter()
+        try:
+            self.engine = self.loop.run_until_complete(self.driver.start(self.regex_engine_executor.engine_command() + ["--worker"]))
+        except BaseException:
+            self.close()
+            raise
+        self.startup_time = time.perf_counter() - start_time
+        return self.startup_time
+
+    def run_job(self, pattern, corpus):
+        """
+        Run one job on the warm engine process. A worker that misses a deadline or exits is stopped.
+
+        Parameters:
+        - pattern (str): Regex pattern to be matched.
+        - corpus (str): Path to the text corpus file.
+
+        Returns:
+        - tuple: (structured results of the engine, see 'RegexEnginesExecutor.parse_engine_output', seconds from sending the job until "done").
+
+        Raises:
+        - EngineTimeoutError: When the job missed a deadline.
+        - RuntimeError: When the engine exited during the job.
+        """
+        if "\t" in pattern or "\n" in pattern or "\t" in corpus:
+            raise ValueError("Worker jobs cannot contain tabs or newlines.")
+
+        start_time = time.perf_counter()
+        try:
+            output_lines = self.loop.run_until_complete(self.driver.send_job(self.engine, f"start\t{corpus}\t{pattern}"))
+        except (TimeoutError, RuntimeError):
+            self.close()
+            raise
+        elapsed = time.perf_counter() - start_time
+        return RegexEnginesExecutor.parse_engine_output(output_lines), elapsed
+
+    def close(self):
+        """
+        Ask the engine process to exit, and kill its process group when it does not exit in time.
+        """
+        if self.loop is None:
+            return
+        if self.engine is not None:
+            self.loop.run_until_complete(self.driver.stop(self.engine, exit_line="exit"))
+            self.engine = None
+        self.loop.close()
+        self.loop = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def benchmark(self, pattern, corpus, jobs):
+        """
+        Run the same job repeatedly on one warm engine process, and compare the cold start with
+        the steady state.
+
+        Parameters:
+        - pattern (str): Regex pattern to be matched.
+        - corpus (str): Path to the text corpus file.
+        - jobs (int): Number of jobs to run.
+
+        Returns:
+        - dict: Start-up time, first job time, and the mean and median of the remaining jobs, in seconds.
+        """
+        started_here = self.engine is None
+        if started_here:
+            self.start()
+        try:
+            job_times = [self.run_job(pattern, corpus)[1] for _ in range(jobs)]
+        finally:
+            if started_here:
+                self.close()
+
+        steady_state = job_times[1:] or job_times
+        return {
+            "startup": self.startup_time,
+            "first_job": job_times[0],
+            "steady_state_mean": statistics.mean(steady_state),
+            "steady_state_median": statistics.median(steady_state),
+            "jobs": job_times
+        }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare cold-start and steady-state cost of a generated regex engine.")
+    parser.add_argument("--corpus", required=True, help="Path to the corpus file.")
+    parser.add_argument("--engine", required=True, help="Name of the regex engine.")
+    parser.add_argument("--pattern", required=True, help="Regex pattern to be used for matching.")
+    parser.add_argument("--jobs", type=int, default=100, help="Number of jobs to run on the warm engine.")
+    parser.add_argument("--cold-runs", type=int, default=0, help="Number of runs that each start a new engine process, for comparison.")
+    parser.add_argument("--job-timeout", type=float, default=600, help="Seconds each job may take before the worker is killed.")
+    parser.add_argument("--cpu-budget", type=float, default=None, help="Seconds of CPU time the worker may use over all its jobs.")
+    args = parser.parse_args()
+
+    executor = RegexEnginesExecutor(regex_engine=args.engine, corpus=args.corpus, pattern=args.pattern, job_timeout=args.job_timeout, cpu_timeout=args.cpu_budget)
+    executor.setUp()
+
+    results = EngineWorker(executor).benchmark(args.pattern, args.corpus, args.jobs)
+    print(f"Start-up until ready: {results['startup']:.4f}s")
+    print(f"First job: {results['first_job']:.4f}s")
+    print(f"Steady state: mean {results['steady_state_mean']:.4f}s, median {results['steady_state_median']:.4f}s over {args.jobs - 1} jobs")
+
+    if args.cold_runs:
+        method = getattr(executor, RegexEnginesExecutor.engine_methods[args.engine])
+        cold_times = []
+        for _ in range(args.cold_runs):
+            start_time = time.perf_counter()
+            method()
+            cold_times.append(time.perf_counter() - start_time)
+        print(f"Cold runs (process start, load and match): mean {statistics.mean(cold_times):.4f}s over {args.cold_runs} runs")
@@ -0,0 +1,128 @@
+import json
+import os
+import time
+
+class ExperimentJournal:
+    """
+    Class to keep an append-only journal of an experiment, so a crashed experiment can be resumed.
+
+    The journal is a JSON Lines file. Its first entry is the plan of the experiment: the seed of its shuffled
+    order, the tasks and, for a fixed schedule, the order of the runs. Every run then adds a "start" entry
+    before it is measured and a "done" entry after it. A run whose last entry is "start" was interrupted.
+    Each entry is appended as one line that is flushed and synced to disk before the run continues. A crash
+    while appending can leave a torn last line without its newline, which is dropped from the journal
+    the next time it is read.
+    """
+
+    def __init__(self, path="results/journal.jsonl"):
+        """
+        Initializes the journal with its file.
+
+        Parameters:
+        - path (str): Path of the journal file.
+        """
+        self.path = path
+        self.checked = False
+
+    def entries(self):
+        """
+        Reads the entries of the journal.
+
+        Returns:
+        - list[dict]: The entries in the order they were written, empty when there is no journal.
+        """
+        self.checked = True
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, "rb") as f:
+            content = f.read()
+        complete = content[:content.rfind(b"\n") + 1]
+        if len(complete) < len(content):
+            # The last line was torn by a crash, remove it so the next entry starts on its own line
+            with open(self.path, "r+b") as f:
+                f.truncate(len(complete))
+                os.fsync(f.fileno())
+        return [json.loads(line) for line in complete.decode("utf-8").splitlines() if line.strip()]
+
+    def _sync_directory(self):
+        """
+        Syncs the directory of the journal, so a created or replaced journal file survives a crash.
+        Windows cannot open a directory to sync it, there the journal relies on the file system alone.
+        """
+        if os.name == "nt":
+            return
+        descriptor = os.open(os.path.dirname(self.path) or ".", os.O_RDONLY)
+        try:
+            os.fsync(descriptor)
+        finally:
+            os.close(descriptor)
+
+    def append(self, event, **fields):
+        """
+        Appends an entry to the journal.
+
+        Parameters:
+        - event (str): Kind of entry, "plan", "start" or "done".
+        - fields: Further fields of the entry.
+        """
+        if not self.checked:
+            self.entries()
+        created = not os.path.exists(self.path)
+        if created and os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        entry = {"event": event, "timestamp": time.time(), **fields}
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        if created:
+            self._sync_directory()
+
+    def start_plan(self, seed, tasks, runs=None):
+        """
+        Starts a new journal with the plan of an experiment, atomically replacing any previous journal.
+
+        Parameters:
+        - seed (int): Seed of the experiment's shuffled order.
+        - tasks (list[str]): Names of the tasks.
+        - runs (list[tuple[str, int]], optional): Order of the (task name, run number) pairs of a fixed schedule.
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        entry = {"event": "plan", "timestamp": time.time(), "seed": seed, "tasks": tasks,
+                 "runs": [list(run) for run in runs] if runs is not None else None}
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary_path, self.path)
+        self._sync_directory()
+        self.checked = True
+
+    def plan(self):
+        """
+        Gets the plan of the journal.
+
+        Returns:
+        - dict: The plan entry, see 'start_plan', or None when there is no journal.
+        """
+        entries = self.entries()
+        return entries[0] if entries and entries[0]["event"] == "plan" else None
+
+    def run_states(self):
+        """
+        Gets the state of every run in the journal, in the order the runs were started.
+
+        Returns:
+        - dict[tuple[str, int], dict]: The last entry per (task name, run number), "done" for finished runs
+          and "start" for interrupted ones.
+        """
+        states = {}
+        for entry in self.entries():
+            if entry["event"] in ("start", "done"):
+                key = (entry["task"], entry["run"])
+                # Keep the order of the first start, a re-run replaces its state
+                states[key] = entry
+        return states
@@ -1,20 +1,76 @@
-from energy_experiment import EnergyExperiment
+from energy_experiment import EnergyExperiment, sweep_sizes_mb
 from analysis.energy_analysis import EnergyAnalysis
+import argparse
 import os
 import sys
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the regex engine energy experiment and analyse its results.")
+    parser.add_argument("--size-sweep", nargs="*", type=int, default=None, metavar="MB",
+                        help=f"Run every task on corpora of these sizes in MB (default sweep: {sweep_sizes_mb}).")
+    parser.add_argument("--worker-sweep", type=int, default=None, metavar="N",
+                        help="Also run the parallel Python engine with 1..N worker processes.")
+    parser.add_argument("--iterations", type=int, default=1,
+                        help="Number of measured iterations of each pattern within one engine process.")
+    parser.add_argument("--warmup-iterations", type=int, default=0,
+                        help="Number of warm-up iterations within each engine process, excluded from the steady-state timings.")
+    parser.add_argument("--time-budget", type=float, default=600,
+                        help="Wall-clock seconds each run may take before it is stopped and recorded as a timeout.")
+    parser.add_argument("--cpu-budget", type=float, default=None,
+                        help="CPU seconds each run may use before it is stopped and recorded as a timeout.")
+    parser.add_argument("--batch-patterns", action="store_true",
+                        help="Match all regex complexities in one engine process per run, so start-up and corpus load are paid once.")
+    parser.add_argument("--match-mode", choices=["count", "collect"], default="count",
+                        help="Count matches one at a time, or collect all matches first as a naive implementation would.")
+    parser.add_argument("--backend", choices=["energibridge", "rapl"], default="energibridge" if os.name == "nt" else "rapl",
+                        help="Energy measurement backend: EnergiBridge on Windows, or the Linux powercap RAPL counters.")
+    parser.add_argument("--sample-rate", type=float, default=1000,
+                        help="Samples per second of the RAPL backend, which buffers them in memory until each run ended.")
+    parser.add_argument("--fixed-rest", action="store_true",
+                        help="Rest the full rest duration between runs, instead of until the package power is back at idle.")
+    parser.add_argument("--adaptive-runs", action="store_true",
+                        help="Run each task between --min-runs and --runs times, until its 95%% confidence intervals are narrow enough.")
+    parser.add_argument("--runs", type=int, default=30,
+                        help="Number of runs of each task, or the largest number with --adaptive-runs.")
+    parser.add_argument("--min-runs", type=int, default=10,
+                        help="Number of runs of each task before its confidence intervals are considered, with --adaptive-runs.")
+    parser.add_argument("--target-ci-width", type=float, default=0.05,
+                        help="Target width of the confidence intervals relative to their mean, with --adaptive-runs.")
+    parser.add_argument("--resume", action="store_true",
+                        help="Resume the experiment in results/journal.jsonl, skipping completed runs and re-running interrupted ones.")
+    args = parser.parse_args()
 
-    # Verify that 'data/corpus.txt' exists
-    if not os.path.exists("data/corpus.txt"):
+    # Verify that 'data/corpus.txt' exists, a size sweep generates its own corpora when it does not
+    if args.size_sweep is None and not os.path.exists("data/corpus.txt"):
         print("Error: 'data/corpus.txt' not found.")
-        print("Please generate a corpus by running 'corpus_generator.py'. This will require a WIFI connection and should be done before running the experiment.")
+        print("Please generate a corpus by running 'corpus_generator.py'. This will require a WIFI connection (or use '--synthetic' to generate one offline) and should be done before running the experiment.")
         sys.exit(1)
 
     # Create an instance of the experiment
-    experiment = EnergyExperiment()
-    
+    worker_counts = list(range(1, args.worker_sweep + 1)) if args.worker_sweep else None
+    experiment_options = {
+        "worker_counts": worker_counts,
+        "iterations": args.iterations,
+        "warmup_iterations": args.warmup_iterations,
+        "time_budget": args.time_budget,
+        "cpu_budget": args.cpu_budget,
+        "batch_patterns": args.batch_patterns,
+        "match_mode": args.match_mode,
+        "backend": args.backend,
+        "sample_rate": args.sample_rate,
+        "adaptive_rest": not args.fixed_rest,
+        "num_runs": args.runs,
+        "adaptive_runs": args.adaptive_runs,
+        "min_runs": args.min_runs,
+        "target_ci_width": args.target_ci_width,
+        "resume": args.resume
+    }
+    if args.size_sweep is not None:
+        experiment = EnergyExperiment(sweep_sizes_mb=args.size_sweep or sweep_sizes_mb, **experiment_options)
+    else:
+        experiment = EnergyExperiment(**experiment_options)
+
     # Run the experiment with default parameters
     experiment.run_experiment()
 
@@ -22,4 +78,4 @@ if __name__ == "__main__":
     analysis = EnergyAnalysis()
 
     # Run the energy analysis
-    analysis.run()
\ No newline at end of file
+    analysis.run()
@@ -0,0 +1,110 @@
+import subprocess
+import sys
+from abc import ABC, abstractmethod
+
+class MeasurementBackend(ABC):
+    """
+    Base class of the energy measurement backends.
+
+    A backend prepares a regex matching task, measures the energy of running it and writes the samples
+    to a CSV file with at least a 'Time' column, in milliseconds since the epoch, and a cumulative
+    'PACKAGE_ENERGY (J)' column, the schema written by EnergiBridge. Subclasses must implement 'run_measurement',
+    a backend without it cannot be created, and implement 'start_service' and 'stop_service' when the backend
+    needs set-up around the experiment.
+    """
+
+    def _run_command(self, command):
+        """
+        Executes a command in the system shell.
+        
+        Parameters:
+        - command (str): The command to execute.
+        
+        Returns:
+        - str: Output of the command execution.
+        """
+        try:
+            result = subprocess.run(command, shell=True, check=True, capture_output=True, text=True)
+            print(result.stdout.strip())
+            print(result.stderr.strip())
+            return result.stdout.strip()
+        except subprocess.CalledProcessError as e:
+            print(f"Error executing command: {command}\n{e.stderr}")
+            return None
+
+    def start_service(self):
+        """
+        Starts what the backend needs before the first measurement. Nothing by default.
+        """
+
+    def stop_service(self):
+        """
+        Stops what 'start_service' started. Nothing by default.
+        """
+
+    def _regex_matching_command(self, corpus, engine, pattern, mode, workers=None, iterations=None, warmup=None, time_budget=None, cpu_budget=None, pattern_catalogue=None, match_mode=None, result_file=None):
+        """
+        Builds the command that runs regex_matching.py with the Python interpreter running the experiment.
+        
+        Parameters:
+        - corpus (str): Path to the text corpus file.
+        - engine (str): Regex engine to use for matching.
+        - pattern (str): Regex pattern to be matched, None when a pattern catalogue is given.
+        - mode (str): Either "setup" or "match".
+        - workers (int, optional): Number of worker processes for the parallel Python engine.
+        - iterations (int, optional): Number of measured iterations of the pattern within the engine process.
+        - warmup (int, optional): Number of warm-up iterations before the measured ones.
+        - time_budget (float, optional): Wall-clock seconds the matching may take before it is recorded as a timeout.
+        - cpu_budget (float, optional): CPU seconds the matching may use before it is recorded as a timeout.
+        - pattern_catalogue (str, optional): Path to a JSON file of patterns by label, matched as one batch instead of the pattern.
+        - match_mode (str, optional): "count" to count matches one at a time, "collect" to build the collection of all matches.
+        - result_file (str, optional): Path to save the structured results of the matching to.
+        
+        Returns:
+        - str: The command.
+        """
+        if pattern_catalogue is not None:
+            command = f'"{sys.executable}" regex_matching.py --corpus "{corpus}" --engine "{engine}" --pattern-catalogue "{pattern_catalogue}" --{mode}'
+        else:
+            command = f'"{sys.executable}" regex_matching.py --corpus "{corpus}" --engine "{engine}" --pattern "{pattern}" --{mode}'
+        if workers is not None:
+            command += f' --workers {workers}'
+        if iterations is not None:
+            command += f' --iterations {iterations}'
+        if warmup is not None:
+            command += f' --warmup {warmup}'
+        if time_budget is not None:
+            command += f' --time-budget {time_budget}'
+        if cpu_budget is not None:
+            command += f' --cpu-budget {cpu_budget}'
+        if match_mode is not None:
+            command += f' --match-mode {match_mode}'
+        if result_file is not None:
+            command += f' --result-file "{result_file}"'
+        return command
+
+    def prepare_task(self, corpus, engine, pattern, **options):
+        """
+        Prepares the regex matching task by running a setup command.
+        
+        Parameters:
+        - corpus (str): Path to the text corpus file.
+        - engine (str): Regex engine to use for matching.
+        - pattern (str): Regex pattern to be matched.
+        - options: Extra options of the task, such as 'workers', 'iterations', 'warmup', the run budgets and 'pattern_catalogue'.
+        """
+        self._run_command(self._regex_matching_command(corpus, engine, pattern, "setup", **options))
+
+    @abstractmethod
+    def run_measurement(self, corpus, engine, pattern, output_file="results/results.csv", **options):
+        """
+        Runs the regex matching task while measuring its energy, and stores the samples in the output file.
+        The structured results of the engine are stored next to it as a JSON file with the same name.
+        
+        Parameters:
+        - corpus (str): Path to the text corpus file.
+        - engine (str): Regex engine to use for matching.
+        - pattern (str): Regex pattern to be matched.
+        - output_file (str, optional): Path where measurement results will be stored. Default is "results/results.csv".
+        - options: Extra options of the task, such as 'workers', 'iterations', 'warmup', the run budgets and 'pattern_catalogue'.
+        """
@@ -0,0 +1,363 @@
+import argparse
+import mmap
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+try:
+    # Python 3.11+ moved the regex parser into the re package
+    from re import _parser as sre_parse
+    from re import _constants as sre_constants
+except ImportError:
+    import sre_parse
+    import sre_constants
+
+NEWLINE = ord("\n")
+
+# Character categories that contain the newline character
+NEWLINE_CATEGORIES = {
+    sre_constants.CATEGORY_SPACE, sre_constants.CATEGORY_NOT_DIGIT,
+    sre_constants.CATEGORY_NOT_WORD, sre_constants.CATEGORY_LINEBREAK,
+    sre_constants.CATEGORY_UNI_SPACE, sre_constants.CATEGORY_UNI_NOT_DIGIT,
+    sre_constants.CATEGORY_UNI_NOT_WORD, sre_constants.CATEGORY_UNI_LINEBREAK
+}
+REPEATS = {sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT, getattr(sre_constants, "POSSESSIVE_REPEAT", None)}
+
+
+def _set_contains_newline(items):
+    """
+    Returns whether a parsed character set ([...]) contains the newline character.
+    """
+    negate = False
+    contains = False
+    for op, av in items:
+        if op is sre_constants.NEGATE:
+            negate = True
+        elif op is sre_constants.LITERAL:
+            contains |= av == NEWLINE
+        elif op is sre_constants.RANGE:
+            contains |= av[0] <= NEWLINE <= av[1]
+        elif op is sre_constants.CATEGORY:
+            contains |= av in NEWLINE_CATEGORIES
+    return contains != negate
+
+
+def _add(a, b):
+    """Adds two widths, where None stands for unbounded."""
+    return None if a is None or b is None else a + b
+
+
+def _max(a, b):
+    """Takes the maximum of two widths, where None stands for unbounded."""
+    return None if a is None or b is None else max(a, b)
+
+
+def _bounds(items, dotall):
+    """
+    Walks a parsed pattern and bounds what a match attempt can touch.
+
+    Parameters:
+    - items: Parsed pattern items, as (opcode, argument) pairs.
+    - dotall (bool): Whether '.' matches the newline character.
+
+    Returns:
+    - tuple: (maximum consumed width, maximum width examined ahead of the match start including
+      lookaheads, whether a newline can be consumed or examined ahead). Widths are None when unbounded.
+    """
+    consumed, examined, newline = 0, 0, False
+    for op, av in items:
+        if op is sre_constants.LITERAL:
+            width, ahead, nl = 1, 1, av == NEWLINE
+        elif op is sre_constants.NOT_LITERAL:
+            width, ahead, nl = 1, 1, av != NEWLINE
+        elif op is sre_constants.ANY:
+            width, ahead, nl = 1, 1, dotall
+        elif op is sre_constants.IN:
+            width, ahead, nl = 1, 1, _set_contains_newline(av)
+        elif op is sre_constants.AT:
+            # Anchors consume nothing, but '$' and '\b' look at the following characters
+            width, ahead, nl = 0, 2, False
+        elif op is sre_constants.SUBPATTERN:
+            _, add_flags, del_flags, pattern = av
+            sub_dotall = (dotall or bool(add_flags & sre_constants.SRE_FLAG_DOTALL)) and not del_flags & sre_constants.SRE_FLAG_DOTALL
+            width, ahead, nl = _bounds(pattern, sub_dotall)
+        elif op is getattr(sre_constants, "ATOMIC_GROUP", None):
+            width, ahead, nl = _bounds(av, dotall)
+        elif op is sre_constants.BRANCH:
+            width, ahead, nl = 0, 0, False
+            for branch in av[1]:
+                branch_width, branch_ahead, branch_nl = _bounds(branch, dotall)
+                width, ahead, nl = _max(width, branch_width), _max(ahead, branch_ahead), nl or branch_nl
+        elif op in REPEATS:
+            low, high, pattern = av
+            inner_width, inner_ahead, nl = _bounds(pattern, dotall)
+            if high == 0:
+                width, ahead, nl = 0, 0, False
+            elif high == sre_constants.MAXREPEAT:
+                width = 0 if inner_width == 0 else None
+                ahead = inner_ahead if width == 0 else None
+            else:
+                width = None if inner_width is None else inner_width * high
+                ahead = _add(None if inner_width is None else inner_width * (high - 1), inner_ahead)
+        elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            direction, pattern = av
+            if direction == 1:
+                # Lookaheads examine characters after the current position without consuming them
+                _, ahead, nl = _bounds(pattern, dotall)
+                width = 0
+            else:
+                # Lookbehinds only look at characters before the current position, which are always available
+                width, ahead, nl = 0, 0, False
+        else:
+            # Backreferences, conditionals and anything unknown: assume the worst
+            width, ahead, nl = None, None, True
+
+        examined = _max(examined, _add(consumed, ahead))
+        consumed = _add(consumed, width)
+        newline = newline or nl
+    return consumed, examined, newline
+
+
+def analyse_pattern(pattern, flags=0):
+    """
+    Determines how far past a chunk end a match attempt starting inside the chunk can look.
+
+    Parameters:
+    - pattern (bytes): The regex pattern.
+    - flags (int): Regex flags.
+
+    Returns:
+    - tuple: (whether a match can span lines, maximum width examined ahead of a match start or None when unbounded).
+    """
+    parsed = sre_parse.parse(pattern, flags)
+    _, examined, newline = _bounds(parsed, bool(parsed.state.flags & sre_constants.SRE_FLAG_DOTALL))
+    return newline, examined
+
+
+# Memory-mapped corpus of each worker process, opened once by the pool initializer
+_corpus_file = None
+_corpus = None
+
+
+def _open_corpus(corpus_path):
+    """
+    Memory-maps the corpus in a worker process. All workers map the same file, so the
+    operating system shares a single copy of its pages between them.
+    """
+    global _corpus_file, _corpus
+    _corpus_file = open(corpus_path, "rb")
+    _corpus = mmap.mmap(_corpus_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _scan_chunk(pattern, start, end, endpos, head_limit):
+    """
+    Counts the matches of the pattern that start inside [start, end) of the memory-mapped corpus.
+
+    Parameters:
+    - pattern (bytes): The regex pattern.
+    - start (int): First byte of the chunk.
+    - end (int): Byte after the last byte of the chunk.
+    - endpos (int): Byte the search may look up to, past the end of the chunk.
+    - head_limit (int): Number of leading match spans to return for the merge.
+
+    Returns:
+    - tuple: (start, end, count, spans of the first matches, end of the last match or None).
+    """
+    regex = re.compile(pattern)
+    count = 0
+    head = []
+    last_end = None
+    for match in regex.finditer(_corpus, start, endpos):
+        if match.start() >= end:
+            break
+        if count < head_limit:
+            head.append(match.span())
+        count += 1
+        last_end = match.end()
+    return start, end, count, head, last_end
+
+
+class ParallelRegexEngine:
+    """
+    Class to count regex matches on a memory-mapped corpus in parallel, using a process pool.
+
+    The corpus is split into chunks aligned to line boundaries. Each worker counts the matches that
+    start inside its chunk, searching past the chunk end as far as a match can reach, which is
+    derived from the pattern: to the next line for patterns that cannot span lines, to the maximum
+    match width for bounded patterns, or to the end of the corpus otherwise. When a match overruns
+    into the next chunk, the start of that chunk is re-scanned from the end of the match until it
+    agrees with the worker's matches again, so counts equal those of a sequential scan.
+    """
+
+    def __init__(self, corpus, pattern, workers=None, chunks_per_worker=4, head_limit=64):
+        """
+        Initialize the engine with the corpus file, the pattern to match and the number of workers.
+
+        Parameters:
+        - corpus (str): Path to the text corpus file.
+        - pattern (str): Regex pattern to be matched.
+        - workers (int, optional): Number of worker processes. Defaults to the number of CPUs.
+        - chunks_per_worker (int): Number of chunks per worker, more chunks balance the load better.
+        - head_limit (int): Number of leading match spans each worker returns for the merge.
+        """
+        self.corpus = corpus
+        self.pattern = pattern.encode("utf-8")
+        self.workers = workers or os.cpu_count() or 1
+        self.chunks_per_worker = chunks_per_worker
+        self.head_limit = head_limit
+        self.spans_lines, self.max_width = analyse_pattern(self.pattern)
+
+    def _endpos(self, end, size):
+        """
+        Returns how far the search for matches starting before 'end' may look.
+        """
+        if not self.spans_lines:
+            # Chunks end after a newline that no match can cross, one byte more keeps '$' exact
+            return min(size, end + 1)
+        if self.max_width is not None:
+            return min(size, end + self.max_width + 1)
+        return size
+
+    def _chunks(self, corpus, size):
+        """
+        Splits the corpus into chunks of roughly equal size, each ending after a newline.
+
+        Returns:
+        - list[tuple]: (start, end, endpos) of each chunk.
+        """
+        target = max(1, -(-size // (self.workers * self.chunks_per_worker)))
+        chunks = []
+        start = 0
+        while start < size:
+            newline = corpus.find(b"\n", min(size, start + target) - 1)
+            end = size if newline == -1 else newline + 1
+            # The last chunk also owns empty matches at the very end of the corpus
+            chunks.append((start, end if end < size else size + 1, self._endpos(end, size)))
+            start = end
+        return chunks
+
+    def _rescan(self, corpus, carry, chunk_result, endpos):
+        """
+        Re-scans the start of a chunk from the end of a match that overran into it, until a match
+        coincides with one found by the worker, after which both scans are identical.
+
+        Returns:
+        - tuple: (corrected count, end of the last match or None).
+        """
+        start, end, count, head, last_end = chunk_result
+        head_index = {span: i for i, span in enumerate(head)}
+        regex = re.compile(self.pattern)
+        rescanned = 0
+        rescanned_end = None
+        for match in regex.finditer(corpus, carry, endpos):
+            if match.start() >= end:
+                break
+            if match.span() in head_index:
+                return rescanned + count - head_index[match.span()], last_end
+            rescanned += 1
+            rescanned_end = match.end()
+        return rescanned, rescanned_end
+
+    def _scan_in_pool(self, tasks):
+        """
+        Scans the chunks in a pool of worker processes. When the scan is interrupted, for example by the
+        time budget of a run, the workers are killed rather than waited for, since a worker that is stuck
+        in catastrophic backtracking would never finish.
+
+        Returns:
+        - list[tuple]: The result of every chunk, see '_scan_chunk'.
+        """
+        executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_open_corpus, initargs=(self.corpus,))
+        try:
+            futures = [executor.submit(_scan_chunk, *task) for task in tasks]
+            # Wait in short steps, so the signal handlers of the main thread run promptly on every platform
+            while wait(futures, timeout=0.1).not_done:
+                pass
+            results = [future.result() for future in futures]
+        except BaseException:
+            processes = list((executor._processes or {}).values())
+            executor.shutdown(wait=False, cancel_futures=True)
+            for process in processes:
+                process.kill()
+            for process in processes:
+                process.join()
+            raise
+        executor.shutdown()
+        return results
+
+    def count(self):
+        """
+        Count the matches of the pattern in the corpus.
+
+        Returns:
+        - int: Number of non-overlapping matches, equal to len(re.findall(pattern, corpus)).
+        """
+        with open(self.corpus, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            # An empty file cannot be memory-mapped
+            if size == 0:
+                return len(re.findall(self.pattern, b""))
+
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as corpus:
+                chunks = self._chunks(corpus, size)
+                tasks = [(self.pattern, start, end, endpos, self.head_limit) for start, end, endpos in chunks]
+
+                if self.workers == 1 or len(chunks) == 1:
+                    global _corpus
+                    _corpus = corpus
+                    results = [_scan_chunk(*task) for task in tasks]
+                    _corpus = None
+                else:
+                    results = self._scan_in_pool(tasks)
+
+                # Merge the counts, correcting chunks whose start was overrun by the previous match
+                total = 0
+                carry = 0
+                for result, (_, _, endpos) in zip(results, chunks):
+                    count, last_end = result[2], result[4]
+                    if carry > result[0]:
+                        count, last_end = self._rescan(corpus, carry, result, endpos)
+                    total += count
+                    if last_end is not None:
+                        carry = last_end
+                return total
+
+    def benchmark(self, max_workers=None):
+        """
+        Times the match count at 1..max_workers workers and reports the speedup over a single worker.
+
+        Parameters:
+        - max_workers (int, optional): Largest number of workers. Defaults to the number of CPUs.
+
+        Returns:
+        - list[dict]: Workers, matches, elapsed seconds and speedup of each run.
+        """
+        max_workers = max_workers or os.cpu_count() or 1
+        workers = self.workers
+        results = []
+        try:
+            for n in range(1, max_workers + 1):
+                self.workers = n
+                start_time = time.perf_counter()
+                matches = self.count()
+                elapsed = time.perf_counter() - start_time
+                results.append({
+                    "workers": n,
+                    "matches": matches,
+                    "seconds": elapsed,
+                    "speedup": results[0]["seconds"] / elapsed if results else 1.0
+                })
+                print(f"Workers: {n} - Matches: {matches} - Time: {elapsed:.3f}s - Speedup: {results[-1]['speedup']:.2f}x")
+        finally:
+            self.workers = workers
+        return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time parallel Python regex matching at 1..N workers.")
+    parser.add_argument("--corpus", required=True, help="Path to the corpus file.")
+    parser.add_argument("--pattern", required=True, help="Regex pattern to be used for matching.")
+    parser.add_argument("--max-workers", type=int, default=None, help="Largest number of workers to time.")
+    args = parser.parse_args()
+
+    ParallelRegexEngine(corpus=args.corpus, pattern=args.pattern).benchmark(args.max_workers)
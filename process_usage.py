@@ -0,0 +1,175 @@
+import glob
+import os
+import sys
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, where process usage is not collected
+    resource = None
+
+class ProcessUsage:
+    """
+    Class to collect the resource usage of a regex engine process: its peak resident memory, user and system
+    CPU time, voluntary and involuntary context switches, and minor and major page faults.
+
+    The usage of a generated engine is taken from the kernel's accounting of reaped child processes, the
+    difference of 'resource.getrusage(RUSAGE_CHILDREN)' around the run, because the engine driver's event loop
+    reaps the process itself and the engine is the driver's only child. This is the accounting 'os.wait4' reports.
+    While the engine is alive it is also sampled from '/proc/<pid>' on Linux, which gives its peak resident
+    memory when an earlier, larger child hides it from the kernel's peak. The usage of the in-process Python
+    engines is taken from 'resource.getrusage' too.
+    """
+
+    # Keys of a usage dictionary, as stored with the results of a run
+    keys = ("peak_rss_bytes", "user_cpu_ns", "system_cpu_ns", "voluntary_context_switches",
+            "involuntary_context_switches", "minor_page_faults", "major_page_faults")
+
+    @staticmethod
+    def read_proc(pid, proc_root="/proc"):
+        """
+        Read the usage of a live process from the proc filesystem. CPU time and page faults cover all threads
+        of the process, context switches the threads that are still running.
+
+        Parameters:
+        - pid (int): Process id.
+        - proc_root (str): Mount point of the proc filesystem, a fake tree can be given for testing.
+
+        Returns:
+        - dict: The usage, see 'keys', or None when the process no longer exists or there is no proc filesystem.
+          The peak resident memory is left out once the process has exited.
+        """
+        directory = os.path.join(proc_root, str(pid))
+        try:
+            with open(os.path.join(directory, "stat"), "r") as f:
+                # The command name can contain spaces and parentheses, the fields follow its closing parenthesis
+                fields = f.read().rsplit(")", 1)[1].split()
+            with open(os.path.join(directory, "status"), "r") as f:
+                status = ProcessUsage._parse_status(f.read())
+            voluntary = involuntary = 0
+            for path in glob.glob(os.path.join(directory, "task", "*", "status")):
+                with open(path, "r") as f:
+                    task = ProcessUsage._parse_status(f.read())
+                voluntary += task.get("voluntary_ctxt_switches", 0)
+                involuntary += task.get("nonvoluntary_ctxt_switches", 0)
+        except (FileNotFoundError, ProcessLookupError, IndexError):
+            return None
+
+        ticks_ns = 1e9 / os.sysconf("SC_CLK_TCK")
+        usage = {
+            "user_cpu_ns": int(int(fields[11]) * ticks_ns),
+            "system_cpu_ns": int(int(fields[12]) * ticks_ns),
+            "voluntary_context_switches": voluntary or status.get("voluntary_ctxt_switches", 0),
+            "involuntary_context_switches": involuntary or status.get("nonvoluntary_ctxt_switches", 0),
+            "minor_page_faults": int(fields[7]),
+            "major_page_faults": int(fields[9])
+        }
+        # A process that exited but was not yet waited for has released its memory and reports no peak
+        if "VmHWM" in status:
+            usage["peak_rss_bytes"] = status["VmHWM"] * 1024
+        return usage
+
+    @staticmethod
+    def _parse_status(text):
+        """
+        Get the numeric fields of a '/proc/<pid>/status' file, memory fields in kB.
+        """
+        status = {}
+        for line in text.splitlines():
+            name, _, value = line.partition(":")
+            value = value.split()
+            if value and value[0].isdigit():
+                status[name] = int(value[0])
+        return status
+
+    @staticmethod
+    def snapshot(include_children=False):
+        """
+        Take a snapshot of the resource usage of this process, to measure an in-process engine.
+
+        Parameters:
+        - include_children (bool): Add the usage of child processes that have been waited for, such as
+          the workers of a process pool.
+
+        Returns:
+        - list: The 'resource.struct_rusage' of this process and, when included, its children.
+          Empty where resource usage is not available.
+        """
+        if resource is None:
+            return []
+        who = [resource.RUSAGE_SELF] + ([resource.RUSAGE_CHILDREN] if include_children else [])
+        return [resource.getrusage(w) for w in who]
+
+    @staticmethod
+    def since(before):
+        """
+        Get the usage since a snapshot. Counters are the difference with the snapshot, the peak resident
+        memory is the peak of this process, or of its largest child, so far.
+
+        Parameters:
+        - before (list): Snapshot taken with 'snapshot'.
+
+        Returns:
+        - dict: The usage, see 'keys', or None where resource usage is not available.
+        """
+        if not before:
+            return None
+        after = ProcessUsage.snapshot(include_children=len(before) > 1)
+        usage = ProcessUsage._difference(before, after)
+        usage["peak_rss_bytes"] = max(a.ru_maxrss for a in after) * ProcessUsage._rss_unit()
+        return usage
+
+    @staticmethod
+    def children_snapshot():
+        """
+        Take a snapshot of the resource usage of the child processes of this process that have been reaped.
+
+        Returns:
+        - list: The 'resource.struct_rusage' of the reaped children, empty where resource usage is not available.
+        """
+        if resource is None:
+            return []
+        return [resource.getrusage(resource.RUSAGE_CHILDREN)]
+
+    @staticmethod
+    def reaped_since(before):
+        """
+        Get the usage of the child processes reaped since a snapshot, such as an engine process. The kernel only
+        keeps the peak resident memory of the largest child, so the peak is left out when it did not grow.
+
+        Parameters:
+        - before (list): Snapshot taken with 'children_snapshot'.
+
+        Returns:
+        - dict: The usage, see 'keys', or None where resource usage is not available.
+        """
+        if not before:
+            return None
+        after = ProcessUsage.children_snapshot()
+        usage = ProcessUsage._difference(before, after)
+        del usage["peak_rss_bytes"]
+        if after[0].ru_maxrss > before[0].ru_maxrss:
+            usage["peak_rss_bytes"] = after[0].ru_maxrss * ProcessUsage._rss_unit()
+        return usage
+
+    @staticmethod
+    def _rss_unit():
+        """
+        Get the unit of 'ru_maxrss' in bytes, Linux reports kilobytes and macOS bytes.
+        """
+        return 1 if sys.platform == "darwin" else 1024
+
+    @staticmethod
+    def _difference(before, after):
+        """
+        Get the difference of the counters of two snapshots, with a peak resident memory of 0.
+        """
+        usage = dict.fromkeys(ProcessUsage.keys, 0)
+        for b, a in zip(before, after):
+            usage["user_cpu_ns"] += int((a.ru_utime - b.ru_utime) * 1e9)
+            usage["system_cpu_ns"] += int((a.ru_stime - b.ru_stime) * 1e9)
+            usage["voluntary_context_switches"] += a.ru_nvcsw - b.ru_nvcsw
+            usage["involuntary_context_switches"] += a.ru_nivcsw - b.ru_nivcsw
+            usage["minor_page_faults"] += a.ru_minflt - b.ru_minflt
+            usage["major_page_faults"] += a.ru_majflt - b.ru_majflt
+        return usage
@@ -0,0 +1,208 @@
+import glob
+import os
+import re
+import subprocess
+import numpy as np
+import pandas as pd
+from measurement_backend import MeasurementBackend
+from ring_buffer_sampler import RingBufferSampler
+
+class RaplDomain:
+    """
+    One RAPL energy counter of the Linux powercap framework, such as a CPU package.
+    The counter is reported in microjoules and wraps around at 'max_energy_range_uj'.
+    """
+
+    def __init__(self, path):
+        """
+        Initialize the domain from its sysfs directory.
+
+        Parameters:
+        - path (str): Directory of the domain, e.g. '/sys/class/powercap/intel-rapl:0'.
+        """
+        self.path = path
+        self.name = self._read("name")
+        self.max_energy_range_uj = int(self._read("max_energy_range_uj"))
+        self.energy_path = os.path.join(path, "energy_uj")
+
+    def _read(self, attribute):
+        with open(os.path.join(self.path, attribute), "r") as f:
+            return f.read().strip()
+
+    def joules(self, energy_uj):
+        """
+        Convert raw counter readings to the energy used since the first reading. A reading that is lower
+        than the previous one means the counter wrapped around once, which the sampling interval must be
+        short enough to ensure.
+
+        Parameters:
+        - energy_uj (np.ndarray): Counter readings in microjoules, in the order they were taken.
+
+        Returns:
+        - np.ndarray: Cumulative energy in Joules, starting at 0.
+        """
+        deltas = np.diff(energy_uj.astype(np.int64), prepend=energy_uj[:1])
+        deltas[deltas < 0] += self.max_energy_range_uj
+        return np.cumsum(deltas) / 1e6
+
+class RaplExecutor(MeasurementBackend):
+    """
+    A class to measure energy on Linux by reading the RAPL counters of the powercap framework in sysfs,
+    without an external binary or a service. The counters of all CPU packages and, when present, of their
+    DRAM are sampled while the task runs, together with the CPU frequencies and the used memory, and written
+    in the CSV schema of EnergiBridge.
+
+    Samples are taken at 1 kHz by default into a preallocated ring buffer (see RingBufferSampler), which is
+    only converted and written after the task ended. The raw samples are also saved next to the CSV file as
+    a compressed '.samples.npz' file.
+
+    Reading 'energy_uj' requires read access to the counters, which recent kernels only grant to root
+    by default (e.g. 'sudo chmod o+r /sys/class/powercap/intel-rapl:*/energy_uj').
+    """
+
+    # Top-level domains are CPU packages, their subdomains cores, uncore and DRAM
+    package_pattern = re.compile(r"^intel-rapl:\d+$")
+    subdomain_pattern = re.compile(r"^intel-rapl:\d+:\d+$")
+
+    def __init__(self, powercap_root="/sys/class/powercap", interval_ms=1.0, buffer_seconds=900,
+                 cpufreq_root="/sys/devices/system/cpu/cpufreq", meminfo_path="/proc/meminfo"):
+        """
+        Initializes the executor with the sysfs tree to read and the sampling interval.
+
+        Parameters:
+        - powercap_root (str): Directory of the powercap framework, a fake tree can be given for testing.
+        - interval_ms (float): Milliseconds between two samples.
+        - buffer_seconds (float): Seconds of samples the ring buffer holds, older samples of longer tasks are overwritten.
+        - cpufreq_root (str): Directory of the CPU frequency policies, frequencies are left out when it does not exist.
+        - meminfo_path (str): Path of the kernel's memory statistics, memory is left out when it does not exist.
+        """
+        self.powercap_root = powercap_root
+        self.interval_ms = interval_ms
+        self.buffer_seconds = buffer_seconds
+        self.cpufreq_root = cpufreq_root
+        self.meminfo_path = meminfo_path
+
+    def find_domains(self):
+        """
+        Finds the package and DRAM domains of the RAPL counters.
+
+        Returns:
+        - dict[str, list[RaplDomain]]: The domains by CSV column, "PACKAGE_ENERGY (J)" and, when present, "DRAM_ENERGY (J)".
+        """
+        domains = {"PACKAGE_ENERGY (J)": [], "DRAM_ENERGY (J)": []}
+        for path in sorted(glob.glob(os.path.join(self.powercap_root, "intel-rapl*"))):
+            directory = os.path.basename(path)
+            if self.package_pattern.match(directory):
+                domains["PACKAGE_ENERGY (J)"].append(RaplDomain(path))
+            elif self.subdomain_pattern.match(directory):
+                domain = RaplDomain(path)
+                if domain.name == "dram":
+                    domains["DRAM_ENERGY (J)"].append(domain)
+
+        if not domains["PACKAGE_ENERGY (J)"]:
+            raise RuntimeError(f"No RAPL package domains found in {self.powercap_root}.")
+        return {column: found for column, found in domains.items() if found}
+
+    def find_frequency_files(self):
+        """
+        Finds the current frequency file of each CPU frequency policy.
+
+        Returns:
+        - list[str]: Paths of the 'scaling_cur_freq' files, which hold the frequency in kHz.
+        """
+        policies = glob.glob(os.path.join(self.cpufreq_root, "policy*", "scaling_cur_freq"))
+        return sorted(policies, key=lambda path: int(re.search(r"policy(\d+)", path).group(1)))
+
+    def create_sampler(self, domains):
+        """
+        Creates the ring buffer sampler for the RAPL domains, the CPU frequencies and the memory.
+
+        Parameters:
+        - domains (dict[str, list[RaplDomain]]): The domains by CSV column, see 'find_domains'.
+
+        Returns:
+        - RingBufferSampler: The sampler, with one column per domain path and per frequency file.
+        """
+        files = {domain.path: domain.energy_path for found in domains.values() for domain in found}
+        files.update({path: path for path in self.find_frequency_files()})
+        capacity = int(self.buffer_seconds * 1000 / self.interval_ms) + 2
+        meminfo_path = self.meminfo_path if os.path.exists(self.meminfo_path) else None
+        return RingBufferSampler(files, interval_ms=self.interval_ms, capacity=capacity, meminfo_path=meminfo_path)
+
+    def to_dataframe(self, domains, sampler):
+        """
+        Converts the samples to the columns of EnergiBridge: 'Delta' (milliseconds since the previous sample),
+        'Time' (milliseconds since the epoch), the cumulative energy per column of domains, 'CPU_FREQUENCY_<n>'
+        in MHz per frequency policy and 'USED_MEMORY' in bytes. Unlike EnergiBridge, the times keep their
+        fraction of a millisecond, as rounding them at 1 kHz would turn the power between samples into noise.
+
+        Parameters:
+        - domains (dict[str, list[RaplDomain]]): The domains by CSV column, see 'find_domains'.
+        - sampler (RingBufferSampler): The stopped sampler.
+
+        Returns:
+        - pd.DataFrame: One row per sample.
+        """
+        samples = sampler.samples()
+        column = {name: index for index, name in enumerate(sampler.columns)}
+        time_ms = samples[:, 0] / 1e6
+        df = pd.DataFrame({"Delta": np.diff(time_ms, prepend=time_ms[:1]), "Time": time_ms})
+        for name, found in domains.items():
+            df[name] = sum(domain.joules(samples[:, column[domain.path]]) for domain in found)
+        for policy, path in enumerate(self.find_frequency_files()):
+            df[f"CPU_FREQUENCY_{policy}"] = samples[:, column[path]] / 1000
+        if "USED_MEMORY_KB" in column:
+            df["USED_MEMORY"] = samples[:, column["USED_MEMORY_KB"]] * 1024
+        return df
+
+    def measure(self, command, output_file):
+        """
+        Runs a command while sampling the RAPL counters, and writes the samples to a CSV file with the
+        columns of EnergiBridge, see 'to_dataframe'. The raw samples are saved next to it as a '.samples.npz' file.
+
+        Parameters:
+        - command (str): The command to run in the system shell.
+        - output_file (str): Path of the CSV file to write.
+
+        Returns:
+        - tuple: (seconds the command ran (float), Joules the packages used (float), output of the command (str))
+        """
+        domains = self.find_domains()
+        sampler = self.create_sampler(domains)
+        sampler.start()
+        try:
+            result = subprocess.run(command, shell=True, capture_output=True, text=True)
+        finally:
+            sampler.stop()
+
+        # Nothing is converted or written while the command runs
+        if sampler.overwritten:
+            print(f"The ring buffer was full, the first {sampler.overwritten} samples were overwritten.")
+        sampler.save(os.path.splitext(output_file)[0] + ".samples.npz")
+        df = self.to_dataframe(domains, sampler)
+        df.to_csv(output_file, index=False)
+
+        if result.returncode != 0:
+            print(f"Error executing command: {command}\n{result.stderr}")
+        energy = df["PACKAGE_ENERGY (J)"]
+        return (df["Time"].iloc[-1] - df["Time"].iloc[0]) / 1000, energy.iloc[-1] - energy.iloc[0], result.stdout.strip()
+
+    def run_measurement(self, corpus, engine, pattern, output_file="results/results.csv", **options):
+        """
+        Runs the RAPL measurement and stores the results in the specified output file.
+        The structured results of the engine, with its phase timings, are stored next to it as a JSON file.
+
+        Parameters:
+        - corpus (str): Path to the text corpus file.
+        - engine (str): Regex engine to use for matching.
+        - pattern (str): Regex pattern to be matched.
+        - output_file (str, optional): Path where measurement results will be stored. Default is "results/results.csv".
+        - options: Extra options of the task, such as 'workers', 'iterations', 'warmup', the run budgets and 'pattern_catalogue'.
+        """
+        print("Running measurement...")
+        result_file = os.path.splitext(output_file)[0] + ".json"
+        command = self._regex_matching_command(corpus, engine, pattern, "match", result_file=result_file, **options)
+        seconds, joules, output = self.measure(command, output_file)
+        print(output)
+        print(f"Energy consumption in joules: {joules:.4f} for {seconds:.4f} sec of execution.")
+        print("Measurement complete.")
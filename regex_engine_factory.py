@@ -2,17 +2,40 @@ import os
 import shutil
 
 class RegexEngineFactory:
-    def __init__(self, regular_expressions: list[str], directory_to_store_engines: str = 'regex_engines', filepath_to_corpus: str = 'data/test_corpus.txt'):
+    # Dictionary to map the engine name to the method that creates its source file
+    engine_creators = {
+        "engine_java": "_create_java_engine",
+        "engine_js": "_create_javascript_engine",
+        "engine_cpp": "_create_boost_engine",
+        "engine_dotnet": "_create_dotnet_engine"
+    }
+
+    # Dictionary to map the engine name to the source file it is stored in
+    engine_sources = {
+        "engine_java": "RegexMatcher.java",
+        "engine_js": "regex_matcher.js",
+        "engine_cpp": "regex_matcher.cpp",
+        "engine_dotnet": "RegexMatcher.cs"
+    }
+
+    # Match modes of the engines, "count" counts matches one at a time without keeping them,
+    # "collect" builds the runtime's collection of all matches first, as a naive implementation would
+    match_modes = ("count", "collect")
+
+    def __init__(self, regular_expressions: list[str], directory_to_store_engines: str = 'regex_engines', filepath_to_corpus: str = 'data/test_corpus.txt', match_mode: str = 'count'):
+        if match_mode not in self.match_modes:
+            raise ValueError(f"Unknown match mode: {match_mode}")
         self.regular_expressions = regular_expressions
         self.directory_to_store_engines = directory_to_store_engines
         self.filepath_to_corpus = filepath_to_corpus
+        self.match_mode = match_mode
 
     def create_engines(self):
         """
         Create all the engines that will be used to evaluate the matches,
         the engines will be stored as files in the 'self.directory_to_store_engines' directory.
-        The different engines will run the 'regular_expressions' list of matches against the 
-        'filepath_to_corpus' file.
+        The engines are generic: the corpus and a file with the patterns are passed on the command line,
+        see 'engine_arguments'. The 'regular_expressions' list is written to that patterns file.
         """
         if not os.path.exists(self.directory_to_store_engines):
             os.makedirs(self.directory_to_store_engines)
@@ -25,54 +48,226 @@ class RegexEngineFactory:
         self._create_javascript_engine()
         self._create_boost_engine()
         self._create_dotnet_engine()
+        self.write_patterns_file()
+
+    @property
+    def patterns_file(self):
+        """
+        Path to the file with the patterns to match, one per line.
+        """
+        return f"{self.directory_to_store_engines}/patterns.txt"
+
+    def write_patterns_file(self):
+        """
+        Write the 'regular_expressions' list to the patterns file, one pattern per line.
+
+        Returns:
+        - str: Path to the patterns file.
+        """
+        for pattern in self.regular_expressions:
+            if "\n" in pattern or "\r" in pattern or not pattern:
+                raise ValueError(f"Patterns must be non-empty and cannot contain line breaks: {pattern!r}")
+        os.makedirs(self.directory_to_store_engines, exist_ok=True)
+        with open(self.patterns_file, "w", encoding="utf-8", newline="\n") as f:
+            f.write("".join(f"{pattern}\n" for pattern in self.regular_expressions))
+        return self.patterns_file
+
+    def engine_arguments(self):
+        """
+        Get the command-line arguments that make an engine match the 'regular_expressions' list
+        against the 'filepath_to_corpus' file in the 'match_mode' mode.
+
+        Returns:
+        - list[str]: The match mode option, the corpus path and the patterns file path.
+        """
+        return [f"--mode={self.match_mode}", self.filepath_to_corpus, self.patterns_file]
+
+    def create_engine(self, engine):
+        """
+        Create only the source file of one engine in the 'self.directory_to_store_engines' directory.
+
+        Parameters:
+        - engine (str): Name of the regex engine.
+
+        Returns:
+        - str: Path to the created source file.
+        """
+        if engine not in self.engine_creators:
+            raise ValueError(f"No generated regex engine for: {engine}")
+        os.makedirs(self.directory_to_store_engines, exist_ok=True)
+        getattr(self, self.engine_creators[engine])()
+        return f"{self.directory_to_store_engines}/{self.engine_sources[engine]}"
     
     def _create_java_engine(self):
         java_code = f"""
 import java.io.*;
+import java.lang.management.ManagementFactory;
+import java.lang.management.MemoryPoolMXBean;
+import java.lang.management.MemoryType;
+import java.nio.charset.StandardCharsets;
+import java.nio.file.Files;
+import java.nio.file.Paths;
 import java.util.regex.*;
+import java.util.ArrayList;
 import java.util.List;
 import java.util.Arrays;
 
 public class RegexMatcher {{
+    // The loaded corpus, and its load record until it has been reported
+    private static String corpusPath;
+    private static String corpus;
+    private static long corpusBytes;
+    private static String loadRecord;
+
     public static void main(String[] args) throws IOException {{
+        // In worker mode the process serves jobs until "exit" or the end of input
+        boolean worker = Arrays.asList(args).contains("--worker");
+        // In collect mode all matches are kept in a list, by default they are only counted
+        boolean collect = Arrays.asList(args).contains("--mode=collect");
+        List<String> positional = new ArrayList<>();
+        for (String arg : args) {{
+            if (!arg.startsWith("--")) {{
+                positional.add(arg);
+            }}
+        }}
+        if (positional.size() < 2) {{
+            System.err.println("Usage: RegexMatcher [--worker] [--iterations=N] [--warmup=N] [--mode=count|collect] <corpus> <patterns_file>");
+            System.exit(1);
+        }}
+        // Each pattern is compiled and matched warmup + iterations times, warm-up iterations are numbered from -warmup
+        int iterations = intOption(args, "--iterations=", 1);
+        int warmup = intOption(args, "--warmup=", 0);
+
         // Load corpus first
-        String corpus = readFile("{self.filepath_to_corpus}");
-        List<String> patterns = Arrays.asList({", ".join(f'"{pattern.replace("\\", "\\\\")}"' for pattern in self.regular_expressions)});
-        
+        loadCorpus(positional.get(0));
+        List<String> patterns = readPatterns(positional.get(1));
+
         // Signal ready
         System.out.println("ready");
-        
-        // Wait for start signal
+
+        // Wait for start signal, "start<TAB>corpus<TAB>pattern" runs a job on another corpus and pattern
         BufferedReader reader = new BufferedReader(new InputStreamReader(System.in));
-        reader.readLine();  // Wait for any input
-        
-        // Perform regex matching
+        String line;
+        while ((line = reader.readLine()) != null) {{
+            if (worker && line.equals("exit")) {{
+                break;
+            }}
+            String[] job = line.split("\\t", 3);
+            List<String> jobPatterns = patterns;
+            if (job.length == 3) {{
+                if (!job[1].equals(corpusPath)) {{
+                    loadCorpus(job[1]);
+                }}
+                jobPatterns = Arrays.asList(job[2]);
+            }}
+
+            // Report the corpus load once, with the first job on that corpus
+            if (loadRecord != null) {{
+                System.out.println(loadRecord);
+                loadRecord = null;
+            }}
+            matchPatterns(corpus, corpusBytes, jobPatterns, iterations, warmup, collect);
+
+            // Signal completion
+            System.out.println("done");
+            if (!worker) {{
+                break;
+            }}
+        }}
+    }}
+
+    private static void matchPatterns(String corpus, long corpusBytes, List<String> patterns, int iterations, int warmup, boolean collect) {{
+        // Perform regex matching, reporting each phase as a JSON line with monotonic nanosecond timestamps
         for (int i = 0; i < patterns.size(); i++) {{
             String pattern = patterns.get(i);
-            Pattern compiledPattern = Pattern.compile(pattern);
-            Matcher matcher = compiledPattern.matcher(corpus);
-            int count = 0;
-            while (matcher.find()) {{
-                count++;
+            for (int iteration = -warmup; iteration < iterations; iteration++) {{
+                resetPeakHeap();
+                long compileStart = System.nanoTime();
+                Pattern compiledPattern = Pattern.compile(pattern);
+                long compileEnd = System.nanoTime();
+                Matcher matcher = compiledPattern.matcher(corpus);
+                List<String> matches = collect ? new ArrayList<>() : null;
+                int count = 0;
+                while (matcher.find()) {{
+                    if (collect) {{
+                        matches.add(matcher.group());
+                    }}
+                    count++;
+                }}
+                long matchEnd = System.nanoTime();
+                System.out.println("{{\\"phase\\": \\"match\\", \\"index\\": " + i + ", \\"iteration\\": " + iteration
+                    + ", \\"pattern\\": " + jsonString(pattern) + ", \\"matches\\": " + count + ", \\"bytes\\": " + corpusBytes
+                    + ", \\"compile_start_ns\\": " + compileStart + ", \\"compile_end_ns\\": " + compileEnd
+                    + ", \\"match_end_ns\\": " + matchEnd + ", \\"peak_memory_bytes\\": " + peakHeap() + "}}");
             }}
-            System.out.println("Pattern " + i + ": " + pattern + " - Matches: " + count);
         }}
-        
-        // Signal completion
-        System.out.println("done");
     }}
 
-    private static String readFile(String filepath) {{
-        StringBuilder content = new StringBuilder();
-        try (BufferedReader reader = new BufferedReader(new FileReader(filepath))) {{
-            String line;
-            while ((line = reader.readLine()) != null) {{
-                content.append(line).append("\\n");
+    private static void resetPeakHeap() {{
+        for (MemoryPoolMXBean pool : ManagementFactory.getMemoryPoolMXBeans()) {{
+            if (pool.getType() == MemoryType.HEAP) {{
+                pool.resetPeakUsage();
+            }}
+        }}
+    }}
+
+    private static long peakHeap() {{
+        // Peak use of the heap since the last reset, the JVM does not expose its resident memory portably
+        long peak = 0;
+        for (MemoryPoolMXBean pool : ManagementFactory.getMemoryPoolMXBeans()) {{
+            if (pool.getType() == MemoryType.HEAP) {{
+                peak += pool.getPeakUsage().getUsed();
+            }}
+        }}
+        return peak;
+    }}
+
+    private static int intOption(String[] args, String prefix, int defaultValue) {{
+        for (String arg : args) {{
+            if (arg.startsWith(prefix)) {{
+                return Integer.parseInt(arg.substring(prefix.length()));
+            }}
+        }}
+        return defaultValue;
+    }}
+
+    private static void loadCorpus(String path) throws IOException {{
+        // Read the file in one bulk read, then decode it once, so line endings are kept and no copy is made per line
+        // The previous corpus is released first, so two corpora are never held at once
+        corpus = null;
+        long startNs = System.nanoTime();
+        byte[] data = Files.readAllBytes(Paths.get(path));
+        long readEndNs = System.nanoTime();
+        corpus = new String(data, StandardCharsets.UTF_8);
+        corpusPath = path;
+        corpusBytes = data.length;
+        loadRecord = "{{\\"phase\\": \\"load\\", \\"corpus\\": " + jsonString(corpusPath) + ", \\"bytes\\": " + corpusBytes
+            + ", \\"start_ns\\": " + startNs + ", \\"read_end_ns\\": " + readEndNs + ", \\"end_ns\\": " + System.nanoTime() + "}}";
+    }}
+
+    private static String jsonString(String value) {{
+        StringBuilder json = new StringBuilder("\\"");
+        for (char c : value.toCharArray()) {{
+            if (c == '"' || c == '\\\\') {{
+                json.append('\\\\').append(c);
+            }} else if (c < 0x20) {{
+                json.append(String.format("\\\\u%04x", (int) c));
+            }} else {{
+                json.append(c);
+            }}
+        }}
+        return json.append('"').toString();
+    }}
+
+    private static List<String> readPatterns(String filepath) throws IOException {{
+        // One pattern per line
+        List<String> patterns = new ArrayList<>();
+        for (String pattern : Files.readAllLines(Paths.get(filepath), StandardCharsets.UTF_8)) {{
+            if (!pattern.isEmpty()) {{
+                patterns.add(pattern);
             }}
-        }} catch (IOException e) {{
-            e.printStackTrace();
         }}
-        return content.toString();
+        return patterns;
     }}
 }}"""
         
@@ -86,28 +281,111 @@ public class RegexMatcher {{
         """
         js_code = f"""
 const fs = require('fs');
+const readline = require('readline');
+
+// In worker mode the process serves jobs until "exit" or the end of input
+const args = process.argv.slice(2);
+const worker = args.includes('--worker');
+// In collect mode all matches are kept in an array, by default they are only counted
+const collect = args.includes('--mode=collect');
+const positional = args.filter((arg) => !arg.startsWith('--'));
+if (positional.length < 2) {{
+    console.error('Usage: node regex_matcher.js [--worker] [--iterations=N] [--warmup=N] [--mode=count|collect] <corpus> <patterns_file>');
+    process.exit(1);
+}}
+// Each pattern is compiled and matched warmup + iterations times, warm-up iterations are numbered from -warmup
+function intOption(prefix, defaultValue) {{
+    const arg = args.find((arg) => arg.startsWith(prefix));
+    return arg === undefined ? defaultValue : parseInt(arg.slice(prefix.length), 10);
+}}
+const iterations = intOption('--iterations=', 1);
+const warmup = intOption('--warmup=', 0);
+
+// Timestamps are monotonic nanoseconds, BigInts are interpolated into the JSON lines to keep their precision
+let corpusPath;
+let corpus;
+let corpusBytes;
+let loadRecord;
+function loadCorpus(path) {{
+    // Read the file into a Buffer in one bulk read, then decode it once, RegExp only matches strings
+    corpus = undefined;
+    const start = process.hrtime.bigint();
+    const data = fs.readFileSync(path);
+    const readEnd = process.hrtime.bigint();
+    corpus = data.toString('utf8');
+    corpusPath = path;
+    corpusBytes = data.length;
+    const end = process.hrtime.bigint();
+    loadRecord = `{{"phase": "load", "corpus": ${{JSON.stringify(corpusPath)}}, "bytes": ${{corpusBytes}}, "start_ns": ${{start}}, "read_end_ns": ${{readEnd}}, "end_ns": ${{end}}}}`;
+}}
 
 // Load corpus first
-const corpus = fs.readFileSync('{self.filepath_to_corpus}', 'utf8');
-const patterns = [{", ".join(f'"{pattern.replace("\\", "\\\\")}"' for pattern in self.regular_expressions)}];
+loadCorpus(positional[0]);
+// One pattern per line
+const patterns = fs.readFileSync(positional[1], 'utf8').split(/\\r?\\n/).filter((pattern) => pattern.length > 0);
 
-// Signal ready
-console.log('ready');
+function countMatches(regex, corpus) {{
+    // Count matches one at a time, each match object is garbage as soon as the next one is found
+    let count = 0;
+    let match;
+    while ((match = regex.exec(corpus)) !== null) {{
+        count++;
+        // Step over empty matches like String.prototype.match does
+        if (match[0].length === 0) {{
+            regex.lastIndex++;
+        }}
+    }}
+    return count;
+}}
 
-// Wait for start signal
-process.stdin.resume();
-process.stdin.once('data', () => {{
-    // Perform regex matching
+function matchPatterns(corpus, patterns) {{
+    // Perform regex matching, reporting each phase as a JSON line
     patterns.forEach((pattern, i) => {{
-        const regex = new RegExp(pattern, 'g');
-        const matches = corpus.match(regex) || [];
-        console.log(`Pattern ${{i}}: ${{pattern}} - Matches: ${{matches.length}}`);
+        for (let iteration = -warmup; iteration < iterations; iteration++) {{
+            const compileStart = process.hrtime.bigint();
+            const regex = new RegExp(pattern, 'g');
+            const compileEnd = process.hrtime.bigint();
+            const count = collect ? (corpus.match(regex) || []).length : countMatches(regex, corpus);
+            const matchEnd = process.hrtime.bigint();
+            // Peak resident memory of the process so far, V8 does not track the peak of its heap
+            const peakMemory = process.resourceUsage().maxRSS * 1024;
+            console.log(`{{"phase": "match", "index": ${{i}}, "iteration": ${{iteration}}, "pattern": ${{JSON.stringify(pattern)}}, "matches": ${{count}}, "bytes": ${{corpusBytes}}, "compile_start_ns": ${{compileStart}}, "compile_end_ns": ${{compileEnd}}, "match_end_ns": ${{matchEnd}}, "peak_memory_bytes": ${{peakMemory}}}}`);
+        }}
     }});
+}}
+
+// Signal ready
+console.log('ready');
+
+// Wait for start signal, "start<TAB>corpus<TAB>pattern" runs a job on another corpus and pattern
+const input = readline.createInterface({{ input: process.stdin }});
+input.on('line', (line) => {{
+    if (worker && line === 'exit') {{
+        process.exit(0);
+    }}
+    const job = line.split('\\t');
+    let jobPatterns = patterns;
+    if (job.length >= 3) {{
+        if (job[1] !== corpusPath) {{
+            loadCorpus(job[1]);
+        }}
+        jobPatterns = [job.slice(2).join('\\t')];
+    }}
+
+    // Report the corpus load once, with the first job on that corpus
+    if (loadRecord !== null) {{
+        console.log(loadRecord);
+        loadRecord = null;
+    }}
+    matchPatterns(corpus, jobPatterns);
 
     // Signal completion
     console.log('done');
-    process.exit(0);
+    if (!worker) {{
+        process.exit(0);
+    }}
 }});
+input.on('close', () => process.exit(0));
 """
         
         with open(f"{self.directory_to_store_engines}/regex_matcher.js", "w") as f:
@@ -120,47 +398,207 @@ process.stdin.once('data', () => {{
         """
         cpp_code = f"""
 #include <boost/regex.hpp>
+#include <chrono>
+#include <cstdio>
 #include <iostream>
 #include <fstream>
 #include <sstream>
 #include <string>
 #include <vector>
+#ifdef _WIN32
+#define NOMINMAX
+#include <windows.h>
+#include <psapi.h>
+#else
+#include <sys/resource.h>
+#endif
+
+long long now_ns() {{
+    // Monotonic nanosecond timestamp
+    return std::chrono::duration_cast<std::chrono::nanoseconds>(std::chrono::steady_clock::now().time_since_epoch()).count();
+}}
+
+std::string json_string(const std::string& value) {{
+    std::ostringstream json;
+    json << '"';
+    for (unsigned char c : value) {{
+        if (c == '"' || c == '\\\\') {{
+            json << '\\\\' << c;
+        }} else if (c < 0x20) {{
+            char escaped[7];
+            std::snprintf(escaped, sizeof(escaped), "\\\\u%04x", c);
+            json << escaped;
+        }} else {{
+            json << c;
+        }}
+    }}
+    json << '"';
+    return json.str();
+}}
 
 std::string read_file(const std::string& filepath) {{
+    // Read the whole file in binary mode into a string sized up front, one bulk read without copies
+    std::ifstream file(filepath, std::ios::binary | std::ios::ate);
+    if (!file) {{
+        return std::string();
+    }}
+    std::string content(static_cast<size_t>(file.tellg()), '\\0');
+    file.seekg(0);
+    file.read(&content[0], static_cast<std::streamsize>(content.size()));
+    return content;
+}}
+
+std::vector<std::string> read_patterns(const std::string& filepath) {{
+    // One pattern per line
     std::ifstream file(filepath);
-    std::stringstream buffer;
-    buffer << file.rdbuf();
-    return buffer.str();
+    std::vector<std::string> patterns;
+    std::string pattern;
+    while (std::getline(file, pattern)) {{
+        if (!pattern.empty() && pattern.back() == '\\r') {{
+            pattern.pop_back();
+        }}
+        if (!pattern.empty()) {{
+            patterns.push_back(pattern);
+        }}
+    }}
+    return patterns;
+}}
+
+std::string load_record(const std::string& corpus_path, size_t corpus_bytes, long long start_ns, long long end_ns) {{
+    // Boost matches the bytes as they are read, so the load has no decoding step and the read ends with it
+    std::ostringstream record;
+    record << "{{\\"phase\\": \\"load\\", \\"corpus\\": " << json_string(corpus_path) << ", \\"bytes\\": " << corpus_bytes
+           << ", \\"start_ns\\": " << start_ns << ", \\"read_end_ns\\": " << end_ns << ", \\"end_ns\\": " << end_ns << "}}";
+    return record.str();
+}}
+
+long long peak_memory_bytes() {{
+    // Peak resident memory of the process so far
+#ifdef _WIN32
+    PROCESS_MEMORY_COUNTERS counters;
+    K32GetProcessMemoryInfo(GetCurrentProcess(), &counters, sizeof(counters));
+    return static_cast<long long>(counters.PeakWorkingSetSize);
+#else
+    struct rusage usage;
+    getrusage(RUSAGE_SELF, &usage);
+#ifdef __APPLE__
+    return usage.ru_maxrss;
+#else
+    return usage.ru_maxrss * 1024LL;
+#endif
+#endif
+}}
+
+int int_option(int argc, char* argv[], const std::string& prefix, int default_value) {{
+    for (int i = 1; i < argc; ++i) {{
+        std::string arg(argv[i]);
+        if (arg.rfind(prefix, 0) == 0) {{
+            return std::stoi(arg.substr(prefix.size()));
+        }}
+    }}
+    return default_value;
+}}
+
+void match_patterns(const std::string& corpus, const std::vector<std::string>& patterns, int iterations, int warmup, bool collect) {{
+    // Perform regex matching, reporting each phase as a JSON line
+    for (size_t i = 0; i < patterns.size(); ++i) {{
+        for (int iteration = -warmup; iteration < iterations; ++iteration) {{
+            long long compile_start = now_ns();
+            boost::regex pattern(patterns[i]);
+            long long compile_end = now_ns();
+            boost::sregex_iterator it(corpus.begin(), corpus.end(), pattern);
+            boost::sregex_iterator end;
+            std::vector<std::string> matches;
+            int count = 0;
+            while(it != end) {{
+                if (collect) {{
+                    matches.push_back(it->str());
+                }}
+                count++;
+                ++it;
+            }}
+            long long match_end = now_ns();
+            std::cout << "{{\\"phase\\": \\"match\\", \\"index\\": " << i << ", \\"iteration\\": " << iteration
+                      << ", \\"pattern\\": " << json_string(patterns[i]) << ", \\"matches\\": " << count << ", \\"bytes\\": " << corpus.size()
+                      << ", \\"compile_start_ns\\": " << compile_start << ", \\"compile_end_ns\\": " << compile_end
+                      << ", \\"match_end_ns\\": " << match_end << ", \\"peak_memory_bytes\\": " << peak_memory_bytes() << "}}" << std::endl;
+        }}
+    }}
 }}
 
-int main() {{
+int main(int argc, char* argv[]) {{
+    // In worker mode the process serves jobs until "exit" or the end of input
+    bool worker = false;
+    // In collect mode all matches are kept in a vector, by default they are only counted
+    bool collect = false;
+    std::vector<std::string> positional;
+    for (int i = 1; i < argc; ++i) {{
+        std::string arg(argv[i]);
+        if (arg == "--worker") {{
+            worker = true;
+        }} else if (arg == "--mode=collect") {{
+            collect = true;
+        }} else if (arg.rfind("--", 0) != 0) {{
+            positional.push_back(arg);
+        }}
+    }}
+    if (positional.size() < 2) {{
+        std::cerr << "Usage: regex_matcher [--worker] [--iterations=N] [--warmup=N] [--mode=count|collect] <corpus> <patterns_file>" << std::endl;
+        return 1;
+    }}
+    // Each pattern is compiled and matched warmup + iterations times, warm-up iterations are numbered from -warmup
+    int iterations = int_option(argc, argv, "--iterations=", 1);
+    int warmup = int_option(argc, argv, "--warmup=", 0);
+
     // Load corpus first
-    std::string corpus = read_file("{self.filepath_to_corpus}");
-    std::vector<std::string> patterns = {{{", ".join(f'"{pattern.replace("\\", "\\\\")}"' for pattern in self.regular_expressions)}}};
-    
+    std::string corpus_path = positional[0];
+    long long load_start = now_ns();
+    std::string corpus = read_file(corpus_path);
+    std::string pending_load_record = load_record(corpus_path, corpus.size(), load_start, now_ns());
+    std::vector<std::string> patterns = read_patterns(positional[1]);
+
     // Signal ready
     std::cout << "ready" << std::endl;
     
-    // Wait for start signal
-    std::string _;
-    std::getline(std::cin, _);
-    
-    // Perform regex matching
-    for (size_t i = 0; i < patterns.size(); ++i) {{
-        boost::regex pattern(patterns[i]);
-        boost::sregex_iterator it(corpus.begin(), corpus.end(), pattern);
-        boost::sregex_iterator end;
-        int count = 0;
-        while(it != end) {{
-            count++;
-            ++it;
+    // Wait for start signal, "start<TAB>corpus<TAB>pattern" runs a job on another corpus and pattern
+    std::string line;
+    while (std::getline(std::cin, line)) {{
+        if (!line.empty() && line.back() == '\\r') {{
+            line.pop_back();
+        }}
+        if (worker && line == "exit") {{
+            break;
+        }}
+        size_t first_tab = line.find('\\t');
+        size_t second_tab = first_tab == std::string::npos ? std::string::npos : line.find('\\t', first_tab + 1);
+        std::vector<std::string> job_patterns = patterns;
+        if (second_tab != std::string::npos) {{
+            std::string job_corpus_path = line.substr(first_tab + 1, second_tab - first_tab - 1);
+            if (job_corpus_path != corpus_path) {{
+                corpus_path = job_corpus_path;
+                // Release the previous corpus first, so two corpora are never held at once
+                std::string().swap(corpus);
+                load_start = now_ns();
+                corpus = read_file(corpus_path);
+                pending_load_record = load_record(corpus_path, corpus.size(), load_start, now_ns());
+            }}
+            job_patterns = {{line.substr(second_tab + 1)}};
+        }}
+
+        // Report the corpus load once, with the first job on that corpus
+        if (!pending_load_record.empty()) {{
+            std::cout << pending_load_record << std::endl;
+            pending_load_record.clear();
+        }}
+        match_patterns(corpus, job_patterns, iterations, warmup, collect);
+
+        // Signal completion
+        std::cout << "done" << std::endl;
+        if (!worker) {{
+            break;
         }}
-        std::cout << "Pattern " << i << ": " << patterns[i] << " - Matches: " << count << std::endl;
     }}
     
-    // Signal completion
-    std::cout << "done" << std::endl;
-    
     return 0;
 }}"""
         
@@ -174,33 +612,171 @@ int main() {{
         """
         cs_code = f"""
 using System;
+using System.Diagnostics;
 using System.IO;
+using System.Text;
 using System.Text.RegularExpressions;
 
 public class RegexMatcher
 {{
     public static void Main(string[] args)
     {{
+        // In worker mode the process serves jobs until "exit" or the end of input
+        bool worker = Array.IndexOf(args, "--worker") >= 0;
+        // In collect mode all matches are kept in a MatchCollection, by default they are only counted
+        bool collect = Array.IndexOf(args, "--mode=collect") >= 0;
+        string[] positional = Array.FindAll(args, arg => !arg.StartsWith("--"));
+        if (positional.Length < 2)
+        {{
+            Console.Error.WriteLine("Usage: RegexMatcher [--worker] [--iterations=N] [--warmup=N] [--mode=count|collect] <corpus> <patterns_file>");
+            Environment.Exit(1);
+        }}
+        // Each pattern is compiled and matched warmup + iterations times, warm-up iterations are numbered from -warmup
+        int iterations = IntOption(args, "--iterations=", 1);
+        int warmup = IntOption(args, "--warmup=", 0);
+
         // Load corpus first
-        string corpus = File.ReadAllText("{self.filepath_to_corpus}");
-        string[] patterns = new string[] {{ {", ".join(f'"{pattern.replace("\\", "\\\\")}"' for pattern in self.regular_expressions)} }};
+        string corpusPath = positional[0];
+        string corpus;
+        long corpusBytes;
+        string loadRecord = LoadCorpus(corpusPath, out corpus, out corpusBytes);
+        // One pattern per line
+        string[] patterns = Array.FindAll(File.ReadAllLines(positional[1]), pattern => pattern.Length > 0);
 
         // Signal ready
         Console.WriteLine("ready");
 
-        // Wait for start signal
-        Console.ReadLine();
+        // Wait for start signal, "start<TAB>corpus<TAB>pattern" runs a job on another corpus and pattern
+        string line;
+        while ((line = Console.ReadLine()) != null)
+        {{
+            if (worker && line == "exit")
+            {{
+                break;
+            }}
+            string[] job = line.Split(new char[] {{ '\\t' }}, 3);
+            string[] jobPatterns = patterns;
+            if (job.Length == 3)
+            {{
+                if (job[1] != corpusPath)
+                {{
+                    corpusPath = job[1];
+                    // Release the previous corpus first, so two corpora are never held at once
+                    corpus = null;
+                    loadRecord = LoadCorpus(corpusPath, out corpus, out corpusBytes);
+                }}
+                jobPatterns = new string[] {{ job[2] }};
+            }}
+
+            // Report the corpus load once, with the first job on that corpus
+            if (loadRecord != null)
+            {{
+                Console.WriteLine(loadRecord);
+                loadRecord = null;
+            }}
+            MatchPatterns(corpus, corpusBytes, jobPatterns, iterations, warmup, collect);
 
-        // Perform regex matching
+            // Signal completion
+            Console.WriteLine("done");
+            if (!worker)
+            {{
+                break;
+            }}
+        }}
+    }}
+
+    private static void MatchPatterns(string corpus, long corpusBytes, string[] patterns, int iterations, int warmup, bool collect)
+    {{
+        // Perform regex matching, reporting each phase as a JSON line
         for (int i = 0; i < patterns.Length; i++)
         {{
             string pattern = patterns[i];
-            var matches = Regex.Matches(corpus, pattern);
-            Console.WriteLine("Pattern " + i + ": " + pattern + " - Matches: " + matches.Count);
+            for (int iteration = -warmup; iteration < iterations; iteration++)
+            {{
+                long compileStart = NowNs();
+                var regex = new Regex(pattern);
+                long compileEnd = NowNs();
+                int count = collect ? regex.Matches(corpus).Count : CountMatches(regex, corpus);
+                long matchEnd = NowNs();
+                Console.WriteLine("{{\\"phase\\": \\"match\\", \\"index\\": " + i + ", \\"iteration\\": " + iteration
+                    + ", \\"pattern\\": " + JsonString(pattern) + ", \\"matches\\": " + count + ", \\"bytes\\": " + corpusBytes
+                    + ", \\"compile_start_ns\\": " + compileStart + ", \\"compile_end_ns\\": " + compileEnd
+                    + ", \\"match_end_ns\\": " + matchEnd + ", \\"peak_memory_bytes\\": " + PeakMemoryBytes() + "}}");
+            }}
         }}
+    }}
 
-        // Signal completion
-        Console.WriteLine("done");
+    private static int CountMatches(Regex regex, string corpus)
+    {{
+        // Count matches one at a time, each Match is garbage as soon as the next one is found.
+        // Regex.Count would avoid the Match objects too, but is not available before .NET 7
+        int count = 0;
+        for (Match match = regex.Match(corpus); match.Success; match = match.NextMatch())
+        {{
+            count++;
+        }}
+        return count;
+    }}
+
+    private static long PeakMemoryBytes()
+    {{
+        // Peak resident memory of the process so far, the GC does not track the peak of its heap
+        using (Process process = Process.GetCurrentProcess())
+        {{
+            return process.PeakWorkingSet64;
+        }}
+    }}
+
+    private static int IntOption(string[] args, string prefix, int defaultValue)
+    {{
+        foreach (string arg in args)
+        {{
+            if (arg.StartsWith(prefix))
+            {{
+                return int.Parse(arg.Substring(prefix.Length));
+            }}
+        }}
+        return defaultValue;
+    }}
+
+    private static long NowNs()
+    {{
+        // Monotonic nanosecond timestamp, split to avoid overflowing the multiplication
+        long ticks = Stopwatch.GetTimestamp();
+        return ticks / Stopwatch.Frequency * 1000000000L + ticks % Stopwatch.Frequency * 1000000000L / Stopwatch.Frequency;
+    }}
+
+    private static string LoadCorpus(string corpusPath, out string corpus, out long corpusBytes)
+    {{
+        // Read the file in one bulk read, then decode it once, and return its load record
+        long startNs = NowNs();
+        byte[] data = File.ReadAllBytes(corpusPath);
+        long readEndNs = NowNs();
+        corpus = Encoding.UTF8.GetString(data);
+        corpusBytes = data.Length;
+        return "{{\\"phase\\": \\"load\\", \\"corpus\\": " + JsonString(corpusPath) + ", \\"bytes\\": " + corpusBytes
+            + ", \\"start_ns\\": " + startNs + ", \\"read_end_ns\\": " + readEndNs + ", \\"end_ns\\": " + NowNs() + "}}";
+    }}
+
+    private static string JsonString(string value)
+    {{
+        var json = new StringBuilder("\\"");
+        foreach (char c in value)
+        {{
+            if (c == '"' || c == '\\\\')
+            {{
+                json.Append('\\\\').Append(c);
+            }}
+            else if (c < 0x20)
+            {{
+                json.Append("\\\\u").Append(((int)c).ToString("x4"));
+            }}
+            else
+            {{
+                json.Append(c);
+            }}
+        }}
+        return json.Append('"').ToString();
     }}
 }}
 """
@@ -1,32 +1,91 @@
 import argparse
+import json
 import pickle
+import time
 from run_regex_engines import RegexEnginesExecutor
+from engine_driver import EngineTimeoutError
 
 class RegexRunner:
     """
     A class to manage the execution of regex matching using different regex engines.
     """
 
-    def __init__(self, corpus, engine, pattern, save_state_path="regex_engine_state.pkl"):
+    def __init__(self, corpus, engine, pattern, workers=None, iterations=1, warmup=0, time_budget=None, cpu_budget=None, pattern_catalogue=None, match_mode="count", save_state_path="regex_engine_state.pkl"):
         """
         Initializes the RegexRunner with the specified corpus, engine, and pattern.
         
         Parameters:
         - corpus (str): Path to the text corpus file.
         - engine (str): Name of the regex engine to be used.
-        - pattern (str): Regex pattern to be matched.
+        - pattern (str): Regex pattern to be matched, None when a pattern catalogue is given.
+        - workers (int, optional): Number of worker processes for the parallel Python engine.
+        - iterations (int, optional): Number of measured iterations of the pattern within the engine process.
+        - warmup (int, optional): Number of warm-up iterations before the measured ones.
+        - time_budget (float, optional): Wall-clock seconds the matching may take before it is stopped as a timeout.
+        - cpu_budget (float, optional): CPU seconds the matching may use before it is stopped as a timeout.
+        - pattern_catalogue (dict[str, str], optional): Batch of patterns by label, matched by one engine process
+          on one corpus load instead of the single pattern.
+        - match_mode (str, optional): "count" to count matches one at a time, "collect" to build the collection of all matches.
         - save_state_path (str, optional): Path to save the engine state.
         """
         self.corpus = corpus
         self.engine = engine
         self.pattern = pattern
+        self.workers = workers
+        self.iterations = iterations
+        self.warmup = warmup
+        self.time_budget = time_budget
+        self.cpu_budget = cpu_budget
+        self.pattern_catalogue = pattern_catalogue
+        self.match_mode = match_mode
         self.save_state_path = save_state_path
         self.regex_engine_executor = RegexEnginesExecutor(
             regex_engine=self.engine,
             corpus=self.corpus,
-            pattern=self.pattern
+            pattern=self.pattern,
+            workers=self.workers,
+            iterations=self.iterations,
+            warmup=self.warmup,
+            job_timeout=self.time_budget,
+            cpu_timeout=self.cpu_budget,
+            patterns=list(pattern_catalogue.values()) if pattern_catalogue else None,
+            match_mode=self.match_mode
         )
 
+    @staticmethod
+    def load_pattern_catalogue(path):
+        """
+        Loads a pattern catalogue from a JSON file that maps labels to patterns.
+
+        Parameters:
+        - path (str): Path to the JSON file.
+
+        Returns:
+        - dict[str, str]: The patterns by label, in the order of the file.
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            catalogue = json.load(f)
+        if not isinstance(catalogue, dict) or not catalogue:
+            raise ValueError(f"Pattern catalogue must map labels to patterns: {path}")
+        return catalogue
+
+    @staticmethod
+    def startup_ns(elapsed_ns, results):
+        """
+        Computes the time of a run spent outside the engine's own load, compile and match phases,
+        which is mostly the start-up and shutdown of its runtime.
+
+        Parameters:
+        - elapsed_ns (int): Duration of the whole run in nanoseconds.
+        - results (list[dict]): Structured results of the engine.
+
+        Returns:
+        - int: The remaining nanoseconds, at least 0.
+        """
+        phases_ns = sum(result["load_ns"] or 0 for result in results)
+        phases_ns += sum(iteration["compile_ns"] + iteration["match_ns"] for result in results for iteration in result["iterations"])
+        return max(0, elapsed_ns - phases_ns)
+
     def setup_engine(self):
         """
         Sets up the regex engine and saves its state for future use.
@@ -40,9 +99,16 @@ class RegexRunner:
 
         print(f"Regex engine setup completed and saved to {self.save_state_path}.")
 
-    def run_matching(self):
+    def run_matching(self, result_file=None):
         """
-        Loads the saved regex engine state and runs pattern matching.
+        Loads the saved regex engine state and runs pattern matching. A run that exceeds its time or CPU
+        budget is stopped and recorded with the outcome "timeout" and the results it reported until then.
+        For a pattern catalogue, each result is labelled with the label of its pattern. The wall-clock times
+        of the engine's ready, start and done signals are saved too, so the energy of the matching window
+        can be separated from that of the whole process, and so is the resource usage of the engine process.
+
+        Parameters:
+        - result_file (str, optional): Path to save the structured results of the engine to as JSON.
         """
         try:
             # Load the saved state of the regex engine
@@ -50,6 +116,12 @@ class RegexRunner:
                 self.regex_engine_executor = pickle.load(f)
         except FileNotFoundError:
             raise RuntimeError("Regex engine has not been set up. Run with --setup first.")
+
+        # Budgets given for this run take precedence over the ones saved at setup
+        if self.time_budget is not None:
+            self.regex_engine_executor.job_timeout = self.time_budget
+        if self.cpu_budget is not None:
+            self.regex_engine_executor.cpu_timeout = self.cpu_budget
         
          # Get the method name for the regex engine execution
         method_name = RegexEnginesExecutor.engine_methods.get(self.engine)
@@ -57,27 +129,70 @@ class RegexRunner:
             raise ValueError(f"Unknown regex engine: {self.engine}")
         
         # Run the regex matching using the retrieved method name
-        output = getattr(self.regex_engine_executor, method_name)()
-        print("Found matches:", output)
+        start_time = time.monotonic_ns()
+        try:
+            output = getattr(self.regex_engine_executor, method_name)()
+            outcome = "ok"
+            # The full results go to the result file, the measured process only prints a summary
+            print(f"Found matches: {sum(result['matches'] for result in output)} for {len(output)} patterns")
+        except EngineTimeoutError as error:
+            # In-process engines report their results directly, generated engines as output lines
+            output = error.results if error.results is not None else RegexEnginesExecutor.parse_engine_output(error.output_lines)
+            outcome = "timeout"
+            print(f"Timeout: {error}")
+        elapsed_ns = time.monotonic_ns() - start_time
+
+        if self.pattern_catalogue:
+            labels = list(self.pattern_catalogue)
+            for result in output:
+                result["label"] = labels[result["index"]]
+
+        if result_file is not None:
+            with open(result_file, "w") as f:
+                json.dump({
+                    "corpus": self.corpus,
+                    "engine": self.engine,
+                    "match_mode": self.match_mode,
+                    "pattern": self.pattern,
+                    "pattern_catalogue": self.pattern_catalogue,
+                    "outcome": outcome,
+                    "elapsed_ns": elapsed_ns,
+                    "startup_ns": self.startup_ns(elapsed_ns, output),
+                    "signals": self.regex_engine_executor.signal_times,
+                    "process": self.regex_engine_executor.process_usage,
+                    "results": output
+                }, f, indent=2)
 
 if __name__ == "__main__":
     # Set up argument parser for command-line interaction
     parser = argparse.ArgumentParser(description="Run regex matching with a chosen regex engine.")
     parser.add_argument("--corpus", required=True, help="Path to the corpus file.")
     parser.add_argument("--engine", required=True, help="Name of the regex engine.")
-    parser.add_argument("--pattern", required=True, help="Regex pattern to be used for matching.")
+    patterns = parser.add_mutually_exclusive_group(required=True)
+    patterns.add_argument("--pattern", help="Regex pattern to be used for matching.")
+    patterns.add_argument("--pattern-catalogue", help="JSON file mapping labels to patterns, matched as one batch.")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes for the parallel Python engine.")
+    parser.add_argument("--iterations", type=int, default=1, help="Number of measured iterations of the pattern within the engine process.")
+    parser.add_argument("--warmup", type=int, default=0, help="Number of warm-up iterations before the measured ones.")
+    parser.add_argument("--time-budget", type=float, default=None, help="Wall-clock seconds the matching may take before it is recorded as a timeout.")
+    parser.add_argument("--cpu-budget", type=float, default=None, help="CPU seconds the matching may use before it is recorded as a timeout.")
+    parser.add_argument("--match-mode", choices=["count", "collect"], default="count", help="Count matches one at a time, or collect all matches first.")
     parser.add_argument("--setup", action="store_true", help="Initialize the regex engine.")
     parser.add_argument("--match", action="store_true", help="Run regex matching.")
+    parser.add_argument("--result-file", default=None, help="Path to save the structured results of the matching to as JSON.")
 
     args = parser.parse_args()
 
     # Instantiate the RegexRunner with provided arguments
-    runner = RegexRunner(corpus=args.corpus, engine=args.engine, pattern=args.pattern)
+    runner = RegexRunner(corpus=args.corpus, engine=args.engine, pattern=args.pattern, workers=args.workers, iterations=args.iterations, warmup=args.warmup,
+                         time_budget=args.time_budget, cpu_budget=args.cpu_budget,
+                         pattern_catalogue=RegexRunner.load_pattern_catalogue(args.pattern_catalogue) if args.pattern_catalogue else None,
+                         match_mode=args.match_mode)
 
     # Handle setup and matching operations based on command-line arguments
     if args.setup:
         runner.setup_engine()
     elif args.match:
-        runner.run_matching()
+        runner.run_matching(result_file=args.result_file)
     else:
         print("Please provide --setup or --match.")
@@ -0,0 +1,125 @@
+import os
+import threading
+import time
+import numpy as np
+
+class RingBufferSampler:
+    """
+    Class to poll integer counters, such as RAPL energy counters and CPU frequencies in sysfs, at a high rate
+    into a preallocated ring buffer, and optionally the used memory from '/proc/meminfo'.
+
+    The sampler keeps its files open and re-reads them with 'os.pread', and stores raw integers in a NumPy
+    array allocated up front. While it runs, it does not allocate buffers, convert units or write files, so
+    it adds as little CPU time and energy of its own as possible to the measurement. When the buffer is full,
+    the oldest samples are overwritten. Samples are only converted and saved after 'stop'.
+    """
+
+    def __init__(self, files, interval_ms=1.0, capacity=1000000, meminfo_path=None):
+        """
+        Initialize the sampler with the files to poll.
+
+        Parameters:
+        - files (dict[str, str]): Path of a file holding one integer, by column name.
+        - interval_ms (float): Milliseconds between two samples, 1 polls at 1 kHz.
+        - capacity (int): Number of samples the ring buffer holds.
+        - meminfo_path (str, optional): Path of '/proc/meminfo' to add a "USED_MEMORY_KB" column, which is
+          the total memory minus the available memory.
+        """
+        self.files = files
+        self.interval_ms = interval_ms
+        self.capacity = capacity
+        self.meminfo_path = meminfo_path
+        self.columns = ["TIME_NS"] + list(files) + (["USED_MEMORY_KB"] if meminfo_path else [])
+        self.buffer = np.zeros((capacity, len(self.columns)), dtype=np.int64)
+        self.count = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._fds = []
+        self._meminfo_fd = None
+
+    @staticmethod
+    def _parse_meminfo(data):
+        """
+        Get the used memory in kB from the contents of '/proc/meminfo'.
+        """
+        total = int(data[data.index(b"MemTotal:") + 9:].split(None, 1)[0])
+        available = int(data[data.index(b"MemAvailable:") + 13:].split(None, 1)[0])
+        return total - available
+
+    def _sample(self):
+        """
+        Take one sample into the next row of the ring buffer.
+        """
+        row = self.buffer[self.count % self.capacity]
+        row[0] = time.time_ns()
+        for column, fd in enumerate(self._fds, 1):
+            row[column] = int(os.pread(fd, 32, 0))
+        if self._meminfo_fd is not None:
+            row[-1] = self._parse_meminfo(os.pread(self._meminfo_fd, 4096, 0))
+        self.count += 1
+
+    def _poll(self):
+        """
+        Take samples on a fixed schedule until stopped. Samples that are missed because the sampler
+        was not scheduled in time are skipped rather than taken in a burst.
+        """
+        interval_ns = int(self.interval_ms * 1e6)
+        next_sample = time.monotonic_ns() + interval_ns
+        while not self._stop.wait((next_sample - time.monotonic_ns()) / 1e9):
+            self._sample()
+            next_sample += interval_ns
+            now = time.monotonic_ns()
+            if next_sample < now:
+                next_sample = now + interval_ns - (now - next_sample) % interval_ns
+
+    def start(self):
+        """
+        Open the files, take the first sample and start polling them in a background thread.
+        """
+        self.count = 0
+        self._stop.clear()
+        self._fds = [os.open(path, os.O_RDONLY) for path in self.files.values()]
+        self._meminfo_fd = os.open(self.meminfo_path, os.O_RDONLY) if self.meminfo_path else None
+        self._sample()
+        self._thread = threading.Thread(target=self._poll, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop polling, take the last sample and close the files.
+        """
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        for fd in self._fds + ([self._meminfo_fd] if self._meminfo_fd is not None else []):
+            os.close(fd)
+        self._fds = []
+        self._meminfo_fd = None
+
+    @property
+    def overwritten(self):
+        """
+        Number of samples that were overwritten because the ring buffer was full.
+        """
+        return max(0, self.count - self.capacity)
+
+    def samples(self):
+        """
+        Get the samples in the order they were taken.
+
+        Returns:
+        - np.ndarray: One row per sample, with a column per name in 'columns'.
+        """
+        if self.count <= self.capacity:
+            return self.buffer[:self.count].copy()
+        start = self.count % self.capacity
+        return np.concatenate([self.buffer[start:], self.buffer[:start]])
+
+    def save(self, path):
+        """
+        Save the samples and their column names to a compact NumPy file.
+
+        Parameters:
+        - path (str): Path of the '.npz' file to write.
+        """
+        np.savez_compressed(path, columns=np.array(self.columns), samples=self.samples())
@@ -1,9 +1,26 @@
 from regex_engine_factory import RegexEngineFactory
-import subprocess
+from parallel_regex_engine import ParallelRegexEngine
+from engine_build_cache import EngineBuildCache
+from engine_driver import EngineDriver, EngineTimeoutError
+from run_watchdog import RunWatchdog
+from process_usage import ProcessUsage
+import contextlib
+import json
 import re
 import os
+import mmap
+import pickle
+import sys
+import tempfile
+import time
 from dotenv import load_dotenv
 
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, where the Python engine does not report its peak memory
+    resource = None
+
 class RegexEnginesExecutor:
     """
     Class to execute the different regex engines.
@@ -14,223 +31,424 @@ class RegexEnginesExecutor:
         "engine_java": "run_java_engine",
         "engine_js": "run_javascript_engine",
         "engine_cpp": "run_boost_engine",
-        "engine_dotnet": "run_dotnet_engine"
+        "engine_dotnet": "run_dotnet_engine",
+        "engine_python": "run_python_engine",
+        "engine_python_parallel": "run_python_parallel_engine"
     }
 
-    def __init__(self, regex_engine, corpus, pattern):
+    # Engines that run in-process and therefore need no generated source or compilation
+    in_process_engines = {"engine_python", "engine_python_parallel"}
+
+    # Set in the child process of an in-process engine that runs in isolation, see '_run_isolated'
+    isolated = False
+
+    def __init__(self, regex_engine, corpus, pattern, workers=None, iterations=1, warmup=0, pattern_timeout=None, job_timeout=None, cpu_timeout=None, patterns=None, match_mode="count"):
         """
         Initialize the class with the regex engine to use, the corpus file and the pattern to match.
+        A batch of patterns can be given as 'patterns' instead. They are matched one after the other by the same
+        engine process, so the runtime start-up and the corpus load are paid once for the whole batch.
+        In the "count" match mode matches are counted one at a time, in the "collect" mode the runtime's
+        collection of all matches is built first. The parallel Python engine only counts.
+        The number of workers is only used by the parallel Python engine, and defaults to the number of CPUs.
+        Within one process, the pattern is compiled and matched 'warmup' times before 'iterations' measured times.
+        The timeouts, in seconds, bound one iteration of the pattern and the wall-clock and CPU time of the whole
+        job. A run that exceeds them raises an EngineTimeoutError.
         """
+        if iterations < 1 or warmup < 0:
+            raise ValueError("At least one iteration is needed, and warm-up iterations cannot be negative.")
+        if match_mode not in RegexEngineFactory.match_modes:
+            raise ValueError(f"Unknown match mode: {match_mode}")
+        if match_mode != "count" and regex_engine == "engine_python_parallel":
+            raise ValueError("The parallel Python engine only supports the count match mode.")
         self.regex_engine = regex_engine
         self.corpus = corpus
         self.pattern = pattern
+        self.patterns = list(patterns) if patterns else [pattern]
+        self.workers = workers
+        self.iterations = iterations
+        self.warmup = warmup
+        self.pattern_timeout = pattern_timeout
+        self.job_timeout = job_timeout
+        self.cpu_timeout = cpu_timeout
+        self.match_mode = match_mode
+        # Wall-clock times of the ready, start and done signals of the last run, see 'EngineDriver.run'
+        self.signal_times = {}
+        # Resource usage of the engine process during the last run, see 'ProcessUsage'
+        self.process_usage = {}
 
     def setUp(self):
         """
-        Set up the regex engines.
+        Set up the regex engine of this executor. Only its source is generated, and it is only compiled
+        when no cached build of the same source and compiler flags exists. The patterns are written to a
+        patterns file that is passed at runtime, so one build serves every pattern and corpus.
         """
+        if self.regex_engine in self.in_process_engines:
+            return
+
         self.factory = RegexEngineFactory(
-            regular_expressions=[self.pattern],
+            regular_expressions=self.patterns,
             directory_to_store_engines="regex_engines",
-            filepath_to_corpus=self.corpus
-        )
-        self.factory.create_engines()
-
-        # Load the Boost path from the environment
-        load_dotenv()
-        boost_path = os.getenv("BOOST_PATH")
-        if not boost_path:
-            raise RuntimeError("BOOST_PATH environment variable not set.")
-
-        # Compile C++ code
-        compile_result_boost = subprocess.run([
-            "g++",
-            f"{self.factory.directory_to_store_engines}/regex_matcher.cpp",
-            "-o", f"{self.factory.directory_to_store_engines}/regex_matcher.exe",
-            f"-I{boost_path}/include",
-            f"-L{boost_path}/lib",
-            "-Wl,-rpath," + boost_path + "/bin",
-            "-lboost_regex-vc143-mt-x64-1_86",  # Exact library name without 'lib' prefix and '.dll.a' suffix
-            "--verbose"
-        ], capture_output=True, text=True)
-        
-        # Check if compilation was successful
-        if compile_result_boost.returncode != 0:
-            print("Library path contents:")
-            subprocess.run(["dir", f"{boost_path}/lib"], shell=True)
-            raise RuntimeError(f"C++ compilation failed:\n{compile_result_boost.stderr}")
-        
-        # Compile the C# code using csc
-        compile_result_dotnet = subprocess.run(
-            ["csc",
-             "-out:"
-             + os.path.abspath(f"{self.factory.directory_to_store_engines}/RegexMatcher.exe"),
-             os.path.abspath(f"{self.factory.directory_to_store_engines}/RegexMatcher.cs")],
-            capture_output=True,
-            text=True
+            filepath_to_corpus=self.corpus,
+            match_mode=self.match_mode
         )
-        
-        # Check if compilation was successful
-        if compile_result_dotnet.returncode != 0:
-            raise RuntimeError(f".NET compilation failed:\n{compile_result_dotnet.stderr}")
+        source_path = self.factory.create_engine(self.regex_engine)
+        self.factory.write_patterns_file()
+        self.build_dir = EngineBuildCache().build(self.regex_engine, source_path, self.build_command())
+
+    def build_command(self, engine=None):
+        """
+        Get the command that compiles a generated regex engine, with '{source}' and '{output_dir}' placeholders.
+
+        Parameters:
+        - engine (str, optional): Name of the regex engine. Defaults to the executor's engine.
+
+        Returns:
+        - list[str]: The command and its arguments, empty when the engine needs no compilation.
+        """
+        engine = engine or self.regex_engine
+        if engine == "engine_java":
+            return ["javac", "-d", "{output_dir}", "{source}"]
+        if engine == "engine_js":
+            return []
+        if engine == "engine_cpp":
+            # Load the Boost path from the environment
+            load_dotenv()
+            boost_path = os.getenv("BOOST_PATH")
+            if not boost_path:
+                raise RuntimeError("BOOST_PATH environment variable not set.")
+            return [
+                "g++",
+                "{source}",
+                "-o", "{output_dir}/regex_matcher.exe",
+                f"-I{boost_path}/include",
+                f"-L{boost_path}/lib",
+                "-Wl,-rpath," + boost_path + "/bin",
+                "-lboost_regex-vc143-mt-x64-1_86",  # Exact library name without 'lib' prefix and '.dll.a' suffix
+                "--verbose"
+            ]
+        if engine == "engine_dotnet":
+            return ["csc", "-out:{output_dir}/RegexMatcher.exe", "{source}"]
+        raise ValueError(f"No generated regex engine for: {engine}")
 
     def tearDown(self):
         """
         Tear down the regex engines.
         """
-        self.factory.destroy_engines()
+        if self.regex_engine not in self.in_process_engines:
+            self.factory.destroy_engines()
+
+    def engine_command(self, engine=None):
+        """
+        Get the command that starts a generated regex engine on the executor's corpus and patterns.
+
+        Parameters:
+        - engine (str, optional): Name of the regex engine. Defaults to the executor's engine.
+
+        Returns:
+        - list[str]: The command and its arguments.
+        """
+        engine = engine or self.regex_engine
+        directory = self.build_dir
+        commands = {
+            "engine_java": ["java", "-cp", directory, "RegexMatcher"],
+            "engine_js": ["node", f"{directory}/regex_matcher.js"],
+            "engine_cpp": [f"{directory}/regex_matcher.exe"],
+            "engine_dotnet": [f"{directory}/RegexMatcher.exe"]
+        }
+        if engine not in commands:
+            raise ValueError(f"No generated regex engine for: {engine}")
+        return commands[engine] + [f"--iterations={self.iterations}", f"--warmup={self.warmup}"] + self.factory.engine_arguments()
+
+    @staticmethod
+    def summarise_iterations(index, pattern, matches, bytes_scanned, load_ns, iterations, read_ns=None):
+        """
+        Combine the iterations of one pattern into its result.
+
+        Parameters:
+        - index (int): Index of the pattern in the job.
+        - pattern (str): The pattern.
+        - matches (int): Number of matches of the pattern.
+        - bytes_scanned (int): Size of the corpus in bytes.
+        - load_ns (int): Duration of the corpus load, or None when the corpus was already loaded.
+        - iterations (list[dict]): Per iteration its number, compile and match durations in nanoseconds, and
+          optionally the peak memory of the engine in bytes. Warm-up iterations have a negative number.
+        - read_ns (int, optional): Part of the corpus load spent reading the file, the rest is spent decoding it.
+
+        Returns:
+        - dict: The result, whose compile and match durations are the means over the iterations that are not warm-up,
+          and whose peak memory is the highest of all iterations, or None when the engine does not report it.
+        """
+        measured = [iteration for iteration in iterations if iteration["iteration"] >= 0] or iterations
+        peak_memory = [iteration["peak_memory_bytes"] for iteration in iterations if iteration.get("peak_memory_bytes") is not None]
+        return {
+            "index": index,
+            "pattern": pattern,
+            "matches": matches,
+            "bytes_scanned": bytes_scanned,
+            "load_ns": load_ns,
+            "read_ns": read_ns,
+            "compile_ns": sum(iteration["compile_ns"] for iteration in measured) / len(measured),
+            "match_ns": sum(iteration["match_ns"] for iteration in measured) / len(measured),
+            "peak_memory_bytes": max(peak_memory) if peak_memory else None,
+            "iterations": iterations
+        }
+
+    @staticmethod
+    def parse_engine_output(output_lines):
+        """
+        Parse the JSON lines a generated engine prints for a job into one result per pattern.
+        A "load" line reports the corpus load, split into the bulk read of the file and its decoding,
+        and precedes the first job on that corpus. Each "match" line reports the compile and match phases
+        of one iteration of a pattern. Timestamps are monotonic nanoseconds of the engine's own clock.
+
+        Parameters:
+        - output_lines (list[str]): Lines printed between the start signal and "done".
+
+        Returns:
+        - list[dict]: Per pattern its index, pattern, matches, bytes scanned, the duration in nanoseconds
+          of the load and of its read (only reported with the first pattern after it, None otherwise), the mean compile and match durations over
+          the iterations that are not warm-up, and the durations of every iteration.
+        """
+        load = None
+        records = {}
+        for line in output_lines:
+            record = json.loads(line)
+            if record["phase"] == "load":
+                load = record
+            elif record["phase"] == "match":
+                records.setdefault(record["index"], []).append(record)
+
+        results = []
+        for index, pattern_records in records.items():
+            iterations = [{
+                "iteration": record.get("iteration", 0),
+                "compile_ns": record["compile_end_ns"] - record["compile_start_ns"],
+                "match_ns": record["match_end_ns"] - record["compile_end_ns"],
+                "peak_memory_bytes": record.get("peak_memory_bytes")
+            } for record in pattern_records]
+            last = pattern_records[-1]
+            first = load is not None and not results
+            results.append(RegexEnginesExecutor.summarise_iterations(
+                index, last["pattern"], last["matches"], last["bytes"],
+                load["end_ns"] - load["start_ns"] if first else None, iterations,
+                load["read_end_ns"] - load["start_ns"] if first and "read_end_ns" in load else None
+            ))
+        return results
+
+    def engine_driver(self):
+        """
+        Create an engine driver with the executor's deadlines.
+
+        Returns:
+        - EngineDriver: The driver.
+        """
+        return EngineDriver(pattern_timeout=self.pattern_timeout, job_timeout=self.job_timeout, cpu_timeout=self.cpu_timeout)
+
+    def _run_generated_engine(self, engine):
+        """
+        Run a generated regex engine once on the executor's corpus and patterns, with the executor's deadlines.
+        An engine that misses a deadline is killed and raises an EngineTimeoutError.
+
+        Parameters:
+        - engine (str): Name of the regex engine.
+
+        Returns:
+        - list[dict]: Structured results, see 'parse_engine_output'.
+        """
+        driver = self.engine_driver()
+        # Signal times are filled in as they happen, so a run that times out keeps the ones it reached
+        self.signal_times = {}
+        self.process_usage = {}
+        output_lines = driver.run_sync(self.engine_command(engine), signal_times=self.signal_times, usage=self.process_usage)
+        return self.parse_engine_output(output_lines)
+
+    @staticmethod
+    def peak_memory_bytes():
+        """
+        Get the peak resident memory of this process so far.
+
+        Returns:
+        - int: The peak in bytes, or None where it is not available.
+        """
+        if resource is None:
+            return None
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes
+        return peak if sys.platform == "darwin" else peak * 1024
+
+    @contextlib.contextmanager
+    def _record_usage(self, usage_start):
+        """
+        Context manager that records the resource usage of an in-process engine since a snapshot when it
+        exits, also when the run timed out.
+
+        Parameters:
+        - usage_start (list): Snapshot taken with 'ProcessUsage.snapshot'.
+        """
+        try:
+            yield
+        finally:
+            self.process_usage = ProcessUsage.since(usage_start) or {}
+
+    def _report_iteration(self, results, iterations, result):
+        """
+        Report the result of a pattern after each of its iterations, so the results of an in-process engine
+        that is interrupted by its watchdog cover the iterations it completed. The first iteration adds the
+        result, later ones replace it, and both are single list operations that a signal cannot split.
+        In isolation the result is also printed as a JSON line for the parent process.
+
+        Parameters:
+        - results (list[dict]): Results of the run so far.
+        - iterations (list[dict]): Completed iterations of the pattern.
+        - result (dict): Result of the pattern over its completed iterations.
+        """
+        if len(iterations) == 1:
+            results.append(result)
+        else:
+            results[-1] = result
+        if self.isolated:
+            print(json.dumps(result), flush=True)
+
+    def _needs_isolation(self):
+        """
+        Check if an in-process engine has budgets that its watchdog cannot enforce here, such as on Windows.
+        """
+        return not self.isolated and not RunWatchdog.supported() and (self.job_timeout is not None or self.cpu_timeout is not None)
+
+    def _run_isolated(self, method_name):
+        """
+        Run an in-process engine in a child process, for when the watchdog cannot interrupt it. The child is
+        driven like a generated engine: it prints the result of a pattern after each of its iterations, and
+        the engine driver kills it, together with any pool workers, when it misses its wall-clock deadline.
+
+        Parameters:
+        - method_name (str): Name of the method that runs the engine.
+
+        Returns:
+        - list[dict]: Structured results, as returned by the method.
+        """
+        def results_of(output_lines):
+            # Later results of a pattern replace earlier ones
+            results = {}
+            for line in output_lines:
+                result = json.loads(line)
+                results[result["index"]] = result
+            return list(results.values())
+
+        self.signal_times = {}
+        self.process_usage = {}
+        with tempfile.TemporaryDirectory() as directory:
+            state_path = os.path.join(directory, "executor.pkl")
+            with open(state_path, "wb") as f:
+                pickle.dump(self, f)
+            command = [sys.executable, os.path.abspath(__file__), state_path, method_name]
+            try:
+                output_lines = self.engine_driver().run_sync(command, signal_times=self.signal_times, usage=self.process_usage)
+            except EngineTimeoutError as error:
+                raise EngineTimeoutError(str(error), error.output_lines, results_of(error.output_lines)) from None
+        return results_of(output_lines)
 
     def run_python_engine(self):
         """
-        Run the regex engine in Python.
+        Run the regex engine in Python. The corpus is memory-mapped and matched as bytes, so the
+        decoded text is never held in memory. In the count match mode matches are counted one at
+        a time, in the collect mode the list of all matches is built. The corpus is mapped once
+        for all patterns.
+        """
+        if self._needs_isolation():
+            return self._run_isolated("run_python_engine")
+        load_start = time.monotonic_ns()
+        usage_start = ProcessUsage.snapshot()
+        results = []
+        self.signal_times = {}
+        self.process_usage = {}
+        with self._record_usage(usage_start), RunWatchdog(self.job_timeout, self.cpu_timeout, results), open(self.corpus, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            # An empty file cannot be memory-mapped
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if size > 0 else contextlib.nullcontext(b"") as corpus:
+                load_ns = time.monotonic_ns() - load_start
+                # The engine runs in-process, it is ready and starts as soon as the corpus is mapped
+                self.signal_times["ready_ns"] = self.signal_times["start_ns"] = time.time_ns()
+                for index, pattern in enumerate(self.patterns):
+                    iterations = []
+                    for iteration in range(-self.warmup, self.iterations):
+                        compile_start = time.monotonic_ns()
+                        regex = re.compile(pattern.encode("utf-8"))
+                        compile_end = time.monotonic_ns()
+                        if self.match_mode == "collect":
+                            count = len(regex.findall(corpus))
+                        else:
+                            count = 0
+                            for _ in regex.finditer(corpus):
+                                count += 1
+                        iterations.append({"iteration": iteration, "compile_ns": compile_end - compile_start, "match_ns": time.monotonic_ns() - compile_end,
+                                           "peak_memory_bytes": self.peak_memory_bytes()})
+                        # Like the generated engines, only the first pattern reports the corpus load. The corpus is mapped
+                        # rather than read, so its pages are read during the first match and the load has no decoding step
+                        self._report_iteration(results, iterations, self.summarise_iterations(
+                            index, pattern, count, size, load_ns if index == 0 else None, iterations, load_ns if index == 0 else None))
+                self.signal_times["done_ns"] = time.time_ns()
+        return results
+
+    def run_python_parallel_engine(self):
+        """
+        Run the regex engine in Python on a memory-mapped corpus, split into line-aligned
+        chunks that are matched in a pool of worker processes. The corpus is mapped by each
+        worker, so its load is part of the match phase.
         """
-        with open(self.corpus, "r") as file:
-            content = file.read()
-            matches = re.findall(self.pattern, content)
-            output = f'Pattern 0: {self.pattern} - Matches: {len(matches)}'
-        return [output]
+        if self._needs_isolation():
+            return self._run_isolated("run_python_parallel_engine")
+        results = []
+        # The engine runs in-process, it is ready and starts right away, its workers are waited for by the pool
+        usage_start = ProcessUsage.snapshot(include_children=True)
+        start_time = time.time_ns()
+        self.signal_times = {"ready_ns": start_time, "start_ns": start_time}
+        self.process_usage = {}
+        with self._record_usage(usage_start), RunWatchdog(self.job_timeout, self.cpu_timeout, results):
+            for index, pattern in enumerate(self.patterns):
+                iterations = []
+                for iteration in range(-self.warmup, self.iterations):
+                    compile_start = time.monotonic_ns()
+                    engine = ParallelRegexEngine(corpus=self.corpus, pattern=pattern, workers=self.workers)
+                    compile_end = time.monotonic_ns()
+                    count = engine.count()
+                    iterations.append({"iteration": iteration, "compile_ns": compile_end - compile_start, "match_ns": time.monotonic_ns() - compile_end})
+                    self._report_iteration(results, iterations, self.summarise_iterations(index, pattern, count, os.path.getsize(self.corpus), None, iterations))
+            self.signal_times["done_ns"] = time.time_ns()
+        return results
 
     def run_java_engine(self):
         """
-        Run the regex engine in Java.
+        Run the regex engine in Java, it was compiled during set up.
         """
-        # Compile and start Java process
-        subprocess.run(["javac", f"{self.factory.directory_to_store_engines}/RegexMatcher.java"])
-        java_process = subprocess.Popen(
-            ["java", "-cp", self.factory.directory_to_store_engines, "RegexMatcher"],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True  # This makes communicate() use strings instead of bytes
-        )
-        
-        # Wait for ready signal
-        line = java_process.stdout.readline().strip()
-        
-        # Send start signal
-        java_process.stdin.write("start\n")
-        java_process.stdin.flush()
-        
-        # Read output until done
-        output_lines = []
-        while True:
-            line = java_process.stdout.readline().strip()
-            if line == "done":
-                break
-            if not line:
-                # Check if there was an error
-                error = java_process.stderr.read()
-                if error:
-                    break
-            output_lines.append(line)
-        
-        return output_lines
+        return self._run_generated_engine("engine_java")
 
     def run_javascript_engine(self):
         """
         Run the regex engine in JavaScript.
         """
-        # Start Node.js process
-        node_process = subprocess.Popen(
-            ["node", f"{self.factory.directory_to_store_engines}/regex_matcher.js"],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-        
-        # Wait for ready signal
-        line = node_process.stdout.readline().strip()
-        
-        # Send start signal
-        node_process.stdin.write("start\n")
-        node_process.stdin.flush()
-        
-        # Read output until done
-        output_lines = []
-        while True:
-            line = node_process.stdout.readline().strip()
-            if line == "done":
-                break
-            if not line:
-                # Check if there was an error
-                error = node_process.stderr.read()
-                if error:
-                    break
-            output_lines.append(line)
-        
-        return output_lines
+        return self._run_generated_engine("engine_js")
 
     def run_boost_engine(self):
         """
         Run the regex engine in C++ using Boost.
         """
-        # Start C++ process
-        cpp_process = subprocess.Popen(
-            f"{self.factory.directory_to_store_engines}/regex_matcher.exe",
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-        
-        # Wait for ready signal
-        line = cpp_process.stdout.readline().strip()
-        
-        # Send start signal
-        cpp_process.stdin.write("start\n")
-        cpp_process.stdin.flush()
-        
-        # Read output until done
-        output_lines = []
-        while True:
-            line = cpp_process.stdout.readline().strip()
-            if line == "done":
-                break
-            if not line:
-                # Check if there was an error
-                error = cpp_process.stderr.read()
-                if error:
-                    break
-            output_lines.append(line)
-
-        return output_lines
-    
+        return self._run_generated_engine("engine_cpp")
+
     def run_dotnet_engine(self):
         """
         Run the regex engine in .NET using csc (C# compiler).
         """
-        # Start the .NET process
-        dotnet_process = subprocess.Popen(
-            [os.path.abspath(f"{self.factory.directory_to_store_engines}/RegexMatcher.exe"),
-                self.pattern,
-                self.corpus],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-        
-        # Wait for ready signal
-        line = dotnet_process.stdout.readline().strip()
-        
-        # Send start signal
-        dotnet_process.stdin.write("start\n")
-        dotnet_process.stdin.flush()
-        
-        # Read output until done
-        output_lines = []
-        while True:
-            line = dotnet_process.stdout.readline().strip()
-            if line == "done":
-                break
-            if not line:
-                # Check if there was an error
-                error = dotnet_process.stderr.read()
-                if error:
-                    break
-            else:
-                output_lines.append(line)
-
-        return output_lines
-    
\ No newline at end of file
+        return self._run_generated_engine("engine_dotnet")
+
+if __name__ == "__main__":
+    # Child process of an in-process engine that runs in isolation, see '_run_isolated'
+    with open(sys.argv[1], "rb") as f:
+        executor = pickle.load(f)
+    # The parent enforces the budgets
+    executor.isolated = True
+    executor.job_timeout = executor.cpu_timeout = None
+    print("ready", flush=True)
+    sys.stdin.readline()
+    getattr(executor, sys.argv[2])()
+    print("done", flush=True)
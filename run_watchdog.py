@@ -0,0 +1,71 @@
+import signal
+import threading
+from engine_driver import EngineTimeoutError
+
+class RunWatchdog:
+    """
+    Context manager that bounds the wall-clock and CPU time of code running in this process, such as the
+    in-process Python engines. When a budget runs out, an EngineTimeoutError is raised in the main thread.
+    Python's 're' module checks for signals while it matches, so this also interrupts a pattern that is
+    stuck in catastrophic backtracking.
+
+    The budgets are enforced with interval timers, which are only available on POSIX systems and in the
+    main thread. Elsewhere the watchdog does nothing, and the in-process engines run in a child process
+    that the engine driver kills at its wall-clock deadline instead. The CPU budget only counts this
+    process. Worker processes it starts are bounded by the wall-clock budget: the parallel engine kills
+    its pool when the run is interrupted.
+    """
+
+    def __init__(self, time_budget=None, cpu_budget=None, results=None):
+        """
+        Initialize the watchdog with its budgets, in seconds. None disables a budget.
+
+        Parameters:
+        - time_budget (float, optional): Wall-clock time budget.
+        - cpu_budget (float, optional): CPU time budget, user and system time of this process.
+        - results (list, optional): List the guarded code fills with its results as they complete. A copy of it
+          is attached to the EngineTimeoutError, so a run that times out keeps what it reported until then.
+        """
+        self.time_budget = time_budget
+        self.cpu_budget = cpu_budget
+        self.results = results
+        self._previous_handlers = {}
+
+    @staticmethod
+    def supported():
+        """
+        Check if the budgets can be enforced in the current thread.
+
+        Returns:
+        - bool: True when interval timers are available and this is the main thread.
+        """
+        return hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+
+    def _timers(self):
+        """
+        Get the interval timers to arm, as (timer, signal, budget, name) tuples.
+        """
+        timers = []
+        if self.time_budget is not None:
+            timers.append((signal.ITIMER_REAL, signal.SIGALRM, self.time_budget, "time"))
+        if self.cpu_budget is not None:
+            timers.append((signal.ITIMER_PROF, signal.SIGPROF, self.cpu_budget, "CPU"))
+        return timers
+
+    def __enter__(self):
+        if not self.supported():
+            return self
+        for timer, signum, budget, name in self._timers():
+            def expire(signum, frame, budget=budget, name=name):
+                results = list(self.results) if self.results is not None else None
+                raise EngineTimeoutError(f"Run exceeded its {name} budget of {budget}s.", [], results)
+            self._previous_handlers[signum] = signal.signal(signum, expire)
+            signal.setitimer(timer, budget)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if not self.supported():
+            return
+        for timer, signum, _, _ in self._timers():
+            signal.setitimer(timer, 0)
+            signal.signal(signum, self._previous_handlers.pop(signum))
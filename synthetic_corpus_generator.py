@@ -0,0 +1,230 @@
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from corpus_generator import CorpusGenerator
+
+# Vocabulary used to build the synthetic content, kept ASCII-only so that characters and bytes line up
+IDENTIFIERS = [
+    "array", "buffer", "shape", "dtype", "value", "result", "index", "offset", "count", "total",
+    "matrix", "vector", "stride", "axis", "item", "record", "field", "node", "parent", "child",
+    "config", "options", "cache", "state", "handler", "request", "response", "payload", "token", "stream"
+]
+VERBS = ["get", "set", "load", "save", "compute", "check", "build", "parse", "update", "reset", "test", "create"]
+CLASS_PREFIXES = ["Test", "Base", "Abstract", "Simple", "Fast", "Lazy", "Shared", "Custom"]
+CLASS_SUFFIXES = ["Array", "Buffer", "Parser", "Handler", "Manager", "Record", "Engine", "Matrix", "Cache", "Reader"]
+LOG_LEVELS = ["DEBUG", "INFO", "INFO", "INFO", "WARN", "ERROR"]
+HTTP_METHODS = ["GET", "GET", "GET", "POST", "PUT", "DELETE"]
+HTTP_STATUSES = [200, 200, 200, 201, 204, 301, 400, 403, 404, 500, 503]
+SERVICES = ["api", "auth", "billing", "search", "worker", "scheduler", "gateway"]
+WORDS = [
+    "the", "of", "and", "to", "a", "in", "is", "that", "it", "was", "for", "on", "are", "as", "with",
+    "energy", "engine", "pattern", "search", "text", "editor", "measure", "result", "power", "time",
+    "software", "program", "system", "data", "question", "answer", "simple", "complex", "regular",
+    "expression", "sustainable", "efficient", "process", "memory", "value", "study", "method", "class",
+    "definition", "function", "large", "small", "fast", "slow", "language", "document", "user", "number"
+]
+# Zipf-like weights so that common words dominate, as they do in natural language
+WORD_WEIGHTS = [1.0 / (rank + 1) for rank in range(len(WORDS))]
+
+DOMAINS = ["python", "log", "json", "text", "mixed"]
+
+
+def _identifier(rng):
+    """Returns a snake_case identifier."""
+    return f"{rng.choice(VERBS)}_{rng.choice(IDENTIFIERS)}"
+
+
+def _python_unit(rng):
+    """Returns lines of Python-like source: a function, a class with methods, or a test case."""
+    kind = rng.random()
+    lines = []
+    if kind < 0.4:
+        args = ", ".join(rng.sample(IDENTIFIERS, rng.randint(0, 3)))
+        lines.append(f"def {_identifier(rng)}({args}):")
+        lines.append(f'    """{rng.choice(VERBS).capitalize()} the {rng.choice(IDENTIFIERS)}."""')
+        for _ in range(rng.randint(1, 5)):
+            lines.append(f"    {rng.choice(IDENTIFIERS)} = {_identifier(rng)}({rng.choice(IDENTIFIERS)}, {rng.randint(0, 99)})")
+        lines.append(f"    return {rng.choice(IDENTIFIERS)}")
+    elif kind < 0.75:
+        name = f"{rng.choice(CLASS_PREFIXES)}{rng.choice(CLASS_SUFFIXES)}"
+        lines.append(f"class {name}({rng.choice(['object', 'TestCase', name + 'Base'])}):")
+        for _ in range(rng.randint(1, 4)):
+            lines.append(f"    def {_identifier(rng)}(self, {rng.choice(IDENTIFIERS)}):")
+            lines.append(f"        # {rng.choice(VERBS)} {rng.choice(IDENTIFIERS)} before use")
+            lines.append(f"        self.{rng.choice(IDENTIFIERS)} = np.zeros(({rng.randint(1, 64)}, {rng.randint(1, 64)}))")
+            lines.append(f"        assert self.{rng.choice(IDENTIFIERS)} is not None")
+    else:
+        lines.append(f"import {rng.choice(['numpy as np', 'os', 'sys', 'pytest', 're'])}")
+        lines.append(f"{rng.choice(IDENTIFIERS).upper()} = {rng.randint(0, 4096)}")
+    lines.append("")
+    return lines
+
+
+def _log_unit(rng):
+    """Returns a single application log line."""
+    timestamp = (
+        f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T"
+        f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}.{rng.randint(0, 999):03d}Z"
+    )
+    return [
+        f"{timestamp} {rng.choice(LOG_LEVELS):<5} [{rng.choice(SERVICES)}-{rng.randint(0, 15)}] "
+        f"request_id={rng.getrandbits(48):012x} {rng.choice(HTTP_METHODS)} "
+        f"/api/v{rng.randint(1, 3)}/{rng.choice(IDENTIFIERS)}s/{rng.randint(1, 99999)} "
+        f"{rng.choice(HTTP_STATUSES)} {rng.randint(1, 2500)}ms"
+    ]
+
+
+def _json_unit(rng):
+    """Returns a single JSON document on one line (JSON Lines)."""
+    document = {
+        "id": rng.getrandbits(32),
+        "name": _identifier(rng),
+        "active": rng.random() < 0.5,
+        "score": round(rng.random() * 100, 3),
+        "tags": rng.sample(IDENTIFIERS, rng.randint(0, 4)),
+        "owner": {"user": rng.choice(WORDS), "group": rng.choice(SERVICES)}
+    }
+    return [json.dumps(document, sort_keys=True)]
+
+
+def _text_unit(rng):
+    """Returns a paragraph of natural-language text."""
+    sentences = []
+    for _ in range(rng.randint(2, 6)):
+        words = rng.choices(WORDS, weights=WORD_WEIGHTS, k=rng.randint(5, 20))
+        sentences.append(" ".join(words).capitalize() + rng.choice([".", ".", ".", "?", "!"]))
+    return [" ".join(sentences), ""]
+
+
+UNIT_GENERATORS = {
+    "python": _python_unit,
+    "log": _log_unit,
+    "json": _json_unit,
+    "text": _text_unit
+}
+
+
+def _generate_chunk(seed, domain, index, size):
+    """
+    Generates chunk 'index' of a synthetic corpus. Every chunk has its own random generator derived
+    from the seed, domain and chunk index, so the output does not depend on how chunks are scheduled.
+    A chunk only holds whole records. The last line is padded with trailing spaces to the exact size,
+    which keeps every record valid, including JSON documents.
+
+    Args:
+        seed (int): Seed of the corpus.
+        domain (str): Content domain, one of DOMAINS.
+        index (int): Index of the chunk within the corpus.
+        size (int): Exact size in bytes of the chunk.
+
+    Returns:
+        bytes: The chunk content, ending with a newline.
+    """
+    rng = random.Random(f"{seed}:{domain}:{index}")
+    parts = []
+    length = 0
+    while True:
+        if domain == "mixed":
+            generator = UNIT_GENERATORS[rng.choice(list(UNIT_GENERATORS))]
+        else:
+            generator = UNIT_GENERATORS[domain]
+        text = "\n".join(generator(rng)) + "\n"
+        if length + len(text) > size:
+            break
+        parts.append(text)
+        length += len(text)
+
+    # Pad the last line up to its newline, a chunk too small for one record is a single line of spaces
+    padding = " " * (size - length)
+    if parts:
+        parts[-1] = parts[-1][:-1] + padding + "\n"
+    else:
+        parts.append(padding[:-1] + "\n")
+    return "".join(parts).encode("ascii")
+
+
+class SyntheticCorpusGenerator:
+    """
+    A class to generate synthetic corpora offline, deterministically from a seed.
+
+    Attributes:
+        output_dir (str): Directory where the .txt files will be saved.
+        seed (int): Seed that fully determines the generated content.
+        chunk_size (int): Size in bytes of the chunks generated independently.
+        workers (int): Number of worker processes used to generate chunks.
+    """
+
+    def __init__(self, output_dir='data', seed=42, chunk_size=4 * 1024 * 1024, workers=None):
+        """
+        Initialises the SyntheticCorpusGenerator.
+
+        Args:
+            output_dir (str): Directory where the .txt files will be saved.
+            seed (int): Seed that fully determines the generated content.
+            chunk_size (int): Size in bytes of the chunks generated independently.
+            workers (int, optional): Number of worker processes. Defaults to the number of CPUs.
+        """
+        self.output_dir = output_dir
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.workers = workers or os.cpu_count() or 1
+        # Create the directory if it does not exist
+        os.makedirs(output_dir, exist_ok=True)
+
+    def generate(self, file_name, target_size, domain="python"):
+        """
+        Generates a corpus of exactly 'target_size' bytes and writes it to a file in the output directory.
+        The output is byte-identical for a given seed, domain and chunk size, regardless of the number of workers.
+
+        Args:
+            file_name (str): The name of the file.
+            target_size (int): Size in bytes of the corpus.
+            domain (str): Content domain, one of 'python', 'log', 'json', 'text' or 'mixed'.
+
+        Returns:
+            dict: The file path, number of bytes written, elapsed seconds and throughput in MB/s.
+        """
+        if domain not in DOMAINS:
+            raise ValueError(f"Unknown domain '{domain}'. Choose one of {DOMAINS}.")
+
+        # Split the target size into fixed-size chunks, the last one holding the remainder
+        full_chunks, remainder = divmod(target_size, self.chunk_size)
+        sizes = [self.chunk_size] * full_chunks + ([remainder] if remainder else [])
+
+        file_path = os.path.join(self.output_dir, file_name)
+        start_time = time.perf_counter()
+        with open(file_path, 'wb') as f:
+            for chunk in self._generate_chunks(domain, sizes):
+                f.write(chunk)
+        elapsed = time.perf_counter() - start_time
+
+        return CorpusGenerator._report(file_path, target_size, elapsed, content=domain)
+
+    def _generate_chunks(self, domain, sizes):
+        """
+        Yields the chunks of a corpus in order. Chunks are generated in a process pool, keeping at most
+        two chunks per worker in flight so memory use stays bounded.
+
+        Args:
+            domain (str): Content domain.
+            sizes (list[int]): Size in bytes of each chunk.
+
+        Yields:
+            bytes: The content of each chunk, in order.
+        """
+        if self.workers == 1 or len(sizes) <= 1:
+            for index, size in enumerate(sizes):
+                yield _generate_chunk(self.seed, domain, index, size)
+            return
+
+        max_in_flight = 2 * self.workers
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            pending = []
+            for index, size in enumerate(sizes):
+                pending.append(executor.submit(_generate_chunk, self.seed, domain, index, size))
+                if len(pending) >= max_in_flight:
+                    yield pending.pop(0).result()
+            for future in pending:
+                yield future.result()
@@ -0,0 +1,40 @@
+import math
+import unittest
+from adaptive_scheduler import AdaptiveScheduler
+
+class TestAdaptiveScheduler(unittest.TestCase):
+    def run_schedule(self, scheduler, measurements):
+        # Runs the schedule with a fixed series of (time, energy) measurements per task
+        order = []
+        while (task_name := scheduler.next_task()) is not None:
+            order.append(task_name)
+            time, energy = measurements[task_name][(scheduler.runs[task_name]) % len(measurements[task_name])]
+            scheduler.record(task_name, time, energy)
+        return order
+
+    def test_minimum_runs_first(self):
+        scheduler = AdaptiveScheduler(["a", "b"], min_runs=3, max_runs=5)
+        order = [scheduler.next_task() for _ in range(6)]
+        self.assertEqual(sorted(order), ["a", "a", "a", "b", "b", "b"])
+
+    def test_noisy_task_gets_more_runs(self):
+        scheduler = AdaptiveScheduler(["stable", "noisy"], min_runs=3, max_runs=20, target_width=0.05)
+        self.run_schedule(scheduler, {"stable": [(1.0, 10.0), (1.001, 10.01)], "noisy": [(1.0, 10.0), (1.2, 14.0), (0.9, 8.0)]})
+        self.assertEqual(scheduler.runs["stable"], 3)
+        self.assertEqual(scheduler.runs["noisy"], 20)
+        self.assertLess(scheduler.width("stable"), 0.05)
+
+    def test_failed_runs_use_budget(self):
+        scheduler = AdaptiveScheduler(["a"], min_runs=2, max_runs=4)
+        self.run_schedule(scheduler, {"a": [(None, None)]})
+        self.assertEqual(scheduler.runs["a"], 4)
+        self.assertTrue(math.isinf(scheduler.width("a")))
+
+    def test_relative_width(self):
+        scheduler = AdaptiveScheduler(["a"], min_runs=2, max_runs=2)
+        # Mean 10, standard deviation 1, t(0.975, 3) = 3.182
+        self.assertAlmostEqual(scheduler.relative_width([9.0, 11.0, 9.0, 11.0]) * 10, 2 * 3.182 * (2 / math.sqrt(3)) / 2, places=2)
+        self.assertTrue(math.isinf(scheduler.relative_width([1.0])))
+
+if __name__ == '__main__':
+    unittest.main()
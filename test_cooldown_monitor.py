@@ -0,0 +1,63 @@
+import collections
+import os
+import tempfile
+import time
+import unittest
+from cooldown_monitor import CooldownMonitor
+
+class TestCooldownMonitor(unittest.TestCase):
+    def setUp(self):
+        # A fake powercap tree with one package whose counter does not move, and two thermal zones
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = self.directory.name
+        self.write(os.path.join("powercap", "intel-rapl:0"), name="package-0", energy_uj=1000000, max_energy_range_uj=10000000)
+        self.write(os.path.join("thermal", "thermal_zone0"), type="acpitz", temp=30000)
+        self.write(os.path.join("thermal", "thermal_zone1"), type="x86_pkg_temp", temp=45000)
+        self.monitor = CooldownMonitor(powercap_root=os.path.join(self.root, "powercap"), thermal_root=os.path.join(self.root, "thermal"),
+                                       interval=0.01, window=3)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, directory, **attributes):
+        path = os.path.join(self.root, directory)
+        os.makedirs(path, exist_ok=True)
+        for attribute, value in attributes.items():
+            with open(os.path.join(path, attribute), "w") as f:
+                f.write(f"{value}\n")
+
+    def test_available(self):
+        self.assertTrue(self.monitor.available())
+        self.assertFalse(CooldownMonitor(powercap_root=os.path.join(self.root, "missing")).available())
+
+    def test_package_temperature(self):
+        # The CPU package zone is preferred over the other thermal zones
+        self.assertEqual(self.monitor.find_temperature_files(), [os.path.join(self.root, "thermal", "thermal_zone1", "temp")])
+
+    def test_settled(self):
+        self.monitor.baseline_power, self.monitor.baseline_temperature = 10.0, 45.0
+        window = lambda *values: collections.deque(values, maxlen=3)
+        self.assertFalse(self.monitor.settled(window(10.0, 10.0), window(45.0, 45.0)))
+        self.assertTrue(self.monitor.settled(window(10.0, 10.4, 10.2), window(45.0, 46.0, 46.5)))
+        self.assertFalse(self.monitor.settled(window(11.0, 11.0, 11.0), window(45.0, 45.0, 45.0)))
+        self.assertFalse(self.monitor.settled(window(10.0, 10.0, 10.0), window(48.0, 48.0, 48.0)))
+
+    def test_wait_until_idle(self):
+        self.monitor.record_baseline(duration=0.03)
+        self.assertEqual(self.monitor.baseline_power, 0)
+        self.assertEqual(self.monitor.baseline_temperature, 45)
+        rested, settled = self.monitor.wait(10)
+        self.assertTrue(settled)
+        self.assertLess(rested, 1)
+
+    def test_wait_is_bounded(self):
+        # A baseline below any power never settles
+        self.monitor.baseline_power = -1.0
+        start = time.monotonic()
+        rested, settled = self.monitor.wait(0.2)
+        self.assertFalse(settled)
+        self.assertEqual(rested, 0.2)
+        self.assertLess(time.monotonic() - start, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from corpus_generator import CorpusGenerator
+from synthetic_corpus_generator import SyntheticCorpusGenerator
+
+class TestCorpusGenerator(unittest.TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def test_stream_to_file_writes_whole_copies(self):
+        generator = CorpusGenerator(output_dir=self.output_dir, target_size=1000, block_size=64)
+        code = "def foo():\n    return 1\n"
+        result = generator.stream_to_file("corpus.txt", code)
+
+        with open(result["path"], encoding="utf-8") as f:
+            content = f.read()
+        self.assertGreaterEqual(len(content), 1000)
+        self.assertLess(len(content), 1000 + len(code))
+        self.assertEqual(content, code * (len(content) // len(code)))
+
+    def test_slice_corpus_wraps_around_at_line_boundaries(self):
+        source = os.path.join(self.output_dir, "source.txt")
+        with open(source, "w") as f:
+            f.write("first line\nsecond")
+        generator = CorpusGenerator(output_dir=self.output_dir, block_size=4)
+
+        # The source without its final newline is wrapped as a separate line
+        result = generator.slice_corpus(source, "wrapped.txt", 35)
+        with open(result["path"]) as f:
+            self.assertEqual(f.read(), "first line\nsecond\nfirst line\n")
+        self.assertEqual(result["bytes"], 29)
+
+        # The slice is cut at the last line boundary before the target
+        result = generator.slice_corpus(source, "cut.txt", 15)
+        with open(result["path"]) as f:
+            self.assertEqual(f.read(), "first line\n")
+
+    def test_slice_corpus_rejects_target_below_first_line(self):
+        source = os.path.join(self.output_dir, "source.txt")
+        with open(source, "w") as f:
+            f.write("x" * 17)
+        generator = CorpusGenerator(output_dir=self.output_dir)
+        with self.assertRaises(ValueError):
+            generator.slice_corpus(source, "small.txt", 7)
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, "small.txt")))
+
+    def test_synthetic_corpus_is_deterministic(self):
+        for domain in ["python", "log", "json", "text", "mixed"]:
+            contents = []
+            for seed, workers in [(7, 1), (7, 2), (8, 1)]:
+                generator = SyntheticCorpusGenerator(output_dir=self.output_dir, seed=seed, chunk_size=10000, workers=workers)
+                result = generator.generate(f"{domain}.txt", 25000, domain=domain)
+                self.assertEqual(os.path.getsize(result["path"]), 25000)
+                with open(result["path"], "rb") as f:
+                    contents.append(f.read())
+
+            # Same seed gives identical bytes regardless of workers, another seed differs
+            self.assertEqual(contents[0], contents[1])
+            self.assertNotEqual(contents[0], contents[2])
+
+    def test_synthetic_chunks_hold_whole_records(self):
+        generator = SyntheticCorpusGenerator(output_dir=self.output_dir, seed=7, chunk_size=1000, workers=1)
+        result = generator.generate("json.txt", 10500, domain="json")
+        self.assertEqual(os.path.getsize(result["path"]), 10500)
+        with open(result["path"], encoding="ascii") as f:
+            lines = f.read().splitlines()
+        # Every line is a complete document, the padding at chunk boundaries is trailing whitespace
+        for line in lines:
+            self.assertIsInstance(json.loads(line), dict)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from engine_build_cache import EngineBuildCache
+
+class TestEngineBuildCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = EngineBuildCache(cache_dir=os.path.join(self.directory, "cache"))
+        self.source_path = os.path.join(self.directory, "engine.src")
+        with open(self.source_path, "w") as f:
+            f.write("source v1")
+        # The compile command appends a line to a log for every build, so rebuilds can be counted
+        self.log_path = os.path.join(self.directory, "builds.log")
+        self.command = [sys.executable, "-c", "import sys; open(sys.argv[1], 'a').write(sys.argv[2] + '\\n')", self.log_path, "{output_dir}"]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _builds(self):
+        if not os.path.exists(self.log_path):
+            return 0
+        with open(self.log_path) as f:
+            return len(f.readlines())
+
+    def test_rebuilds_only_on_change(self):
+        first = self.cache.build("engine_test", self.source_path, self.command)
+        self.assertEqual(self.cache.build("engine_test", self.source_path, self.command), first)
+        self.assertEqual(self._builds(), 1)
+        self.assertTrue(os.path.exists(os.path.join(first, "engine.src")))
+
+        # A new cache instance on the same directory reuses the build, as a later session would
+        self.assertEqual(EngineBuildCache(cache_dir=self.cache.cache_dir).build("engine_test", self.source_path, self.command), first)
+        self.assertEqual(self._builds(), 1)
+
+        # Changing the compiler flags or the source builds again
+        flagged = self.cache.build("engine_test", self.source_path, self.command + ["-O2"])
+        self.assertNotEqual(flagged, first)
+        with open(self.source_path, "w") as f:
+            f.write("source v2")
+        changed = self.cache.build("engine_test", self.source_path, self.command)
+        self.assertNotIn(changed, (first, flagged))
+        self.assertEqual(self._builds(), 3)
+
+    def test_failed_build_is_not_cached(self):
+        command = [sys.executable, "-c", "import sys; sys.exit(1)"]
+        with self.assertRaises(RuntimeError):
+            self.cache.build("engine_test", self.source_path, command)
+        self.assertEqual(os.listdir(os.path.join(self.cache.cache_dir, "engine_test")), [])
+
+if __name__ == "__main__":
+    unittest.main()
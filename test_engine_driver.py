@@ -0,0 +1,160 @@
+import os
+import sys
+import time
+import signal
+import tempfile
+import unittest
+from engine_driver import EngineDriver, EngineTimeoutError
+
+# A stand-in engine that follows the ready/start/done protocol and sleeps for the given seconds before each match line
+fake_engine = """
+import sys, time
+print("ready", flush=True)
+sys.stdin.readline()
+for i, delay in enumerate(map(float, sys.argv[1:])):
+    time.sleep(delay)
+    print(f"match {i}", flush=True)
+print("done", flush=True)
+"""
+
+class TestEngineDriver(unittest.TestCase):
+    def test_run_collects_output_until_done(self):
+        output_lines = EngineDriver(pattern_timeout=10, job_timeout=10).run_sync([sys.executable, "-c", fake_engine, "0", "0"])
+        self.assertEqual(output_lines, ["match 0", "match 1"])
+
+    def test_pattern_timeout_keeps_partial_output(self):
+        with self.assertRaises(EngineTimeoutError) as context:
+            EngineDriver(pattern_timeout=0.5).run_sync([sys.executable, "-c", fake_engine, "0", "30"])
+        self.assertEqual(context.exception.output_lines, ["match 0"])
+
+    def test_job_timeout(self):
+        start_time = time.perf_counter()
+        with self.assertRaises(EngineTimeoutError):
+            EngineDriver(pattern_timeout=0.4, job_timeout=0.5).run_sync([sys.executable, "-c", fake_engine, "0.3", "0.3", "0.3"])
+        self.assertLess(time.perf_counter() - start_time, 5)
+
+    def test_exit_before_done(self):
+        with self.assertRaises(RuntimeError):
+            EngineDriver(job_timeout=10).run_sync([sys.executable, "-c", "print('ready', flush=True); import sys; sys.stdin.readline()"])
+
+    @unittest.skipIf(os.name == "nt", "process groups are killed with taskkill on Windows")
+    def test_timeout_kills_process_group(self):
+        # The engine starts a child that would outlive it if only the engine itself were killed
+        with tempfile.TemporaryDirectory() as directory:
+            pid_file = os.path.join(directory, "child.pid")
+            engine = (
+                "import subprocess, sys\n"
+                "child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])\n"
+                f"open({pid_file!r}, 'w').write(str(child.pid))\n"
+                "print('ready', flush=True)\n"
+                "sys.stdin.readline()\n"
+                "child.wait()\n"
+            )
+            with self.assertRaises(EngineTimeoutError):
+                EngineDriver(job_timeout=0.5).run_sync([sys.executable, "-c", engine])
+            with open(pid_file) as f:
+                child_pid = int(f.read())
+            for _ in range(50):
+                try:
+                    os.kill(child_pid, 0)
+                except ProcessLookupError:
+                    break
+                time.sleep(0.1)
+            else:
+                os.kill(child_pid, signal.SIGKILL)
+                self.fail("Child process of the engine was not killed.")
+
+    @unittest.skipUnless(os.path.exists("/proc/self/stat"), "process usage is read from the proc filesystem")
+    def test_usage_of_engine_process(self):
+        # The engine allocates 64 MB and spins for a moment, then waits for its stdin to close
+        engine = (
+            "import sys, time\n"
+            "print('ready', flush=True)\n"
+            "sys.stdin.readline()\n"
+            "data = bytearray(64 * 1024 * 1024)\n"
+            "end = time.process_time() + 0.3\n"
+            "while time.process_time() < end: pass\n"
+            "print('done', flush=True)\n"
+            "sys.stdin.readline()\n"
+        )
+        usage = {}
+        EngineDriver(job_timeout=30).run_sync([sys.executable, "-c", engine], usage=usage)
+        self.assertGreater(usage["peak_rss_bytes"], 64 * 1024 * 1024)
+        self.assertGreaterEqual(usage["user_cpu_ns"] + usage["system_cpu_ns"], 0.25e9)
+        self.assertGreater(usage["minor_page_faults"], 0)
+        self.assertIn("voluntary_context_switches", usage)
+
+    @unittest.skipIf(os.name == "nt", "resource usage is not available on Windows")
+    def test_usage_includes_work_until_the_engine_exits(self):
+        # The engine spins after "done" and exits without waiting, the kernel still accounts for that time
+        engine = (
+            "import sys, time\n"
+            "print('ready', flush=True)\n"
+            "sys.stdin.readline()\n"
+            "print('done', flush=True)\n"
+            "end = time.process_time() + 0.3\n"
+            "while time.process_time() < end: pass\n"
+        )
+        usage = {}
+        EngineDriver(job_timeout=30).run_sync([sys.executable, "-c", engine], usage=usage)
+        self.assertGreaterEqual(usage["user_cpu_ns"] + usage["system_cpu_ns"], 0.25e9)
+
+    @unittest.skipIf(os.name == "nt", "resource usage is not available on Windows")
+    def test_usage_of_killed_engine(self):
+        engine = (
+            "import sys, time\n"
+            "print('ready', flush=True)\n"
+            "sys.stdin.readline()\n"
+            "while True: pass\n"
+        )
+        usage = {}
+        with self.assertRaises(EngineTimeoutError):
+            EngineDriver(job_timeout=0.5).run_sync([sys.executable, "-c", engine], usage=usage)
+        self.assertGreaterEqual(usage["user_cpu_ns"] + usage["system_cpu_ns"], 0.3e9)
+
+    @unittest.skipIf(os.name == "nt", "CPU budgets are not enforced on Windows")
+    def test_cpu_budget_keeps_partial_output(self):
+        engine = (
+            "import sys\n"
+            "print('ready', flush=True)\n"
+            "sys.stdin.readline()\n"
+            "print('match 0', flush=True)\n"
+            "while True: pass\n"
+        )
+        with self.assertRaises(EngineTimeoutError) as context:
+            EngineDriver(job_timeout=30, cpu_timeout=1).run_sync([sys.executable, "-c", engine])
+        self.assertIn("CPU budget", str(context.exception))
+        self.assertEqual(context.exception.output_lines, ["match 0"])
+
+    @unittest.skipIf(os.name == "nt", "CPU budgets are not enforced on Windows")
+    def test_external_kill_is_not_a_cpu_overrun(self):
+        engine = (
+            "import os, signal, sys\n"
+            "print('ready', flush=True)\n"
+            "sys.stdin.readline()\n"
+            "os.kill(os.getpid(), signal.SIGKILL)\n"
+        )
+        with self.assertRaises(RuntimeError) as context:
+            EngineDriver(job_timeout=30, cpu_timeout=1).run_sync([sys.executable, "-c", engine])
+        self.assertNotIsInstance(context.exception, EngineTimeoutError)
+
+        # An engine that ignores SIGXCPU is killed at the hard limit, after its samples passed the soft one
+        engine = (
+            "import signal, sys\n"
+            "signal.signal(signal.SIGXCPU, signal.SIG_IGN)\n"
+            "print('ready', flush=True)\n"
+            "sys.stdin.readline()\n"
+            "while True: pass\n"
+        )
+        with self.assertRaises(EngineTimeoutError) as context:
+            EngineDriver(job_timeout=30, cpu_timeout=1).run_sync([sys.executable, "-c", engine])
+        self.assertIn("CPU budget", str(context.exception))
+
+    def test_run_many_runs_concurrently(self):
+        start_time = time.perf_counter()
+        outputs = EngineDriver(job_timeout=10).run_many_sync([[sys.executable, "-c", fake_engine, "1"]] * 3)
+        self.assertEqual(outputs, [["match 0"]] * 3)
+        self.assertLess(time.perf_counter() - start_time, 2.5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import sys
+import time
+import unittest
+from engine_driver import EngineDriver, EngineTimeoutError
+from engine_worker import EngineWorker
+
+# A stand-in worker that answers each job after sleeping for the seconds given in its pattern, until "exit"
+fake_worker = """
+import sys, time
+print("ready", flush=True)
+for line in sys.stdin:
+    if line.strip() == "exit":
+        break
+    time.sleep(float(line.rstrip("\\n").split("\\t")[2]))
+    print("done", flush=True)
+"""
+
+class FakeExecutor:
+    def __init__(self, script, **timeouts):
+        self.script = script
+        self.timeouts = timeouts
+
+    def engine_command(self):
+        return [sys.executable, "-c", self.script]
+
+    def engine_driver(self):
+        return EngineDriver(**self.timeouts)
+
+class TestEngineWorker(unittest.TestCase):
+    def test_serves_several_jobs(self):
+        with EngineWorker(FakeExecutor(fake_worker, job_timeout=10)) as worker:
+            for _ in range(3):
+                results, elapsed = worker.run_job("0", "corpus.txt")
+                self.assertEqual(results, [])
+        self.assertIsNone(worker.engine)
+
+    def test_job_deadline_stops_the_worker(self):
+        worker = EngineWorker(FakeExecutor(fake_worker, job_timeout=0.5))
+        worker.start()
+        start_time = time.perf_counter()
+        with self.assertRaises(EngineTimeoutError):
+            worker.run_job("30", "corpus.txt")
+        self.assertLess(time.perf_counter() - start_time, 5)
+        self.assertIsNone(worker.engine)
+
+    def test_ready_deadline(self):
+        worker = EngineWorker(FakeExecutor("import time; time.sleep(30)", ready_timeout=0.5))
+        with self.assertRaises(EngineTimeoutError):
+            worker.start()
+        self.assertIsNone(worker.loop)
+
+    def test_worker_that_dies(self):
+        worker = EngineWorker(FakeExecutor("print('ready', flush=True); import sys; sys.stdin.readline()", job_timeout=10))
+        worker.start()
+        with self.assertRaises(RuntimeError):
+            worker.run_job("0", "corpus.txt")
+
+if __name__ == '__main__':
+    unittest.main()
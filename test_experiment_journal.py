@@ -0,0 +1,115 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from energy_experiment import EnergyExperiment
+from experiment_journal import ExperimentJournal
+
+class FakeBackend:
+    """
+    Stand-in measurement backend that writes a CSV and JSON result file per run, and can crash at a given run.
+    """
+
+    def __init__(self, crash_at=None):
+        self.crash_at = crash_at
+        self.measured = []
+
+    def start_service(self):
+        pass
+
+    def stop_service(self):
+        pass
+
+    def prepare_task(self, **options):
+        pass
+
+    def run_measurement(self, output_file, **options):
+        self.measured.append(output_file)
+        with open(output_file, "w") as f:
+            f.write("Delta,Time,PACKAGE_ENERGY (J)\n0,0,0\n1000,1000,10\n")
+        if len(self.measured) == self.crash_at:
+            # The result file of the crashed run is never written
+            raise KeyboardInterrupt()
+        with open(os.path.splitext(output_file)[0] + ".json", "w") as f:
+            f.write('{"outcome": "ok"}')
+
+class TestExperimentJournal(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.directory.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.directory.cleanup()
+
+    def experiment(self, backend, **options):
+        experiment = EnergyExperiment(num_runs=2, engines=["engine_js"], rest_duration=0, backend="rapl", adaptive_rest=False, **options)
+        experiment.measurement_backend = backend
+        experiment._warn_and_prepare = lambda: None
+        experiment._warmup_fibonacci = lambda: None
+        return experiment
+
+    def test_append_keeps_entries(self):
+        journal = ExperimentJournal("results/journal.jsonl")
+        journal.start_plan(7, ["a"], [("a", 1), ("a", 2)])
+        journal.append("start", task="a", run=1)
+        journal.append("done", task="a", run=1, outcome="ok")
+        journal.append("start", task="a", run=2)
+        self.assertEqual(journal.plan()["seed"], 7)
+        self.assertEqual({key: entry["event"] for key, entry in journal.run_states().items()}, {("a", 1): "done", ("a", 2): "start"})
+        self.assertFalse(os.path.exists("results/journal.jsonl.tmp"))
+
+    def test_torn_last_line_is_dropped(self):
+        journal = ExperimentJournal("results/journal.jsonl")
+        journal.start_plan(7, ["a"])
+        journal.append("start", task="a", run=1)
+        with open("results/journal.jsonl", "a") as f:
+            f.write('{"event": "done", "ta')
+
+        resumed = ExperimentJournal("results/journal.jsonl")
+        resumed.append("start", task="a", run=2)
+        self.assertEqual([entry["event"] for entry in resumed.entries()], ["plan", "start", "start"])
+        self.assertEqual(list(resumed.run_states()), [("a", 1), ("a", 2)])
+
+    def test_no_directory_sync_on_windows(self):
+        journal = ExperimentJournal("results/journal.jsonl")
+        with mock.patch("experiment_journal.os.name", "nt"), mock.patch("experiment_journal.os.open", side_effect=PermissionError):
+            journal.start_plan(7, ["a"])
+            journal.append("start", task="a", run=1)
+        self.assertEqual(len(journal.entries()), 2)
+
+    def test_resume_after_crash(self):
+        backend = FakeBackend(crash_at=4)
+        with self.assertRaises(KeyboardInterrupt):
+            self.experiment(backend).run_experiment()
+        plan = ExperimentJournal().plan()
+
+        resumed = FakeBackend()
+        self.experiment(resumed, resume=True).run_experiment()
+        # The crashed run is run again, in the order of the plan, and completed runs are skipped
+        expected = [f"results/{task}_run_{run}.csv" for task, run in plan["runs"]]
+        self.assertEqual(backend.measured, expected[:4])
+        self.assertEqual(resumed.measured, expected[3:])
+        self.assertEqual(ExperimentJournal().plan()["seed"], plan["seed"])
+
+    def test_resume_adaptive_schedule(self):
+        backend = FakeBackend(crash_at=3)
+        with self.assertRaises(KeyboardInterrupt):
+            self.experiment(backend, adaptive_runs=True, min_runs=2).run_experiment()
+        resumed = FakeBackend()
+        self.experiment(resumed, adaptive_runs=True, min_runs=2, resume=True).run_experiment()
+        # Three tasks with two identical runs each settle at the minimum
+        self.assertEqual(len(resumed.measured), 6 - 2)
+        self.assertEqual(sorted(set(backend.measured[:2] + resumed.measured)), sorted(backend.measured[:2] + resumed.measured))
+        self.assertIn(backend.measured[2], resumed.measured)
+
+    def test_resume_with_other_tasks(self):
+        self.experiment(FakeBackend()).run_experiment()
+        experiment = self.experiment(FakeBackend(), resume=True)
+        experiment.engines = ["engine_cpp"]
+        with self.assertRaises(ValueError):
+            experiment.run_experiment()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import os
+import sys
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from measurement_backend import MeasurementBackend
+from rapl_executor import RaplDomain, RaplExecutor
+from ring_buffer_sampler import RingBufferSampler
+
+class TestRaplExecutor(unittest.TestCase):
+    def setUp(self):
+        # A fake powercap tree with two packages, a core subdomain and a DRAM subdomain
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = self.directory.name
+        self.write_domain("intel-rapl:0", "package-0", 1000000)
+        self.write_domain("intel-rapl:0:0", "core", 0)
+        self.write_domain("intel-rapl:0:1", "dram", 0)
+        self.write_domain("intel-rapl:1", "package-1", 2000000)
+        # Two CPU frequency policies and the memory statistics
+        for policy, frequency_khz in [(0, 2400000), (4, 3000000)]:
+            os.makedirs(os.path.join(self.root, "cpufreq", f"policy{policy}"))
+            with open(os.path.join(self.root, "cpufreq", f"policy{policy}", "scaling_cur_freq"), "w") as f:
+                f.write(f"{frequency_khz}\n")
+        self.meminfo = os.path.join(self.root, "meminfo")
+        with open(self.meminfo, "w") as f:
+            f.write("MemTotal:       16000000 kB\nMemFree:         2000000 kB\nMemAvailable:    6000000 kB\n")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_domain(self, directory, name, energy_uj, max_energy_range_uj=10000000):
+        path = os.path.join(self.root, directory)
+        os.makedirs(path, exist_ok=True)
+        for attribute, value in [("name", name), ("energy_uj", energy_uj), ("max_energy_range_uj", max_energy_range_uj)]:
+            with open(os.path.join(path, attribute), "w") as f:
+                f.write(f"{value}\n")
+
+    def test_find_domains(self):
+        domains = RaplExecutor(powercap_root=self.root).find_domains()
+        self.assertEqual({column: [d.name for d in found] for column, found in domains.items()},
+                         {"PACKAGE_ENERGY (J)": ["package-0", "package-1"], "DRAM_ENERGY (J)": ["dram"]})
+
+    def test_counter_wraparound(self):
+        domain = RaplDomain(os.path.join(self.root, "intel-rapl:0"))
+        # The counter wraps around at 10 J
+        joules = domain.joules(np.array([1000000, 9500000, 500000]))
+        np.testing.assert_allclose(joules, [0, 8.5, 9.5])
+
+    def test_ring_buffer_keeps_latest_samples(self):
+        counter = os.path.join(self.root, "intel-rapl:0", "energy_uj")
+        sampler = RingBufferSampler({"energy": counter}, interval_ms=1000, capacity=4, meminfo_path=self.meminfo)
+        sampler.start()
+        for energy_uj in range(5):
+            self.write_domain("intel-rapl:0", "package-0", energy_uj)
+            sampler._sample()
+        sampler.stop()
+        samples = sampler.samples()
+        self.assertEqual(sampler.columns, ["TIME_NS", "energy", "USED_MEMORY_KB"])
+        self.assertEqual(sampler.overwritten, 3)
+        self.assertEqual(len(samples), 4)
+        # Oldest first, with the last sample taken when stopped
+        self.assertTrue(np.all(np.diff(samples[:, 0]) >= 0))
+        self.assertEqual(samples[-1, 1], 4)
+        self.assertTrue(np.all(samples[:, 2] == 10000000))
+
+    def test_no_package_domains(self):
+        with tempfile.TemporaryDirectory() as empty:
+            with self.assertRaises(RuntimeError):
+                RaplExecutor(powercap_root=empty).find_domains()
+
+    def test_measure_writes_energibridge_schema(self):
+        # The command itself advances the fake package counter by 3 J
+        counter = os.path.join(self.root, "intel-rapl:1", "energy_uj")
+        command = f'"{sys.executable}" -c "import time; time.sleep(0.3); open({counter!r}, \'w\').write(\'5000000\')"'
+        with tempfile.TemporaryDirectory() as output_dir:
+            output_file = os.path.join(output_dir, "run.csv")
+            executor = RaplExecutor(powercap_root=self.root, cpufreq_root=os.path.join(self.root, "cpufreq"), meminfo_path=self.meminfo)
+            seconds, joules, _ = executor.measure(command, output_file)
+            df = pd.read_csv(output_file)
+            raw = np.load(os.path.join(output_dir, "run.samples.npz"))
+        self.assertEqual(list(df.columns), ["Delta", "Time", "PACKAGE_ENERGY (J)", "DRAM_ENERGY (J)",
+                                            "CPU_FREQUENCY_0", "CPU_FREQUENCY_1", "USED_MEMORY"])
+        # Sampled at 1 kHz by default
+        self.assertGreater(len(df), 100)
+        self.assertEqual(len(raw["samples"]), len(df))
+        self.assertEqual(list(df.iloc[0][["CPU_FREQUENCY_0", "CPU_FREQUENCY_1"]]), [2400, 3000])
+        self.assertEqual(df.iloc[0]["USED_MEMORY"], 10000000 * 1024)
+        self.assertAlmostEqual(joules, 3)
+        self.assertAlmostEqual(df.iloc[-1]["PACKAGE_ENERGY (J)"] - df.iloc[0]["PACKAGE_ENERGY (J)"], 3)
+        self.assertGreaterEqual(seconds, 0.3)
+        # Times keep their fraction of a millisecond, so no two samples share a time
+        self.assertTrue(np.allclose(df["Time"], raw["samples"][:, 0] / 1e6))
+        self.assertTrue((df["Delta"].iloc[1:] > 0).all())
+
+    def test_backend_without_measurement_cannot_be_created(self):
+        class IncompleteBackend(MeasurementBackend):
+            pass
+
+        with self.assertRaises(TypeError):
+            IncompleteBackend()
+        self.assertIsInstance(RaplExecutor(), MeasurementBackend)
+
+if __name__ == '__main__':
+    unittest.main()
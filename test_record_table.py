@@ -0,0 +1,46 @@
+import unittest
+import numpy as np
+from analysis.energy_record import EnergyRecord
+from analysis.record_table import RecordTable
+
+class TestRecordTable(unittest.TestCase):
+    def setUp(self):
+        self.records = [
+            EnergyRecord("engine_js", "high", 1, 2.0, 20.0, "corpus_1mb", 1.0, process={"peak_rss_bytes": 1024}),
+            EnergyRecord("engine_c", "low", 1, 1.0, 10.0, "corpus_1mb", 1.0, metrics={"dram_energy": 2.0}),
+            EnergyRecord("engine_js", "high", 2, 3.0, 30.0, "corpus_10mb", 10.0, outcome="timeout"),
+            EnergyRecord("engine_c", "low", 2, 1.5, 15.0)
+        ]
+        self.table = RecordTable.from_records(self.records)
+
+    def test_categorical_codes(self):
+        self.assertEqual(self.table.categories["engine"].tolist(), ["engine_c", "engine_js"])
+        self.assertEqual(self.table.codes["engine"].tolist(), [1, 0, 1, 0])
+        self.assertEqual(self.table["engine"].tolist(), ["engine_js", "engine_c", "engine_js", "engine_c"])
+        self.assertTrue(np.isnan(self.table["corpus_size_mb"][3]))
+
+    def test_group_by_in_order_of_first_row(self):
+        groups = self.table.group_by("engine", "regex_complexity")
+        self.assertEqual([(key, rows.tolist()) for key, rows in groups],
+                         [(("engine_js", "high"), [0, 2]), (("engine_c", "low"), [1, 3])])
+
+    def test_filter_and_concat(self):
+        completed = self.table.filter(self.table.equals("outcome", "ok"))
+        self.assertEqual(completed["time"].tolist(), [2.0, 1.0, 1.5])
+        self.assertFalse(self.table.equals("engine", "engine_rust").any())
+
+        joined = RecordTable.concat([completed.filter(completed.equals("engine", "engine_c")), RecordTable.from_records(self.records[2:3])])
+        self.assertEqual(joined["engine"].tolist(), ["engine_c", "engine_c", "engine_js"])
+        self.assertEqual(joined.unique("outcome"), ["ok", "timeout"])
+
+    def test_round_trip(self):
+        fields = lambda r: [getattr(r, name) for name in EnergyRecord.__slots__]
+        self.assertEqual([fields(r) for r in self.table.to_records()], [fields(r) for r in self.records])
+
+    def test_dataframe(self):
+        df = self.table.to_dataframe()
+        self.assertEqual(df["engine"].dtype, "category")
+        self.assertEqual(df["energy"].sum(), 75.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,11 @@
 import os
+import re
 import unittest
 import time
 from regex_engine_factory import RegexEngineFactory
+from run_regex_engines import RegexEnginesExecutor
+from parallel_regex_engine import ParallelRegexEngine
+from process_usage import ProcessUsage
 import subprocess
 from dotenv import load_dotenv
 
@@ -23,7 +27,7 @@ class TestRegexEngines(unittest.TestCase):
         # Compile and start Java process
         subprocess.run(["javac", f"{self.factory.directory_to_store_engines}/RegexMatcher.java"])
         java_process = subprocess.Popen(
-            ["java", "-cp", self.factory.directory_to_store_engines, "RegexMatcher"],
+            ["java", "-cp", self.factory.directory_to_store_engines, "RegexMatcher"] + self.factory.engine_arguments(),
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
@@ -51,10 +55,11 @@ class TestRegexEngines(unittest.TestCase):
                     break
             output_lines.append(line)
         
-        # Verify output contains expected pattern matches
-        for i, pattern in enumerate(self.test_patterns.keys()):
-            expected_output = f"Pattern {i}: {pattern} - Matches: {self.test_patterns[pattern]}"
-            self.assertTrue(any(expected_output in line for line in output_lines))
+        # Verify the structured output contains the expected pattern matches and phase timings
+        results = RegexEnginesExecutor.parse_engine_output(output_lines)
+        self.assertEqual([(result["pattern"], result["matches"]) for result in results], list(self.test_patterns.items()))
+        self.assertIsNotNone(results[0]["load_ns"])
+        self.assertTrue(all(result["compile_ns"] >= 0 and result["match_ns"] >= 0 for result in results))
 
         self.assertEqual(java_process.wait(), 0)
     
@@ -62,7 +67,7 @@ class TestRegexEngines(unittest.TestCase):
     def test_javascript_engine_pipe_interaction(self):
         # Start Node.js process
         node_process = subprocess.Popen(
-            ["node", f"{self.factory.directory_to_store_engines}/regex_matcher.js"],
+            ["node", f"{self.factory.directory_to_store_engines}/regex_matcher.js"] + self.factory.engine_arguments(),
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
@@ -90,13 +95,40 @@ class TestRegexEngines(unittest.TestCase):
                     break
             output_lines.append(line)
         
-        # Verify output contains expected pattern matches
-        for i, pattern in enumerate(self.test_patterns.keys()):
-            expected_output = f"Pattern {i}: {pattern} - Matches: {self.test_patterns[pattern]}"
-            self.assertTrue(any(expected_output in line for line in output_lines))
+        # Verify the structured output contains the expected pattern matches and phase timings
+        results = RegexEnginesExecutor.parse_engine_output(output_lines)
+        self.assertEqual([(result["pattern"], result["matches"]) for result in results], list(self.test_patterns.items()))
+        self.assertIsNotNone(results[0]["load_ns"])
+        self.assertTrue(all(result["compile_ns"] >= 0 and result["match_ns"] >= 0 for result in results))
 
         self.assertEqual(node_process.wait(), 0)
 
+    # To run this test, you need to have Node.js installed.
+    def test_javascript_engine_worker_mode(self):
+        node_process = subprocess.Popen(
+            ["node", f"{self.factory.directory_to_store_engines}/regex_matcher.js", "--worker"] + self.factory.engine_arguments(),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True
+        )
+        self.assertEqual(node_process.stdout.readline().strip(), "ready")
+
+        # The warm process answers several jobs, each followed by "done", and reports the corpus load only once
+        for i, (pattern, expected_matches) in enumerate(self.test_patterns.items()):
+            node_process.stdin.write(f"start\t{self.factory.filepath_to_corpus}\t{pattern}\n")
+            node_process.stdin.flush()
+            output_lines = []
+            while (line := node_process.stdout.readline().strip()) != "done":
+                output_lines.append(line)
+            self.assertEqual(len(output_lines), 2 if i == 0 else 1)
+            results = RegexEnginesExecutor.parse_engine_output(output_lines)
+            self.assertEqual([(result["pattern"], result["matches"]) for result in results], [(pattern, expected_matches)])
+
+        node_process.stdin.write("exit\n")
+        node_process.stdin.flush()
+        self.assertEqual(node_process.wait(), 0)
+
     # To run this test, you need to have the Boost-regex library installed. And a c++ compiler installed.
     # command: vcpkg install boost-regex:x64-windows
     def test_boost_engine_pipe_interaction(self):
@@ -128,7 +160,7 @@ class TestRegexEngines(unittest.TestCase):
         
         # Start C++ process
         cpp_process = subprocess.Popen(
-            f"{self.factory.directory_to_store_engines}/regex_matcher.exe",
+            [f"{self.factory.directory_to_store_engines}/regex_matcher.exe"] + self.factory.engine_arguments(),
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
@@ -156,10 +188,11 @@ class TestRegexEngines(unittest.TestCase):
                     break
             output_lines.append(line)
         
-        # Verify output contains expected pattern matches
-        for i, pattern in enumerate(self.test_patterns.keys()):
-            expected_output = f"Pattern {i}: {pattern} - Matches: {self.test_patterns[pattern]}"
-            self.assertTrue(any(expected_output in line for line in output_lines))
+        # Verify the structured output contains the expected pattern matches and phase timings
+        results = RegexEnginesExecutor.parse_engine_output(output_lines)
+        self.assertEqual([(result["pattern"], result["matches"]) for result in results], list(self.test_patterns.items()))
+        self.assertIsNotNone(results[0]["load_ns"])
+        self.assertTrue(all(result["compile_ns"] >= 0 and result["match_ns"] >= 0 for result in results))
 
         self.assertEqual(cpp_process.wait(), 0)
 
@@ -185,7 +218,7 @@ class TestRegexEngines(unittest.TestCase):
 
         # Start the .NET process
         dotnet_process = subprocess.Popen(
-            [dotnet_exe_path, self.factory.filepath_to_corpus],
+            [dotnet_exe_path] + self.factory.engine_arguments(),
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
@@ -213,12 +246,64 @@ class TestRegexEngines(unittest.TestCase):
                     break
             output_lines.append(line)
         
-        # Verify output contains expected pattern matches
-        for i, pattern in enumerate(self.test_patterns.keys()):
-            expected_output = f"Pattern {i}: {pattern} - Matches: {self.test_patterns[pattern]}"
-            self.assertTrue(any(expected_output in line for line in output_lines))
+        # Verify the structured output contains the expected pattern matches and phase timings
+        results = RegexEnginesExecutor.parse_engine_output(output_lines)
+        self.assertEqual([(result["pattern"], result["matches"]) for result in results], list(self.test_patterns.items()))
+        self.assertIsNotNone(results[0]["load_ns"])
+        self.assertTrue(all(result["compile_ns"] >= 0 and result["match_ns"] >= 0 for result in results))
 
         self.assertEqual(dotnet_process.wait(), 0)
 
+    def test_python_engine_matching(self):
+        # The Python engine runs in-process, so no compiler or runtime is needed
+        for pattern, expected_matches in self.test_patterns.items():
+            executor = RegexEnginesExecutor(regex_engine="engine_python", corpus=self.factory.filepath_to_corpus, pattern=pattern)
+            executor.setUp()
+            results = getattr(executor, RegexEnginesExecutor.engine_methods["engine_python"])()
+            self.assertEqual([(result["pattern"], result["matches"]) for result in results], [(pattern, expected_matches)])
+
+    def test_python_engine_iterations(self):
+        # Warm-up iterations are numbered negatively and excluded from the mean timings
+        executor = RegexEnginesExecutor(regex_engine="engine_python", corpus=self.factory.filepath_to_corpus, pattern="Pickles", iterations=3, warmup=2)
+        result = executor.run_python_engine()[0]
+        self.assertEqual(result["matches"], self.test_patterns["Pickles"])
+        self.assertEqual([iteration["iteration"] for iteration in result["iterations"]], [-2, -1, 0, 1, 2])
+        self.assertAlmostEqual(result["match_ns"], sum(iteration["match_ns"] for iteration in result["iterations"][2:]) / 3)
+
+    def test_python_engine_match_modes(self):
+        # Counting and collecting find the same matches
+        for pattern, expected_matches in self.test_patterns.items():
+            for match_mode in ["count", "collect"]:
+                executor = RegexEnginesExecutor(regex_engine="engine_python", corpus=self.factory.filepath_to_corpus, pattern=pattern, match_mode=match_mode)
+                self.assertEqual(executor.run_python_engine()[0]["matches"], expected_matches)
+
+    def test_python_engine_batch(self):
+        # A batch of patterns shares one corpus load, reported with the first pattern
+        executor = RegexEnginesExecutor(regex_engine="engine_python", corpus=self.factory.filepath_to_corpus, pattern=None, patterns=list(self.test_patterns.keys()))
+        results = executor.run_python_engine()
+        self.assertEqual([(result["index"], result["pattern"], result["matches"]) for result in results],
+                         [(index, pattern, matches) for index, (pattern, matches) in enumerate(self.test_patterns.items())])
+        self.assertIsNotNone(results[0]["load_ns"])
+        self.assertTrue(all(result["load_ns"] is None for result in results[1:]))
+
+    @unittest.skipIf(os.name == "nt", "resource usage is not available on Windows")
+    def test_python_engine_process_usage(self):
+        executor = RegexEnginesExecutor(regex_engine="engine_python", corpus=self.factory.filepath_to_corpus, pattern="Pickles", iterations=20)
+        executor.run_python_engine()
+        self.assertEqual(set(executor.process_usage), set(ProcessUsage.keys))
+        self.assertGreater(executor.process_usage["peak_rss_bytes"], 0)
+        self.assertGreater(executor.process_usage["user_cpu_ns"] + executor.process_usage["system_cpu_ns"], 0)
+
+    def test_python_parallel_engine_matching(self):
+        # Patterns that can span lines must not be double-counted at chunk edges
+        with open(self.factory.filepath_to_corpus, "rb") as f:
+            corpus = f.read()
+        patterns = list(self.test_patterns.keys()) + [r"\w+\s+\w+", r"(?s).{0,12}?e", r"$", ""]
+        for pattern in patterns:
+            expected_matches = len(re.findall(pattern.encode(), corpus))
+            for workers in [1, 2]:
+                engine = ParallelRegexEngine(corpus=self.factory.filepath_to_corpus, pattern=pattern, workers=workers, chunks_per_worker=3)
+                self.assertEqual(engine.count(), expected_matches, f"pattern {pattern!r} with {workers} workers")
+
 if __name__ == '__main__':
     unittest.main()
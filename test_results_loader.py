@@ -0,0 +1,124 @@
+import os
+import json
+import tempfile
+import unittest
+from analysis.energy_record import EnergyRecord
+from analysis.results_loader import ResultsLoader
+
+class TestResultsLoader(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.results_dir = self.directory.name
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_run(self, name, result=None):
+        # Samples every second from t = 1000 s, with a power draw of 10 W
+        with open(os.path.join(self.results_dir, f"{name}.csv"), "w") as f:
+            f.write("Time,PACKAGE_ENERGY (J)\n")
+            for second in range(11):
+                f.write(f"{(1000 + second) * 1000},{second * 10}\n")
+        if result is not None:
+            with open(os.path.join(self.results_dir, f"{name}.json"), "w") as f:
+                json.dump(result, f)
+
+    def test_energy_is_integrated_over_the_matching_window(self):
+        self.write_run("engine_js_corpus_complexity_low_run_1", {
+            "outcome": "ok",
+            "signals": {"ready_ns": 1002.0e9, "start_ns": 1002.5e9, "done_ns": 1006.25e9}
+        })
+        record = ResultsLoader(self.results_dir).load_results()[0]
+        self.assertAlmostEqual(record.time, 3.75)
+        self.assertAlmostEqual(record.energy, 37.5)
+        self.assertAlmostEqual(record.total_time, 10)
+        self.assertAlmostEqual(record.total_energy, 100)
+
+    def test_runs_without_signals_cover_the_whole_process(self):
+        self.write_run("engine_js_corpus_complexity_low_run_1")
+        record = ResultsLoader(self.results_dir).load_results()[0]
+        self.assertEqual((record.time, record.energy, record.outcome), (10, 100, "ok"))
+
+    def test_runs_without_result_file_failed(self):
+        self.write_run("engine_js_corpus_complexity_low_run_1", {"outcome": "ok"})
+        self.write_run("engine_js_corpus_complexity_low_run_2")
+        outcomes = {r.run: r.outcome for r in ResultsLoader(self.results_dir).load_results()}
+        self.assertEqual(outcomes, {1: "ok", 2: "failed"})
+
+    def test_legacy_runs_without_result_files_completed(self):
+        self.write_run("engine_js_corpus_complexity_low_run_1")
+        first = ResultsLoader(self.results_dir).load_results()
+        self.assertEqual([r.outcome for r in first], ["ok"])
+
+        # Once a run has a result file the directory is no longer a legacy one, and the stored run is parsed again
+        self.write_run("engine_js_corpus_complexity_low_run_2", {"outcome": "ok"})
+        outcomes = {r.run: r.outcome for r in ResultsLoader(self.results_dir).load_results()}
+        self.assertEqual(outcomes, {1: "failed", 2: "ok"})
+
+    def test_timeout_window_ends_with_the_measurement(self):
+        self.write_run("engine_js_corpus_complexity_high_run_1", {"outcome": "timeout", "signals": {"ready_ns": 1001e9, "start_ns": 1001e9}})
+        record = ResultsLoader(self.results_dir).load_results()[0]
+        self.assertEqual(record.outcome, "timeout")
+        self.assertAlmostEqual(record.time, 9)
+
+    def test_batched_run_is_split_per_pattern(self):
+        iterations = lambda seconds: [{"iteration": 0, "compile_ns": 0, "match_ns": seconds * 1e9}]
+        self.write_run("engine_js_corpus_complexity_batch_run_1", {
+            "outcome": "ok",
+            "signals": {"ready_ns": 1002e9, "start_ns": 1002e9, "done_ns": 1006e9},
+            "results": [
+                {"index": 0, "label": "complexity_low", "iterations": iterations(1)},
+                {"index": 1, "label": "complexity_high", "iterations": iterations(3)}
+            ]
+        })
+        records = {r.regex_complexity: r for r in ResultsLoader(self.results_dir).load_results()}
+        self.assertEqual(set(records), {"low", "high", "overhead"})
+        self.assertAlmostEqual(records["low"].energy, 10)
+        self.assertAlmostEqual(records["high"].energy, 30)
+        self.assertAlmostEqual(records["overhead"].time, 6)
+        self.assertAlmostEqual(records["overhead"].energy, 60)
+
+    def test_store_parses_each_run_once(self):
+        self.write_run("engine_js_corpus_complexity_low_run_1")
+        self.write_run("engine_js_corpus_complexity_low_run_2")
+        ResultsLoader(self.results_dir).load_results()
+
+        loader = ResultsLoader(self.results_dir)
+        parsed = []
+        load_record = loader.load_record
+        loader.load_record = lambda path, df=None, result=None: parsed.append(os.path.basename(path)) or load_record(path, df, result)
+        result_files = []
+        load_result_file = loader.load_result_file
+        loader.load_result_file = lambda path: result_files.append(os.path.basename(path)) or load_result_file(path)
+
+        # A new run is parsed, the stored ones are not
+        self.write_run("engine_js_corpus_complexity_low_run_3")
+        self.assertEqual(len(loader.load_results()), 3)
+        self.assertEqual(parsed, ["engine_js_corpus_complexity_low_run_3.csv"])
+        # Its result file is parsed once
+        self.assertEqual(result_files, ["engine_js_corpus_complexity_low_run_3.csv"])
+
+        # A run with a new result file is parsed again, a removed run is dropped
+        parsed.clear()
+        self.write_run("engine_js_corpus_complexity_low_run_1", {"outcome": "timeout"})
+        os.remove(os.path.join(self.results_dir, "engine_js_corpus_complexity_low_run_2.csv"))
+        records = loader.load_results()
+        self.assertEqual(parsed, ["engine_js_corpus_complexity_low_run_1.csv"])
+        self.assertEqual(sorted((r.run, r.outcome) for r in records), [(1, "timeout"), (3, "ok")])
+
+    def test_store_keeps_batches_and_process_usage(self):
+        iterations = [{"iteration": 0, "compile_ns": 0, "match_ns": 1e9}]
+        self.write_run("engine_js_corpus_complexity_batch_run_1", {
+            "outcome": "ok",
+            "signals": {"ready_ns": 1002e9, "start_ns": 1002e9, "done_ns": 1006e9},
+            "process": {"peak_rss_bytes": 1024, "user_cpu_ns": 1e9, "system_cpu_ns": 0},
+            "results": [{"index": 0, "label": "complexity_low", "iterations": iterations}]
+        })
+        first = ResultsLoader(self.results_dir).load_results()
+        second = ResultsLoader(self.results_dir).load_results()
+        fields = lambda r: [getattr(r, name) for name in EnergyRecord.__slots__]
+        self.assertEqual([fields(r) for r in first], [fields(r) for r in second])
+        self.assertEqual({r.regex_complexity for r in second}, {"low", "overhead"})
+
+if __name__ == '__main__':
+    unittest.main()
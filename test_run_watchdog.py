@@ -0,0 +1,81 @@
+import multiprocessing
+import os
+import re
+import tempfile
+import time
+import unittest
+from unittest import mock
+from engine_driver import EngineTimeoutError
+from run_regex_engines import RegexEnginesExecutor
+from run_watchdog import RunWatchdog
+
+@unittest.skipUnless(RunWatchdog.supported(), "interval timers are not available")
+class TestRunWatchdog(unittest.TestCase):
+    def test_time_budget_interrupts_catastrophic_backtracking(self):
+        start_time = time.perf_counter()
+        with self.assertRaises(EngineTimeoutError):
+            with RunWatchdog(time_budget=0.5):
+                re.search(r"(a+)+$", "a" * 40 + "b")
+        self.assertLess(time.perf_counter() - start_time, 5)
+
+    def test_cpu_budget(self):
+        with self.assertRaises(EngineTimeoutError) as context:
+            with RunWatchdog(cpu_budget=0.5):
+                while True:
+                    pass
+        self.assertIn("CPU budget", str(context.exception))
+
+    def test_timeout_keeps_the_reported_results(self):
+        with tempfile.TemporaryDirectory() as directory:
+            corpus = os.path.join(directory, "corpus.txt")
+            with open(corpus, "w") as f:
+                f.write("a" * 40 + "b\n")
+            executor = RegexEnginesExecutor(regex_engine="engine_python", corpus=corpus, pattern=None,
+                                            patterns=["b", r"(a+)+$"], iterations=2, job_timeout=0.5)
+            with self.assertRaises(EngineTimeoutError) as context:
+                executor.run_python_engine()
+        # The first pattern completed both iterations, the second none
+        self.assertEqual([(r["pattern"], r["matches"], len(r["iterations"])) for r in context.exception.results], [("b", 1, 2)])
+
+    def test_parallel_engine_stops_within_the_budget(self):
+        with tempfile.TemporaryDirectory() as directory:
+            corpus = os.path.join(directory, "corpus.txt")
+            with open(corpus, "w") as f:
+                f.write(("a" * 28 + "b\n") * 8)
+            executor = RegexEnginesExecutor(regex_engine="engine_python_parallel", corpus=corpus, pattern=None,
+                                            patterns=[r"(a+)+$"], workers=2, job_timeout=1.0)
+            start_time = time.perf_counter()
+            with self.assertRaises(EngineTimeoutError):
+                executor.run_python_parallel_engine()
+        self.assertLess(time.perf_counter() - start_time, 10)
+        # The workers stuck in backtracking were killed rather than waited for
+        self.assertEqual(multiprocessing.active_children(), [])
+
+    def test_child_process_without_interval_timers(self):
+        with tempfile.TemporaryDirectory() as directory:
+            corpus = os.path.join(directory, "corpus.txt")
+            with open(corpus, "w") as f:
+                f.write(("a" * 28 + "b\n") * 8)
+            for engine, method in [("engine_python", "run_python_engine"), ("engine_python_parallel", "run_python_parallel_engine")]:
+                executor = RegexEnginesExecutor(regex_engine=engine, corpus=corpus, pattern=None, workers=2,
+                                                patterns=["b", r"(a+)+$"], iterations=2, job_timeout=2.0)
+                start_time = time.perf_counter()
+                with mock.patch.object(RunWatchdog, "supported", return_value=False):
+                    with self.assertRaises(EngineTimeoutError) as context:
+                        getattr(executor, method)()
+                self.assertLess(time.perf_counter() - start_time, 15)
+                # The child reported the first pattern before it was killed
+                self.assertEqual([(r["pattern"], r["matches"], len(r["iterations"])) for r in context.exception.results], [("b", 8, 2)])
+
+            executor = RegexEnginesExecutor(regex_engine="engine_python", corpus=corpus, pattern=None, patterns=["b", "a+"], job_timeout=10)
+            with mock.patch.object(RunWatchdog, "supported", return_value=False):
+                self.assertEqual([r["matches"] for r in executor.run_python_engine()], [8, 8])
+            self.assertEqual(set(executor.signal_times), {"ready_ns", "start_ns", "done_ns"})
+
+    def test_timers_are_disarmed_after_the_run(self):
+        with RunWatchdog(time_budget=0.2, cpu_budget=0.2):
+            pass
+        time.sleep(0.4)
+
+if __name__ == '__main__':
+    unittest.main()
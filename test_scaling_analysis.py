@@ -0,0 +1,24 @@
+import unittest
+from analysis.energy_record import EnergyRecord
+from analysis.scaling_analysis import ScalingAnalysis
+
+class TestScalingAnalysis(unittest.TestCase):
+    def test_fixed_and_marginal_cost(self):
+        # Time is 0.5 s to start plus 0.1 s per MB, energy 5 J plus 2 J per MB
+        records = [EnergyRecord("engine_c", "low", run, 0.5 + 0.1 * size, 5 + 2 * size, f"corpus_{size}mb", size)
+                   for size in [1.0, 10.0, 100.0] for run in range(3)]
+        records.append(EnergyRecord("engine_c", "low", 0, 9.0, 90.0))
+        fits = ScalingAnalysis(records).fit()
+
+        self.assertEqual(list(fits), [("low", "engine_c")])
+        self.assertAlmostEqual(fits[("low", "engine_c")]["time"]["fixed_cost"], 0.5)
+        self.assertAlmostEqual(fits[("low", "engine_c")]["energy"]["marginal_cost_per_mb"], 2.0)
+        # Records without a corpus size are left out
+        self.assertEqual(fits[("low", "engine_c")]["time"]["sizes_mb"], [1.0, 10.0, 100.0])
+
+    def test_single_size_has_no_fit(self):
+        records = [EnergyRecord("engine_c", "low", run, 1.0, 10.0, "corpus_1mb", 1.0) for run in range(3)]
+        self.assertIsNone(ScalingAnalysis(records).fit()[("low", "engine_c")]["time"])
+
+if __name__ == '__main__':
+    unittest.main()
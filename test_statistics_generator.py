@@ -0,0 +1,41 @@
+import json
+import os
+import tempfile
+import unittest
+from analysis.energy_record import EnergyRecord
+from analysis.statistics_generator import StatisticsGenerator
+
+class TestStatisticsGenerator(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def generate(self, records):
+        valid = StatisticsGenerator(records, results_dir=self.directory.name, outlier_method="iqr").generate()
+        with open(os.path.join(self.directory.name, "stats.txt"), encoding="utf-8") as f:
+            # Each group is a header line, its JSON stats and two lines of outliers
+            blocks = f.read().split("=== Engine: ")[1:]
+        return valid, {block.split(" ===")[0]: json.loads(block.split("===\n", 1)[1].split("\nOutliers")[0]) for block in blocks}
+
+    def test_group_where_every_run_timed_out(self):
+        records = [EnergyRecord("engine_c", "high", run, 600.0, 6000.0, outcome="timeout",
+                                process={"peak_rss_bytes": 1024, "user_cpu_ns": 1e9, "system_cpu_ns": 0}) for run in range(3)]
+        records += [EnergyRecord("engine_c", "low", run, 1.0, 10.0, process={"peak_rss_bytes": 1024, "user_cpu_ns": 1e9, "system_cpu_ns": 0})
+                    for run in range(3)]
+        valid, stats = self.generate(records)
+
+        self.assertEqual(len(valid), 3)
+        high = stats["engine_c | Complexity: high"]
+        self.assertEqual(high["outcomes"], {"ok": 0, "timeout": 3, "failed": 0})
+        self.assertIsNone(high["time"]["mean"])
+        self.assertNotIn("process", high)
+
+        # Resources that were not reported are left out rather than given empty stats
+        process = stats["engine_c | Complexity: low"]["process"]
+        self.assertEqual(process["peak_rss_mb"]["mean"], 1024 / (1024 * 1024))
+        self.assertNotIn("minor_page_faults", process)
+
+if __name__ == '__main__':
+    unittest.main()
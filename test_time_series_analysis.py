@@ -0,0 +1,52 @@
+import unittest
+import pandas as pd
+from analysis.results_loader import ResultsLoader
+from analysis.time_series_analysis import TimeSeriesAnalysis
+
+class TestTimeSeriesAnalysis(unittest.TestCase):
+    def run_series(self, seconds, package_watts, dram_watts=None, frequencies=None, usage=None):
+        # Samples every second from t = 1000 s
+        df = pd.DataFrame({"Time": [(1000 + s) * 1000 for s in range(seconds + 1)]})
+        df["PACKAGE_ENERGY (J)"] = pd.Series([0] + package_watts).cumsum()
+        if dram_watts is not None:
+            df["DRAM_ENERGY (J)"] = pd.Series([0] + dram_watts).cumsum()
+        if frequencies is not None:
+            for core, frequency in enumerate(frequencies):
+                df[f"CPU_FREQUENCY_{core}"] = frequency
+        if usage is not None:
+            df["CPU_USAGE_0"] = usage
+        return df
+
+    def test_metrics_of_several_runs(self):
+        first = self.run_series(4, [10, 20, 10, 10], dram_watts=[1, 1, 1, 1], frequencies=[2000, 3000], usage=50)
+        second = self.run_series(2, [5, 5])
+        metrics = TimeSeriesAnalysis().compute([(first, float("-inf"), float("inf")), (second, float("-inf"), float("inf"))])
+        self.assertEqual(metrics[0], {"package_energy": 50, "dram_energy": 4, "average_power": 12.5, "peak_power": 20,
+                                      "average_frequency": 2500, "cpu_utilisation": 50})
+        # Columns a run does not have are left out
+        self.assertEqual(metrics[1], {"package_energy": 10, "average_power": 5, "peak_power": 5})
+
+    def test_metrics_over_the_matching_window(self):
+        df = self.run_series(4, [10, 20, 10, 10])
+        metrics = TimeSeriesAnalysis().compute([(df, 1000e3, 1002e3), (df, 1003.2e3, 1003.5e3)])
+        self.assertEqual((metrics[0]["package_energy"], metrics[0]["peak_power"]), (30, 20))
+        # A window between two samples is interpolated within the interval it falls in
+        self.assertAlmostEqual(metrics[1]["package_energy"], 3)
+        self.assertEqual(metrics[1]["peak_power"], 10)
+
+    def test_package_energy_matches_window_energy(self):
+        df = self.run_series(4, [10, 20, 10, 10])
+        windows = [(999.5e3, 1001.25e3), (1000.5e3, 1003.75e3), (1003e3, 1006e3)]
+        metrics = TimeSeriesAnalysis().compute([(df, start, end) for start, end in windows])
+        for (start, end), run_metrics in zip(windows, metrics):
+            time, energy = ResultsLoader().window_energy(df, start, end)
+            self.assertAlmostEqual(run_metrics["package_energy"], energy)
+            self.assertAlmostEqual(run_metrics["average_power"], energy / time)
+
+    def test_used_columns(self):
+        self.assertTrue(TimeSeriesAnalysis.is_used_column("PP0_ENERGY (J)"))
+        self.assertTrue(TimeSeriesAnalysis.is_used_column("CPU_FREQUENCY_3"))
+        self.assertFalse(TimeSeriesAnalysis.is_used_column("USED_MEMORY"))
+
+if __name__ == '__main__':
+    unittest.main()